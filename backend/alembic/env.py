@@ -0,0 +1,74 @@
+# backend/alembic/env.py
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import async_engine_from_config
+
+from app.core.database import get_database_url
+from app.models import Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def _database_url() -> str:
+    url = config.get_main_option("sqlalchemy.url") or get_database_url()
+    if not url:
+        raise RuntimeError("DATABASE_URL must be set to run migrations")
+    return url
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting to a database"""
+    context.configure(
+        url=_database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    
+    with context.begin_transaction():
+        context.run_migrations()
+
+def _include_object(dialect_name: str):
+    def include_object(obj, name, type_, reflected, compare_to) -> bool:
+        # GIN indexes are only created on PostgreSQL (see 0002), so other databases don't lack them
+        if type_ == "index" and dialect_name != "postgresql":
+            return obj.dialect_options["postgresql"].get("using") != "gin"
+        return True
+    return include_object
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=_include_object(connection.dialect.name),
+    )
+    
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_async_migrations() -> None:
+    """Run migrations against the database through the async engine"""
+    configuration = config.get_section(config.config_ini_section, {})
+    configuration["sqlalchemy.url"] = _database_url()
+    connectable = async_engine_from_config(
+        configuration,
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    
+    await connectable.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_async_migrations())
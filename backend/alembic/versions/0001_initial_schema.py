@@ -0,0 +1,163 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# JSONB on PostgreSQL so the searchable columns can be GIN indexed
+JSONB_TYPE = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+def _timestamps() -> list:
+    return [
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("email", sa.String(length=255), nullable=False, unique=True),
+        sa.Column("display_name", sa.String(length=255), nullable=True),
+        *_timestamps(),
+    )
+    op.create_table(
+        "learning_paths",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("total_duration_hours", sa.Integer(), nullable=True),
+        sa.Column("difficulty_level", sa.String(length=50), nullable=True),
+        sa.Column("certification_target", sa.String(length=255), nullable=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("metadata", sa.JSON(), nullable=True),
+        *_timestamps(),
+    )
+    op.create_table(
+        "path_nodes",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column(
+            "learning_path_id", sa.String(), sa.ForeignKey("learning_paths.id"), nullable=True
+        ),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("order", sa.Integer(), nullable=True),
+        sa.Column("duration_hours", sa.Integer(), nullable=True),
+        sa.Column("type", sa.String(length=50), nullable=True),
+        sa.Column("status", sa.String(length=50), nullable=True),
+        sa.Column("prerequisites", JSONB_TYPE, nullable=True),
+        sa.Column("topics", JSONB_TYPE, nullable=True),
+        sa.Column("resources", sa.JSON(), nullable=True),
+        *_timestamps(),
+    )
+    op.create_table(
+        "learning_progress",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column(
+            "learning_path_id", sa.String(), sa.ForeignKey("learning_paths.id"), nullable=True
+        ),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("completed_nodes", JSONB_TYPE, nullable=True),
+        sa.Column("current_node_id", sa.String(), nullable=True),
+        sa.Column("overall_progress", sa.Float(), nullable=True),
+        sa.Column("total_points_earned", sa.Integer(), nullable=True),
+        sa.Column("badges_earned", sa.JSON(), nullable=True),
+        sa.Column("last_activity", sa.DateTime(), nullable=True),
+        sa.Column("time_spent_hours", sa.Float(), nullable=True),
+        *_timestamps(),
+    )
+    op.create_table(
+        "exercises",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("node_id", sa.String(), sa.ForeignKey("path_nodes.id"), nullable=True),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("type", sa.String(length=50), nullable=True),
+        sa.Column("difficulty", sa.String(length=50), nullable=True),
+        sa.Column("estimated_time_minutes", sa.Integer(), nullable=True),
+        sa.Column("points", sa.Integer(), nullable=True),
+        sa.Column("instructions", sa.JSON(), nullable=True),
+        sa.Column("sandbox_url", sa.Text(), nullable=True),
+        sa.Column("starter_code", sa.Text(), nullable=True),
+        sa.Column("test_cases", sa.JSON(), nullable=True),
+        sa.Column("hints", sa.JSON(), nullable=True),
+        *_timestamps(),
+    )
+    op.create_table(
+        "exercise_submissions",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("exercise_id", sa.String(), sa.ForeignKey("exercises.id"), nullable=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("solution", sa.Text(), nullable=True),
+        sa.Column("language", sa.String(length=50), nullable=True),
+        sa.Column("passed", sa.Boolean(), nullable=True),
+        sa.Column("test_results", sa.JSON(), nullable=True),
+        sa.Column("points_earned", sa.Integer(), nullable=True),
+        sa.Column("time_taken_minutes", sa.Integer(), nullable=True),
+        sa.Column("feedback", sa.Text(), nullable=True),
+        *_timestamps(),
+    )
+    op.create_table(
+        "quizzes",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("node_id", sa.String(), sa.ForeignKey("path_nodes.id"), nullable=True),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("passing_score", sa.Integer(), nullable=True),
+        sa.Column("time_limit_minutes", sa.Integer(), nullable=True),
+        sa.Column("max_attempts", sa.Integer(), nullable=True),
+        *_timestamps(),
+    )
+    op.create_table(
+        "quiz_questions",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("quiz_id", sa.String(), sa.ForeignKey("quizzes.id"), nullable=True),
+        sa.Column("question", sa.Text(), nullable=False),
+        sa.Column("type", sa.String(length=50), nullable=True),
+        sa.Column("options", sa.JSON(), nullable=True),
+        sa.Column("correct_answer", sa.Integer(), nullable=True),
+        sa.Column("correct_answers", sa.JSON(), nullable=True),
+        sa.Column("explanation", sa.Text(), nullable=True),
+        sa.Column("points", sa.Integer(), nullable=True),
+        sa.Column("order", sa.Integer(), nullable=True),
+        *_timestamps(),
+    )
+    op.create_table(
+        "quiz_attempts",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("quiz_id", sa.String(), sa.ForeignKey("quizzes.id"), nullable=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("score", sa.Integer(), nullable=True),
+        sa.Column("passed", sa.Boolean(), nullable=True),
+        sa.Column("answers", sa.JSON(), nullable=True),
+        sa.Column("time_taken_minutes", sa.Integer(), nullable=True),
+        sa.Column("attempt_number", sa.Integer(), nullable=True),
+        *_timestamps(),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("quiz_attempts")
+    op.drop_table("quiz_questions")
+    op.drop_table("quizzes")
+    op.drop_table("exercise_submissions")
+    op.drop_table("exercises")
+    op.drop_table("learning_progress")
+    op.drop_table("path_nodes")
+    op.drop_table("learning_paths")
+    op.drop_table("users")
@@ -0,0 +1,104 @@
+"""Indexes for the hot query patterns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:01
+
+Composite B-tree indexes follow the real lookups (equality columns first,
+then the ordering column) and GIN indexes cover JSONB containment filters
+such as ``topics @> '["MLOps"]'``. On PostgreSQL the indexes are built
+CONCURRENTLY so the migration does not block writes on populated tables.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, unique)
+BTREE_INDEXES = [
+    ("ix_learning_paths_user_id_created_at", "learning_paths", ["user_id", "created_at"], False),
+    ("ix_path_nodes_learning_path_id_order", "path_nodes", ["learning_path_id", "order"], False),
+    ("ix_exercises_node_id", "exercises", ["node_id"], False),
+    ("ix_quizzes_node_id", "quizzes", ["node_id"], False),
+    ("ix_quiz_questions_quiz_id_order", "quiz_questions", ["quiz_id", "order"], False),
+    (
+        "ix_quiz_attempts_user_id_quiz_id_created_at",
+        "quiz_attempts",
+        ["user_id", "quiz_id", "created_at"],
+        False,
+    ),
+    ("ix_quiz_attempts_quiz_id_created_at", "quiz_attempts", ["quiz_id", "created_at"], False),
+    (
+        "ix_exercise_submissions_user_id_exercise_id_created_at",
+        "exercise_submissions",
+        ["user_id", "exercise_id", "created_at"],
+        False,
+    ),
+    (
+        "ix_exercise_submissions_exercise_id_created_at",
+        "exercise_submissions",
+        ["exercise_id", "created_at"],
+        False,
+    ),
+    (
+        "ix_learning_progress_user_id_learning_path_id",
+        "learning_progress",
+        ["user_id", "learning_path_id"],
+        True,
+    ),
+    ("ix_learning_progress_learning_path_id", "learning_progress", ["learning_path_id"], False),
+]
+
+# (name, table, column) - JSONB containment indexes, PostgreSQL only
+GIN_INDEXES = [
+    ("ix_path_nodes_topics_gin", "path_nodes", "topics"),
+    ("ix_path_nodes_prerequisites_gin", "path_nodes", "prerequisites"),
+    ("ix_learning_progress_completed_nodes_gin", "learning_progress", "completed_nodes"),
+]
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in BTREE_INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=unique,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        
+        if is_postgres:
+            for name, table, column in GIN_INDEXES:
+                op.create_index(
+                    name,
+                    table,
+                    [column],
+                    postgresql_using="gin",
+                    postgresql_ops={column: "jsonb_path_ops"},
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+
+
+def downgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    
+    with op.get_context().autocommit_block():
+        if is_postgres:
+            for name, table, _ in reversed(GIN_INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        
+        for name, table, _, _ in reversed(BTREE_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,80 @@
+"""Append-only progress event log with materialized summaries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "progress_events",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column(
+            "learning_path_id", sa.String(), nullable=False
+        ),
+        sa.Column("node_id", sa.String(), nullable=True),
+        sa.Column("event_type", sa.String(length=50), nullable=False),
+        sa.Column("points", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ix_progress_events_user_id_learning_path_id_created_at",
+        "progress_events",
+        ["user_id", "learning_path_id", "created_at"],
+    )
+    op.create_table(
+        "node_progress",
+        sa.Column("user_id", sa.String(), primary_key=True),
+        sa.Column(
+            "learning_path_id", sa.String(), primary_key=True
+        ),
+        sa.Column("node_id", sa.String(), primary_key=True),
+        sa.Column("status", sa.String(length=50), nullable=True),
+        sa.Column("points_earned", sa.Integer(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "path_progress_summaries",
+        sa.Column("user_id", sa.String(), primary_key=True),
+        sa.Column(
+            "learning_path_id", sa.String(), primary_key=True
+        ),
+        sa.Column("started_nodes", sa.Integer(), nullable=True),
+        sa.Column("completed_nodes", sa.Integer(), nullable=True),
+        sa.Column("total_points_earned", sa.Integer(), nullable=True),
+        sa.Column("current_node_id", sa.String(), nullable=True),
+        sa.Column("last_activity", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "user_progress_summaries",
+        sa.Column("user_id", sa.String(), primary_key=True),
+        sa.Column("paths_started", sa.Integer(), nullable=True),
+        sa.Column("completed_nodes", sa.Integer(), nullable=True),
+        sa.Column("total_points_earned", sa.Integer(), nullable=True),
+        sa.Column("last_activity", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_progress_summaries")
+    op.drop_table("path_progress_summaries")
+    op.drop_table("node_progress")
+    op.drop_index(
+        "ix_progress_events_user_id_learning_path_id_created_at", table_name="progress_events"
+    )
+    op.drop_table("progress_events")
@@ -0,0 +1,63 @@
+"""Drop the foreign keys of the history tables
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:03
+
+Generated paths, quiz attempts and exercise submissions are recorded for
+users, quizzes and exercises that have no rows of their own (they live in
+the in-memory stores), so these foreign keys made every history insert
+fail. Like the progress tables, the history tables keep plain ID columns.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referenced table)
+HISTORY_FOREIGN_KEYS = [
+    ("learning_paths", "user_id", "users"),
+    ("exercise_submissions", "exercise_id", "exercises"),
+    ("exercise_submissions", "user_id", "users"),
+    ("quiz_attempts", "quiz_id", "quizzes"),
+    ("quiz_attempts", "user_id", "users"),
+]
+
+# How the unnamed constraints from 0001 are named: PostgreSQL's default
+# naming, and the convention batch mode uses to find them on SQLite
+POSTGRES_FK_NAME = "{table}_{column}_fkey"
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _fk_name(table: str, column: str, referred: str, is_postgres: bool) -> str:
+    if is_postgres:
+        return POSTGRES_FK_NAME.format(table=table, column=column)
+    return f"fk_{table}_{column}_{referred}"
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    
+    for table in dict.fromkeys(table for table, _, _ in HISTORY_FOREIGN_KEYS):
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch:
+            for fk_table, column, referred in HISTORY_FOREIGN_KEYS:
+                if fk_table == table:
+                    batch.drop_constraint(_fk_name(table, column, referred, is_postgres), type_="foreignkey")
+
+
+def downgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    
+    for table in dict.fromkeys(table for table, _, _ in HISTORY_FOREIGN_KEYS):
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch:
+            for fk_table, column, referred in HISTORY_FOREIGN_KEYS:
+                if fk_table == table:
+                    batch.create_foreign_key(
+                        _fk_name(table, column, referred, is_postgres), referred, [column], ["id"]
+                    )
@@ -1,8 +1,9 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.database import get_session_factory
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,17 +11,17 @@ logger = logging.getLogger(__name__)
 # Security scheme for future authentication
 security = HTTPBearer(auto_error=False)
 
-def get_db() -> Generator:
+async def get_db() -> AsyncGenerator[Optional[AsyncSession], None]:
     """
-    Database dependency - for future use when DB is implemented
+    Database dependency - yields None when DATABASE_URL is not configured
     """
-    # When database is implemented:
-    # try:
-    #     db = SessionLocal()
-    #     yield db
-    # finally:
-    #     db.close()
-    pass
+    session_factory = get_session_factory()
+    if session_factory is None:
+        yield None
+        return
+    
+    async with session_factory() as db:
+        yield db
 
 def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
@@ -35,6 +36,16 @@ def get_current_user(
         return {"id": "user_123", "email": "user@example.com"}
     return None
 
+def get_user_id(
+    current_user: Optional[dict] = Depends(get_current_user)
+) -> str:
+    """
+    Get the id progress and submissions are recorded under
+    """
+    if current_user:
+        return current_user["id"]
+    return "anonymous"
+
 def require_user(
     current_user: Optional[dict] = Depends(get_current_user)
 ) -> dict:
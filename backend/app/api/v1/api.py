@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import learning_path, quiz, exercise, health
+from app.api.v1.endpoints import learning_path, quiz, exercise, health, jobs
 
 api_router = APIRouter()
 
@@ -22,6 +22,12 @@ api_router.include_router(
     tags=["Exercise"]
 )
 
+api_router.include_router(
+    jobs.router,
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
 api_router.include_router(
     health.router,
     prefix="/health",
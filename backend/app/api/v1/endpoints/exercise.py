@@ -1,10 +1,23 @@
 # backend/app/api/v1/endpoints/exercise.py
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Body, Depends, Query
+from typing import Dict, Any, Optional
 import logging
 
+from app.api.deps import get_user_id
+from app.api.v1.endpoints.jobs import job_accepted
+from app.core.config import settings
+from app.core.exceptions import CustomException
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.sse import event_stream
 from app.services.ai_service import AIService
+from app.services.code_runner import is_reproducible
+from app.services.exercise_service import exercise_service
+from app.services.history_service import history_service
+from app.services.job_queue import job_queue
+from app.services.learning_path_service import learning_path_service
+from app.services.submission_cache import submission_cache, submission_fingerprint
 from app.schemas.exercise import ExerciseSubmission
+from app.utils.validators import validate_code_submission
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -12,9 +25,12 @@ ai_service = AIService()
 
 # Helper function to get exercise by ID
 async def get_exercise_by_id(exercise_id: str) -> Dict[str, Any]:
-    """Get exercise by ID - mock implementation"""
-    # In production, fetch from database
-    # For now, return mock data
+    """Get exercise by ID from the generated learning paths, or mock data"""
+    exercise = await learning_path_service.get_exercise(exercise_id)
+    if exercise:
+        return exercise
+    
+    # Not part of a stored path - return mock data
     return {
         "id": exercise_id,
         "title": "Sample Exercise",
@@ -63,25 +79,68 @@ async def generate_exercise(
         logger.error(f"Error generating exercise: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _evaluate(exercise: Dict[str, Any], submission: ExerciseSubmission) -> Dict[str, Any]:
+    """Run the tests and have the model review the result, cached by submission fingerprint"""
+    reproducible = True
+    
+    async def evaluate() -> Dict[str, Any]:
+        nonlocal reproducible
+        # Run the real tests first; the model only reviews what they found
+        test_run = await exercise_service.run_tests_for_review(exercise, submission.solution, submission.language)
+        reproducible = test_run is None or is_reproducible(test_run)
+        return await ai_service.evaluate_exercise_submission(
+            exercise=exercise,
+            submission=submission.solution,
+            language=submission.language,
+            test_run=test_run
+        )
+    
+    # AI evaluation, reused for resubmissions of unchanged (or only reformatted) code
+    evaluation, cached = await submission_cache.get_or_compute(
+        "evaluation",
+        submission_fingerprint(exercise, submission.solution, submission.language),
+        evaluate,
+        cacheable=lambda evaluation: reproducible and evaluation.get("review") != "fallback"
+    )
+    return {**evaluation, "cached": cached}
+
+async def _evaluate_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    exercise = await get_exercise_by_id(payload["exercise_id"])
+    return await _evaluate(exercise, ExerciseSubmission.model_validate(payload["submission"]))
+
+job_queue.register("exercise.evaluate", _evaluate_job, settings.JOB_CONCURRENCY_EVALUATION)
+
 @router.post("/{exercise_id}/evaluate")
 async def evaluate_submission(
     exercise_id: str,
-    submission: ExerciseSubmission
+    submission: ExerciseSubmission,
+    job: bool = Query(False, description="Return 202 with a background job instead of waiting for the evaluation"),
+    user_id: str = Depends(get_user_id)
 ):
     """AI evaluation of exercise submission"""
     try:
+        # Reject unsafe code before any sandbox or model work is spent on it
+        validate_code_submission(submission.solution, submission.language)
+        
         # Get exercise details
         exercise = await get_exercise_by_id(exercise_id)
         
-        # AI evaluation
-        evaluation = await ai_service.evaluate_exercise_submission(
-            exercise=exercise,
-            submission=submission.solution,
-            language=submission.language
-        )
+        if job:
+            # An evaluation that is already cached is returned right away, not queued
+            evaluation = submission_cache.peek(
+                "evaluation", submission_fingerprint(exercise, submission.solution, submission.language)
+            )
+            if evaluation is None:
+                return job_accepted(await job_queue.submit(
+                    "exercise.evaluate",
+                    {"exercise_id": exercise_id, "submission": submission.model_dump(mode="json")},
+                    user_id
+                ))
         
-        return evaluation
+        return await _evaluate(exercise, submission)
         
+    except CustomException:
+        raise
     except Exception as e:
         logger.error(f"Error evaluating submission: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -90,10 +149,14 @@ async def evaluate_submission(
 async def get_hint(
     exercise_id: str,
     current_code: str = Body(...),
-    hint_level: int = Body(1)
+    hint_level: int = Body(1),
+    language: str = Body("python")
 ):
     """Get AI-generated hint for exercise"""
     try:
+        # Work in progress may be empty, but is still checked before going to the model
+        validate_code_submission(current_code, language, allow_empty=True)
+        
         exercise = await get_exercise_by_id(exercise_id)
         
         hint = await ai_service.provide_hint(
@@ -104,6 +167,8 @@ async def get_hint(
         
         return {"hint": hint, "level": hint_level}
         
+    except CustomException:
+        raise
     except Exception as e:
         logger.error(f"Error generating hint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -111,59 +176,84 @@ async def get_hint(
 @router.post("/{exercise_id}/submit")
 async def submit_exercise(
     exercise_id: str,
-    submission: ExerciseSubmission
+    submission: ExerciseSubmission,
+    user_id: str = Depends(get_user_id),
+    stream: bool = Query(False, description="Stream a `compile` event (compiled languages), a `test` event per test as it finishes, then the `result` (SSE)")
 ):
     """Submit exercise for evaluation"""
     try:
+        validate_code_submission(submission.solution, submission.language)
+        
         # Get exercise details
         exercise = await get_exercise_by_id(exercise_id)
         
-        # For now, return mock evaluation
-        # In production, this would run actual tests
-        return {
-            "exercise_id": exercise_id,
-            "passed": True,
-            "test_results": [
-                {
-                    "name": "Test 1",
-                    "passed": True,
-                    "feedback": "Correct solution"
-                }
-            ],
-            "feedback": "Great work! All tests passed.",
-            "points_earned": exercise.get("points", 100)
-        }
+        async def record(result: Dict[str, Any]) -> None:
+            await history_service.record_submission(
+                user_id,
+                exercise_id,
+                solution=submission.solution,
+                language=submission.language,
+                time_taken_minutes=submission.time_taken_minutes,
+                result=result
+            )
+        
+        if stream:
+            async def events():
+                async for event, data in exercise_service.stream_submission(exercise, submission):
+                    if event == "result":
+                        data = data.model_dump()
+                        await record(data)
+                    yield event, data
+            return event_stream(events())
         
+        # Run the exercise's test cases in the sandbox
+        result = (await exercise_service.submit_exercise(exercise, submission)).model_dump()
+        await record(result)
+        return result
+        
+    except CustomException:
+        raise
     except Exception as e:
         logger.error(f"Error submitting exercise: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{exercise_id}/submissions")
+async def list_submissions(
+    exercise_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False
+):
+    """List submissions for an exercise, newest first (pass next_cursor back as cursor)"""
+    try:
+        return await history_service.list_submissions(exercise_id, cursor, limit, include_total)
+    except CustomException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing submissions: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/{exercise_id}/test")
 async def run_tests(
     exercise_id: str,
-    code: str = Body(...)
+    code: str = Body(...),
+    language: str = Body("python"),
+    max_failures: Optional[int] = Body(None, ge=0),
+    stream: bool = Query(False, description="Stream a `compile` event (compiled languages), a `test` event per test as it finishes, then a `summary` (SSE)")
 ):
     """Run tests on submitted code"""
     try:
+        validate_code_submission(code, language)
+        
         exercise = await get_exercise_by_id(exercise_id)
         
-        # Mock test results
-        # In production, this would run actual tests in a sandboxed environment
-        return {
-            "test_results": [
-                {
-                    "name": "Test 1",
-                    "passed": True,
-                    "input": "test input",
-                    "expected": "expected output",
-                    "actual": "actual output"
-                }
-            ],
-            "all_passed": True,
-            "passed_count": 1,
-            "total_count": 1
-        }
+        # Test cases run in parallel sandboxed, resource-limited processes
+        if stream:
+            return event_stream(exercise_service.stream_tests(exercise, code, language, max_failures))
+        return await exercise_service.run_tests(exercise, code, language, max_failures)
         
+    except CustomException:
+        raise
     except Exception as e:
         logger.error(f"Error running tests: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from typing import Dict, Any
 from datetime import datetime
 from app.core.config import settings
+from app.core.metrics import metrics
 
 router = APIRouter()
 
@@ -32,4 +33,12 @@ async def readiness_check() -> Dict[str, Any]:
         "ready": all_ready,
         "checks": checks,
         "timestamp": datetime.utcnow().isoformat()
-    }
\ No newline at end of file
+    }
+
+@router.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """In-process metrics of this worker (cache hit ratios, invalidation lag, buffers)"""
+    return {
+        "metrics": metrics.snapshot(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
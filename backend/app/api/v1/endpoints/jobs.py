@@ -0,0 +1,72 @@
+# backend/app/api/v1/endpoints/jobs.py
+from fastapi import APIRouter, HTTPException, Depends, Response
+from typing import Dict, Any
+import logging
+
+from app.api.deps import get_user_id
+from app.core.config import settings
+from app.core.exceptions import ConflictException, CustomException, NotFoundException
+from app.core.serialization import dumps, json_bytes_response
+from app.core.sse import event_stream
+from app.services.job_queue import job_queue
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def job_accepted(job: Dict[str, Any]) -> Response:
+    """202 for a queued job, with where to poll it and subscribe to it"""
+    location = f"{settings.API_V1_STR}/jobs/{job['job_id']}"
+    body = {**job, "status_url": location, "events_url": f"{location}/events"}
+    return json_bytes_response(dumps(body), status_code=202, headers={"Location": location})
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, user_id: str = Depends(get_user_id)):
+    """Status of a background job, with its result once it has succeeded (or error once it has failed)"""
+    try:
+        job = await job_queue.get(job_id, user_id)
+        if job is None:
+            raise NotFoundException(f"Job {job_id} not found")
+        return job
+    except CustomException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting job {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, user_id: str = Depends(get_user_id)):
+    """
+    Server-sent events for a job: one per status change, named after the
+    status (queued, running, then succeeded, failed or cancelled), each
+    carrying the job as GET /jobs/{job_id} returns it
+    """
+    try:
+        if await job_queue.get(job_id, user_id) is None:
+            raise NotFoundException(f"Job {job_id} not found")
+        
+        async def events():
+            async for job in job_queue.watch(job_id, user_id):
+                yield job["status"], job
+        return event_stream(events())
+        
+    except CustomException:
+        raise
+    except Exception as e:
+        logger.error(f"Error watching job {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, user_id: str = Depends(get_user_id)):
+    """Cancel a job that hasn't started yet"""
+    try:
+        cancelled = await job_queue.cancel(job_id, user_id)
+        if cancelled is None:
+            raise NotFoundException(f"Job {job_id} not found")
+        if not cancelled:
+            raise ConflictException(f"Job {job_id} has already started")
+        return await job_queue.get(job_id, user_id)
+    except CustomException:
+        raise
+    except Exception as e:
+        logger.error(f"Error cancelling job {job_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
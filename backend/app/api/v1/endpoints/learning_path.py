@@ -1,79 +1,196 @@
 # backend/app/api/v1/endpoints/learning_path.py
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Body, Depends, Query, Request, Response
+from typing import Dict, Any, Optional
+import hashlib
 import logging
 
+from app.api.deps import get_user_id
+from app.api.v1.endpoints.jobs import job_accepted
+from app.core.compression import negotiate
+from app.core.config import settings
+from app.core.exceptions import CustomException
+from app.core.http_cache import cache_headers, etag_matches, make_etag
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.serialization import json_bytes_response
 from app.services.ai_service import AIService
-from app.services.learning_path_service import LearningPathService
-from app.schemas.learning_path import LearningPathRequest
+from app.services.compact_path import SKELETON_FIELDS, parse_fields, projection_key
+from app.services.history_service import history_service
+from app.services.job_queue import job_queue
+from app.services.learning_path_service import EncodedBody, learning_path_service
+from app.services.progress_buffer import progress_buffer
+from app.schemas.learning_path import BatchGetRequest, LearningPathRequest
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 ai_service = AIService()
-learning_service = LearningPathService()
+learning_service = learning_path_service
+
+async def _not_modified(request: Request, path_id: str, *etag_parts: str) -> Optional[Response]:
+    """304 when If-None-Match matches the stored version; only the version is looked up"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    version = await learning_service.get_version(path_id)
+    if version is None:
+        return None
+    
+    etag = make_etag(version, *etag_parts, encoding=negotiate(request.headers.get("accept-encoding")))
+    if not etag_matches(if_none_match, etag):
+        return None
+    return Response(status_code=304, headers=cache_headers(etag))
+
+def _encoded_response(content: EncodedBody, *etag_parts: str) -> Response:
+    """Response for pre-serialized content, with validators when it comes from a stored version"""
+    headers = None
+    if content.version is not None:
+        headers = cache_headers(make_etag(content.version, *etag_parts, encoding=content.encoding))
+    return json_bytes_response(content.body, headers=headers, encoding=content.encoding)
+
+@router.get("")
+async def list_learning_paths(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False,
+    user_id: str = Depends(get_user_id)
+):
+    """List the learner's generated paths, newest first (pass next_cursor back as cursor)"""
+    try:
+        return await history_service.list_paths(user_id, cursor, limit, include_total)
+    except CustomException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing learning paths: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _generate(request: LearningPathRequest, user_id: str) -> Dict[str, Any]:
+    """Generate, save and record a learning path"""
+    # Generate complete learning path with AI
+    learning_path = await ai_service.generate_learning_path(
+        prompt=request.prompt,
+        user_level=request.user_level,
+        time_commitment=request.time_commitment,
+        preferences=request.preferences
+    )
+    
+    # Save to database (when implemented)
+    saved_path = await learning_service.save_learning_path(learning_path)
+    await history_service.record_path(user_id, saved_path)
+    return saved_path
+
+async def _generate_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return await _generate(LearningPathRequest.model_validate(payload["request"]), payload["user_id"])
+
+job_queue.register("learning_path.generate", _generate_job, settings.JOB_CONCURRENCY_LEARNING_PATH)
 
 @router.post("/generate")
-async def generate_learning_path(request: LearningPathRequest):
+async def generate_learning_path(
+    request: LearningPathRequest,
+    job: bool = Query(False, description="Return 202 with a background job instead of waiting for the path"),
+    user_id: str = Depends(get_user_id)
+):
     """Generate AI-powered personalized learning path"""
     try:
-        # Generate complete learning path with AI
-        learning_path = await ai_service.generate_learning_path(
-            prompt=request.prompt,
-            user_level=request.user_level,
-            time_commitment=request.time_commitment,
-            preferences=request.preferences
-        )
-        
-        # Save to database (when implemented)
-        saved_path = await learning_service.save_learning_path(learning_path)
+        if job:
+            return job_accepted(await job_queue.submit(
+                "learning_path.generate",
+                {"request": request.model_dump(mode="json"), "user_id": user_id},
+                user_id
+            ))
         
         # Return the raw dictionary response (not validated by Pydantic)
-        return saved_path
+        return await _generate(request, user_id)
         
+    except CustomException:
+        raise
     except Exception as e:
         logger.error(f"Error generating learning path: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/batch")
+async def get_batch(request: BatchGetRequest):
+    """Get many nodes, exercises and quizzes (of any paths) by ID in one request"""
+    try:
+        items = await learning_service.get_many(request.ids)
+        return {
+            "items": items,
+            "found": sum(1 for item in items if item["found"]),
+            "not_found": [item["id"] for item in items if not item["found"]]
+        }
+    except Exception as e:
+        logger.error(f"Error fetching batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/mock")
-async def get_mock_learning_path():
+async def get_mock_learning_path(request: Request):
     """Get a mock learning path for testing"""
     try:
-        return await learning_service.get_by_id("mock")
+        content = learning_service.get_mock_path_json(negotiate(request.headers.get("accept-encoding")))
+        return _encoded_response(content)
     except Exception as e:
         logger.error(f"Error getting mock learning path: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{path_id}")
-async def get_learning_path(path_id: str):
+async def get_learning_path(
+    path_id: str,
+    request: Request,
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return, dotted for node fields (e.g. id,title,nodes.title)"
+    ),
+    skeleton: bool = Query(
+        False,
+        description="Return the path outline only; node content is loaded from /content/{node_id}"
+    )
+):
     """Get learning path by ID"""
     try:
-        learning_path = await learning_service.get_by_id(path_id)
-        return learning_path
+        spec = None
+        if skeleton or fields:
+            spec = parse_fields((SKELETON_FIELDS if skeleton else ()) + tuple((fields or "").split(",")))
+        # Each projection is its own representation of the version
+        etag_parts = ()
+        if spec:
+            etag_parts = ("f" + hashlib.blake2b(projection_key(spec).encode(), digest_size=6).hexdigest(),)
+        
+        not_modified = await _not_modified(request, path_id, *etag_parts)
+        if not_modified is not None:
+            return not_modified
+        
+        # Pre-serialized and precompressed bytes, so repeat reads skip encoding entirely
+        encoding = negotiate(request.headers.get("accept-encoding"))
+        if spec:
+            content = await learning_service.get_path_projection_json(path_id, spec, encoding)
+        else:
+            content = await learning_service.get_path_json(path_id, encoding)
+        return _encoded_response(content, *etag_parts)
+    except CustomException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching learning path {path_id}: {str(e)}")
-        raise HTTPException(status_code=404, detail="Learning path not found")
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{path_id}/content/{node_id}")
-async def get_node_content(path_id: str, node_id: str):
+async def get_node_content(path_id: str, node_id: str, request: Request):
     """Get AI-generated content for a specific node"""
     try:
-        # Fetch the learning path
-        learning_path = await learning_service.get_by_id(path_id)
+        not_modified = await _not_modified(request, path_id, node_id)
+        if not_modified is not None:
+            return not_modified
         
-        # Find the specific node
-        node = next((n for n in learning_path["nodes"] if n["id"] == node_id), None)
-        if not node:
+        # Indexed lookup of the node within its path, serialized once per path version
+        content = await learning_service.get_node_content_json(
+            path_id, node_id, negotiate(request.headers.get("accept-encoding"))
+        )
+        if content is None:
             raise HTTPException(status_code=404, detail="Node not found")
         
         # Return the AI-generated content
-        return {
-            "node_id": node_id,
-            "content": node.get("content", {}),
-            "exercises": node.get("exercises", []),
-            "quiz": node.get("quiz")
-        }
+        return _encoded_response(content, node_id)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching node content: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -101,12 +218,19 @@ async def update_progress(
     path_id: str,
     node_id: str = Body(...),
     status: str = Body(...),
-    points_earned: int = Body(0)
+    points_earned: int = Body(0),
+    user_id: str = Depends(get_user_id)
 ):
     """Update learning path progress"""
     try:
-        # In production, this would update the database
-        # For now, return success
+        # Buffered: merged with other updates to this node and flushed in batches
+        await progress_buffer.add(
+            user_id=user_id,
+            path_id=path_id,
+            node_id=node_id,
+            status=status,
+            points_earned=points_earned or 0
+        )
         return {
             "success": True,
             "path_id": path_id,
@@ -114,6 +238,31 @@ async def update_progress(
             "status": status,
             "points_earned": points_earned
         }
+    except CustomException:
+        raise
     except Exception as e:
         logger.error(f"Error updating progress: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{path_id}/progress")
+async def get_progress(
+    path_id: str,
+    include_nodes: bool = False,
+    user_id: str = Depends(get_user_id)
+):
+    """Get the learner's progress summary for a learning path"""
+    try:
+        learning_path = await learning_service.get_by_id(path_id)
+        summary = await progress_buffer.get_path_summary(
+            user_id,
+            path_id,
+            total_nodes=len(learning_path.get("nodes", []))
+        )
+        if include_nodes:
+            summary["node_statuses"] = await progress_buffer.get_node_statuses(user_id, path_id)
+        return summary
+    except CustomException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching progress: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,24 +1,60 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, Body, Depends, Query
+from typing import Dict, Any, Optional
+from app.api.deps import get_user_id
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.schemas.quiz import QuizSubmission
+from app.schemas.response import PaginatedResponse
+from app.services.history_service import history_service
+from app.services.quiz_service import QuizService
 
 router = APIRouter()
+quiz_service = QuizService()
 
 @router.get("/{quiz_id}")
 async def get_quiz(quiz_id: str) -> Dict[str, Any]:
     """Get quiz by ID"""
-    return {
-        "id": quiz_id,
-        "title": "Sample Quiz",
-        "questions": [],
-        "time_limit_minutes": 30
-    }
+    quiz = await quiz_service.get_quiz(quiz_id)
+    return quiz.model_dump()
 
 @router.post("/{quiz_id}/submit")
-async def submit_quiz(quiz_id: str, submission: Dict[str, Any]) -> Dict[str, Any]:
+async def submit_quiz(
+    quiz_id: str,
+    submission: Dict[str, Any],
+    user_id: str = Depends(get_user_id)
+) -> Dict[str, Any]:
     """Submit quiz answers"""
-    return {
-        "quiz_id": quiz_id,
-        "score": 85,
-        "passed": True,
-        "feedback": "Great job!"
-    }
\ No newline at end of file
+    quiz_submission = QuizSubmission(
+        quiz_id=quiz_id,
+        answers=submission.get("answers", {}),
+        time_taken_minutes=submission.get("time_taken_minutes", submission.get("time_spent", 0))
+    )
+    result = await quiz_service.submit_quiz(quiz_id, quiz_submission)
+    await history_service.record_quiz_attempt(
+        user_id,
+        quiz_id,
+        score=result.score,
+        passed=result.passed,
+        answers=quiz_submission.answers,
+        time_taken_minutes=quiz_submission.time_taken_minutes
+    )
+    return result.model_dump()
+
+@router.get("/{quiz_id}/attempts")
+async def list_attempts(
+    quiz_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_total: bool = False
+) -> PaginatedResponse:
+    """List attempts on a quiz, newest first (pass next_cursor back as cursor)"""
+    return await history_service.list_quiz_attempts(quiz_id, cursor, limit, include_total)
+
+@router.post("/{quiz_id}/validate")
+async def validate_answer(
+    quiz_id: str,
+    question_id: str = Body(...),
+    answer: Any = Body(...)
+) -> Dict[str, Any]:
+    """Check a single answer for immediate feedback"""
+    correct = await quiz_service.validate_answer(quiz_id, question_id, answer)
+    return {"quiz_id": quiz_id, "question_id": question_id, "correct": correct}
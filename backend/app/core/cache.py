@@ -0,0 +1,279 @@
+# backend/app/core/cache.py
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+class LRUCache(Generic[V]):
+    """Bounded least-recently-used mapping"""
+
+    def __init__(self, max_entries: int = 1000):
+        """Initialize the cache"""
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, V]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[V]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def peek(self, key: str) -> Optional[V]:
+        """Get without updating recency"""
+        return self._data.get(key)
+
+    def set(self, key: str, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str) -> Optional[V]:
+        return self._data.pop(key, None)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class CacheEntry(Generic[V]):
+    """A cached value together with the version it was stored under"""
+    __slots__ = ("value", "version", "derived")
+
+    def __init__(self, value: V, version: int):
+        self.value = value
+        self.version = version
+        # Representations built from this version (e.g. serialized JSON), dropped with it
+        self.derived: Optional[Dict[str, Any]] = None
+
+    def derive(self, key: str, build: Callable[[], Any]) -> Any:
+        """Get a representation of this version of the value, building it on first use"""
+        if self.derived is None:
+            self.derived = {}
+        result = self.derived.get(key)
+        if result is None:
+            result = self.derived[key] = build()
+        return result
+
+class TwoLevelCache:
+    """
+    Read-through cache with a per-process L1 LRU and an optional shared Redis L2.
+
+    Every value carries a version (a nanosecond timestamp taken when it was
+    written). Writers publish a version-stamped invalidation on a Redis
+    pub/sub channel; every other worker drops its L1 copy when it holds an
+    older version, so all uvicorn workers converge without a shared lock.
+    Without REDIS_URL the cache is a plain per-process LRU.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        loader: Callable[[str], Awaitable[Optional[Tuple[Any, int]]]],
+        l1_max_entries: int = 1000,
+        redis_url: Optional[str] = None,
+        ttl_seconds: int = 3600,
+        on_load: Optional[Callable[[str, CacheEntry], None]] = None
+    ):
+        """
+        Args:
+            namespace: prefix for Redis keys, the pub/sub channel and metric names
+            loader: fetches (value, version) from the backing store on a miss
+            on_load: called with the entry when a value enters this process from L2 or the loader
+        """
+        self.namespace = namespace
+        self.loader = loader
+        self.on_load = on_load
+        self.l1: LRUCache[CacheEntry] = LRUCache(l1_max_entries)
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self.channel = f"{namespace}:invalidate"
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+        metrics.register_collector(f"{namespace}_cache", self.get_stats)
+
+    async def start(self) -> None:
+        """Connect to Redis and start listening for invalidations"""
+        if not self.redis_url or self._listener is not None:
+            return
+        try:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(self.redis_url)
+            await self._redis.ping()
+            self._listener = asyncio.create_task(self._listen())
+            logger.info(f"{self.namespace} cache connected to Redis L2")
+        except Exception as e:
+            logger.warning(f"Redis unavailable, {self.namespace} cache running L1 only: {str(e)}")
+            self._redis = None
+
+    async def stop(self) -> None:
+        """Stop the invalidation listener and close the Redis connection"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Get an entry, reading through L1 -> L2 -> loader"""
+        entry = self.l1.get(key)
+        if entry is not None:
+            metrics.inc(f"{self.namespace}_cache_l1_hits")
+            return entry
+
+        entry = await self._l2_get(key)
+        if entry is not None:
+            metrics.inc(f"{self.namespace}_cache_l2_hits")
+            self._fill_l1(key, entry)
+            return entry
+
+        metrics.inc(f"{self.namespace}_cache_misses")
+        loaded = await self.loader(key)
+        if loaded is None:
+            return None
+
+        entry = CacheEntry(*loaded)
+        self._fill_l1(key, entry)
+        await self._l2_set(key, entry)
+        return entry
+
+    def peek_version(self, key: str) -> Optional[int]:
+        """Version held in L1, without loading anything or counting a hit"""
+        entry = self.l1.peek(key)
+        return entry.version if entry is not None else None
+
+    async def put(self, key: str, value: Any, version: Optional[int] = None) -> CacheEntry:
+        """Store a new version of a value and invalidate older copies in other workers"""
+        entry = CacheEntry(value, version or time.time_ns())
+        self.l1.set(key, entry)
+        await self._l2_set(key, entry)
+        await self._publish(key, entry.version)
+        return entry
+
+    async def invalidate(self, key: str) -> None:
+        """Drop a value everywhere (e.g. after it was deleted from the store)"""
+        self.l1.pop(key)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(self._redis_key(key))
+            except Exception as e:
+                logger.warning(f"Redis delete failed for {key}: {str(e)}")
+        await self._publish(key, time.time_ns())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics for the metrics endpoint"""
+        name = self.namespace
+        l1_hits = metrics.get(f"{name}_cache_l1_hits")
+        l2_hits = metrics.get(f"{name}_cache_l2_hits")
+        misses = metrics.get(f"{name}_cache_misses")
+        lookups = l1_hits + l2_hits + misses
+        return {
+            "l1_entries": len(self.l1),
+            "l2_enabled": self._redis is not None,
+            # Served from either level; l1_ and l2_hit_ratio split it by level
+            "hit_ratio": round((l1_hits + l2_hits) / lookups, 4) if lookups else 0.0,
+            "l1_hit_ratio": round(l1_hits / lookups, 4) if lookups else 0.0,
+            "l2_hit_ratio": round(l2_hits / lookups, 4) if lookups else 0.0,
+            "l1_hits": l1_hits,
+            "l2_hits": l2_hits,
+            "misses": misses,
+            "invalidations_received": metrics.get(f"{name}_cache_invalidations"),
+        }
+
+    def _fill_l1(self, key: str, entry: CacheEntry) -> None:
+        self.l1.set(key, entry)
+        if self.on_load is not None:
+            self.on_load(key, entry)
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def _l2_get(self, key: str) -> Optional[CacheEntry]:
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(self._redis_key(key))
+        except Exception as e:
+            logger.warning(f"Redis get failed for {key}: {str(e)}")
+            return None
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        return CacheEntry(payload["value"], payload["version"])
+
+    async def _l2_set(self, key: str, entry: CacheEntry) -> None:
+        if self._redis is None:
+            return
+        try:
+            payload = json.dumps({"version": entry.version, "value": entry.value})
+            await self._redis.set(self._redis_key(key), payload, ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Redis set failed for {key}: {str(e)}")
+
+    async def _publish(self, key: str, version: int) -> None:
+        if self._redis is None:
+            return
+        message = json.dumps({
+            "key": key,
+            "version": version,
+            "origin": self.origin,
+            "published_at": time.time(),
+        })
+        try:
+            await self._redis.publish(self.channel, message)
+        except Exception as e:
+            logger.warning(f"Redis publish failed for {key}: {str(e)}")
+
+    def handle_invalidation(self, message: Dict[str, Any]) -> None:
+        """Apply an invalidation message from another worker"""
+        if message.get("origin") == self.origin:
+            return
+
+        metrics.inc(f"{self.namespace}_cache_invalidations")
+        metrics.observe(
+            f"{self.namespace}_cache_invalidation_lag_seconds",
+            max(0.0, time.time() - message["published_at"]),
+        )
+        entry = self.l1.get(message["key"])
+        if entry is not None and entry.version < message["version"]:
+            self.l1.pop(message["key"])
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for raw in pubsub.listen():
+                    if raw.get("type") != "message":
+                        continue
+                    try:
+                        self.handle_invalidation(json.loads(raw["data"]))
+                    except Exception as e:
+                        logger.warning(f"Bad invalidation message on {self.channel}: {str(e)}")
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                # Missed messages could leave stale L1 entries, so start clean after reconnecting
+                logger.error(f"Invalidation listener for {self.channel} failed: {str(e)}")
+                self.l1 = LRUCache(self.l1.max_entries)
+                await pubsub.close()
+                await asyncio.sleep(1)
@@ -0,0 +1,138 @@
+# backend/app/core/compression.py
+import gzip
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+# Preferred first when the client accepts several with the same quality
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Per-request compression favours speed; cached variants are compressed once, so use the best level
+GZIP_LEVEL, GZIP_LEVEL_CACHED = 6, 9
+BROTLI_QUALITY, BROTLI_QUALITY_CACHED = 5, 11
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported encoding allowed by an Accept-Encoding header"""
+    if not accept_encoding:
+        return None
+
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    """Compress a body; cached=True uses the slowest, smallest setting"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY_CACHED if cached else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL_CACHED if cached else GZIP_LEVEL)
+
+def compressed_variant(
+    body: bytes,
+    encoding: Optional[str],
+    derive: Optional[Callable[[str, Callable[[], bytes]], bytes]] = None
+) -> Tuple[bytes, Optional[str]]:
+    """
+    Get the body to send for a negotiated encoding, as (body, encoding).
+
+    Bodies under the size threshold are sent as they are. With derive (e.g.
+    CacheEntry.derive) the compressed variant is built once and stored next
+    to the raw bytes.
+    """
+    if encoding is None or len(body) < settings.RESPONSE_COMPRESSION_MIN_BYTES:
+        return body, None
+
+    def build() -> bytes:
+        metrics.inc(f"compression_{encoding}_cached_builds")
+        return compress(body, encoding, cached=True)
+
+    if derive is None:
+        return compress(body, encoding), encoding
+    return derive(f"compressed:{encoding}", build), encoding
+
+class CompressionMiddleware:
+    """
+    Compress responses at or above the size threshold with the encoding the
+    client prefers. Responses that already set Content-Encoding (precompressed
+    cached variants) and streamed responses are passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Dict[str, Any] = {}
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    "content-encoding" in headers
+                    or headers.get("content-type", "").startswith("text/event-stream")
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Hold the start message until we know whether the body is compressed
+                    start.update(message)
+                return
+
+            if passthrough or not start:
+                await send(message)
+                return
+
+            initial, body = dict(start), message.get("body", b"")
+            start.clear()
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streamed or small: send unchanged
+                await send(initial)
+                await send(message)
+                if message.get("more_body", False):
+                    passthrough = True
+                return
+
+            body = compress(body, encoding)
+            metrics.inc(f"compression_{encoding}_responses")
+            headers = MutableHeaders(raw=initial["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(initial)
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -25,6 +25,12 @@ class Settings(BaseSettings):
         env="BACKEND_CORS_ORIGINS"
     )
     
+    # Cache-Control max-age for generated paths and node content (revalidated with ETags)
+    PATH_CACHE_CONTROL_MAX_AGE_SECONDS: int = Field(300, env="PATH_CACHE_CONTROL_MAX_AGE_SECONDS")
+    
+    # Response compression (gzip, and brotli when the package is installed)
+    RESPONSE_COMPRESSION_MIN_BYTES: int = Field(1024, env="RESPONSE_COMPRESSION_MIN_BYTES")
+    
     # Azure OpenAI
     AZURE_OPENAI_API_KEY: str = Field("", env="AZURE_OPENAI_API_KEY")
     AZURE_OPENAI_ENDPOINT: str = Field("", env="AZURE_OPENAI_ENDPOINT")
@@ -41,6 +47,68 @@ class Settings(BaseSettings):
     REDIS_URL: Optional[str] = Field(None, env="REDIS_URL")
     REDIS_TTL: int = Field(3600, env="REDIS_TTL")  # 1 hour default
     
+    # Read-through cache for learning paths (per-process L1, Redis L2 when REDIS_URL is set)
+    PATH_CACHE_L1_MAX_ENTRIES: int = Field(1000, env="PATH_CACHE_L1_MAX_ENTRIES")
+    
+    # Learning path store (no-database mode): memory budget, LRU paths spill to SQLite
+    PATH_STORE_MEMORY_BUDGET_MB: int = Field(256, env="PATH_STORE_MEMORY_BUDGET_MB")
+    PATH_STORE_SPILL_PATH: Optional[str] = Field(
+        "data/path_store.sqlite3",
+        env="PATH_STORE_SPILL_PATH"
+    )
+    
+    # Periodic snapshot of in-process state, loaded back at startup for warm restarts
+    SNAPSHOT_PATH: Optional[str] = Field("data/state.snapshot", env="SNAPSHOT_PATH")
+    SNAPSHOT_INTERVAL_SECONDS: float = Field(300.0, env="SNAPSHOT_INTERVAL_SECONDS")
+    
+    # Progress write-behind buffer
+    PROGRESS_WRITE_BEHIND_ENABLED: bool = Field(True, env="PROGRESS_WRITE_BEHIND_ENABLED")
+    PROGRESS_FLUSH_INTERVAL_SECONDS: float = Field(2.0, env="PROGRESS_FLUSH_INTERVAL_SECONDS")
+    PROGRESS_FLUSH_MAX_PENDING: int = Field(500, env="PROGRESS_FLUSH_MAX_PENDING")
+    # Without a database only the newest events are kept; summaries already include older ones
+    PROGRESS_MEMORY_MAX_EVENTS: int = Field(100000, env="PROGRESS_MEMORY_MAX_EVENTS")
+    
+    # Sandboxed code runner for exercise test cases
+    CODE_RUNNER_MODE: str = Field("zygote", env="CODE_RUNNER_MODE")  # zygote (fork per run) or pool
+    CODE_RUNNER_POOL_SIZE: int = Field(0, env="CODE_RUNNER_POOL_SIZE")  # concurrent runs; 0 = one per CPU
+    CODE_RUNNER_SANDBOX_USER: Optional[str] = Field("nobody", env="CODE_RUNNER_SANDBOX_USER")
+    CODE_RUNNER_TEST_TIMEOUT_SECONDS: float = Field(2.0, env="CODE_RUNNER_TEST_TIMEOUT_SECONDS")
+    CODE_RUNNER_CPU_SECONDS: int = Field(5, env="CODE_RUNNER_CPU_SECONDS")
+    CODE_RUNNER_MEMORY_MB: int = Field(256, env="CODE_RUNNER_MEMORY_MB")
+    CODE_RUNNER_MAX_OPEN_FILES: int = Field(32, env="CODE_RUNNER_MAX_OPEN_FILES")
+    CODE_RUNNER_MAX_FILE_BYTES: int = Field(1048576, env="CODE_RUNNER_MAX_FILE_BYTES")
+    CODE_RUNNER_MAX_OUTPUT_BYTES: int = Field(65536, env="CODE_RUNNER_MAX_OUTPUT_BYTES")
+    CODE_RUNNER_MAX_SHARDS: int = Field(0, env="CODE_RUNNER_MAX_SHARDS")  # sandboxes per submission; 0 = pool size
+    CODE_RUNNER_MIN_TESTS_PER_SHARD: int = Field(2, env="CODE_RUNNER_MIN_TESTS_PER_SHARD")
+    CODE_RUNNER_MAX_FAILURES: int = Field(0, env="CODE_RUNNER_MAX_FAILURES")  # stop after this many; 0 = run all
+    CODE_RUNNER_TOOLCHAIN_PATH: Optional[str] = Field(None, env="CODE_RUNNER_TOOLCHAIN_PATH")  # where compilers are looked up; default PATH
+    CODE_RUNNER_BUILD_CACHE_DIR: str = Field("", env="CODE_RUNNER_BUILD_CACHE_DIR")  # "" = <tmp>/code-runner-cache
+    CODE_RUNNER_BUILD_CACHE_MAX_ENTRIES: int = Field(2000, env="CODE_RUNNER_BUILD_CACHE_MAX_ENTRIES")
+    CODE_RUNNER_COMPILE_WORKERS: int = Field(1, env="CODE_RUNNER_COMPILE_WORKERS")  # warm build workspaces per language
+    CODE_RUNNER_COMPILE_TIMEOUT_SECONDS: float = Field(30.0, env="CODE_RUNNER_COMPILE_TIMEOUT_SECONDS")
+    CODE_RUNNER_COMPILE_USER: Optional[str] = Field("coderunner", env="CODE_RUNNER_COMPILE_USER")  # not the sandbox user
+    
+    CODE_MAX_SUBMISSION_CHARS: int = Field(100000, env="CODE_MAX_SUBMISSION_CHARS")  # longer code is rejected before scanning
+    
+    # Test results and AI evaluations cached by submission fingerprint (exercise version, language, normalized code)
+    SUBMISSION_CACHE_MAX_ENTRIES: int = Field(2000, env="SUBMISSION_CACHE_MAX_ENTRIES")
+    
+    # AI evaluation after running the tests: failing tests sent to the model, review for passing code (short or template)
+    EVALUATION_MAX_FAILING_TESTS: int = Field(5, env="EVALUATION_MAX_FAILING_TESTS")
+    EVALUATION_PASSING_REVIEW: str = Field("short", env="EVALUATION_PASSING_REVIEW")
+    # Evaluations of the same exercise arriving within the window share one model call (max size 1 = off)
+    EVALUATION_BATCH_WINDOW_SECONDS: float = Field(0.5, env="EVALUATION_BATCH_WINDOW_SECONDS")
+    EVALUATION_BATCH_MAX_SIZE: int = Field(8, env="EVALUATION_BATCH_MAX_SIZE")
+    
+    # Background jobs (?job=true on /generate and /evaluate): SQLite queue, workers per job type
+    JOB_QUEUE_PATH: Optional[str] = Field("data/jobs.sqlite3", env="JOB_QUEUE_PATH")
+    JOB_CONCURRENCY_LEARNING_PATH: int = Field(2, env="JOB_CONCURRENCY_LEARNING_PATH")
+    JOB_CONCURRENCY_EVALUATION: int = Field(4, env="JOB_CONCURRENCY_EVALUATION")
+    JOB_RESULT_TTL_SECONDS: float = Field(86400.0, env="JOB_RESULT_TTL_SECONDS")
+    JOB_MAX_ATTEMPTS: int = Field(3, env="JOB_MAX_ATTEMPTS")
+    JOB_POLL_INTERVAL_SECONDS: float = Field(1.0, env="JOB_POLL_INTERVAL_SECONDS")
+    JOB_LEASE_SECONDS: float = Field(30.0, env="JOB_LEASE_SECONDS")  # running jobs of a dead process are rerun after this
+    
     # Security (for future use)
     SECRET_KEY: str = Field(
         "your-secret-key-here-change-in-production",
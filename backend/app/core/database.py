@@ -0,0 +1,53 @@
+# backend/app/core/database.py
+import logging
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+
+def get_database_url(url: Optional[str] = None) -> Optional[str]:
+    """Return the configured database URL using the asyncpg driver"""
+    url = url or settings.DATABASE_URL
+    if not url:
+        return None
+    
+    # .env files use the plain postgresql:// scheme; we talk to Postgres through asyncpg
+    for prefix in ("postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+def get_engine() -> Optional[AsyncEngine]:
+    """Get the shared async engine, or None when no database is configured"""
+    global _engine
+    if _engine is None:
+        url = get_database_url()
+        if not url:
+            return None
+        _engine = create_async_engine(url, pool_pre_ping=True)
+        logger.info("Database engine created")
+    return _engine
+
+def get_session_factory() -> Optional[async_sessionmaker]:
+    """Get the shared session factory, or None when no database is configured"""
+    global _session_factory
+    if _session_factory is None:
+        engine = get_engine()
+        if engine is None:
+            return None
+        _session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    return _session_factory
+
+async def dispose_engine() -> None:
+    """Close all pooled connections (called on shutdown)"""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _session_factory = None
@@ -0,0 +1,47 @@
+# backend/app/core/http_cache.py
+from typing import Dict, Optional
+
+from app.core.compression import SUPPORTED_ENCODINGS
+from app.core.config import settings
+
+def make_etag(version: int, *parts: str, encoding: Optional[str] = None) -> str:
+    """
+    Strong ETag for a stored version of a resource. Each content encoding is
+    a different representation, so it gets its own tag.
+    """
+    tag = "-".join([format(version, "x"), *parts])
+    if encoding:
+        tag = f"{tag}-{encoding}"
+    return f'"{tag}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison as required for If-None-Match: W/ prefixes are ignored and
+    a tag for any encoding of the same version matches.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    base = _strip_encoding(etag.strip('"'))
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if _strip_encoding(candidate.strip('"')) == base:
+            return True
+    return False
+
+def _strip_encoding(tag: str) -> str:
+    # Small bodies are sent uncompressed, so either side may lack the suffix
+    head, _, encoding = tag.rpartition("-")
+    return head if head and encoding in SUPPORTED_ENCODINGS else tag
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Headers for content that does not change once generated"""
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.PATH_CACHE_CONTROL_MAX_AGE_SECONDS}",
+        "Vary": "Accept-Encoding",
+    }
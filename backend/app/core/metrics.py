@@ -0,0 +1,72 @@
+# backend/app/core/metrics.py
+import threading
+from typing import Any, Callable, Dict
+
+class Metrics:
+    """
+    Minimal in-process metrics registry.
+
+    Counters and observations (count/sum/min/max/last) are kept per worker
+    and exposed at /api/v1/health/metrics. Components with their own stats
+    can register a collector that is called when a snapshot is taken.
+    """
+
+    def __init__(self):
+        """Initialize the registry"""
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._observations: Dict[str, Dict[str, float]] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Increment a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record one observation of a value such as a latency"""
+        with self._lock:
+            stats = self._observations.get(name)
+            if stats is None:
+                self._observations[name] = {
+                    "count": 1, "sum": value, "min": value, "max": value, "last": value
+                }
+                return
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["min"] = min(stats["min"], value)
+            stats["max"] = max(stats["max"], value)
+            stats["last"] = value
+
+    def get(self, name: str) -> float:
+        """Current value of a counter"""
+        return self._counters.get(name, 0)
+
+    def ratio(self, numerator: str, *others: str) -> float:
+        """numerator / (numerator + others), e.g. a hit ratio; 0.0 when nothing was counted"""
+        hits = self.get(numerator)
+        total = hits + sum(self.get(name) for name in others)
+        return round(hits / total, 4) if total else 0.0
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        """Register a callable whose stats are included in snapshots"""
+        self._collectors[name] = collector
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as a JSON-serializable dict"""
+        with self._lock:
+            counters = dict(self._counters)
+            observations = {
+                name: {**stats, "avg": stats["sum"] / stats["count"]}
+                for name, stats in self._observations.items()
+            }
+        collected = {name: collector() for name, collector in self._collectors.items()}
+        return {"counters": counters, "observations": observations, **collected}
+
+    def reset(self) -> None:
+        """Clear counters and observations"""
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+metrics = Metrics()
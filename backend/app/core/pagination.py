@@ -0,0 +1,45 @@
+# backend/app/core/pagination.py
+import base64
+import bisect
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from app.core.exceptions import BadRequestException
+
+# Position in a time-ordered collection: (created_at, id), the id breaking ties
+CursorKey = Tuple[datetime, str]
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(created_at: datetime, record_id: str) -> str:
+    """Opaque cursor pointing just past a record"""
+    raw = json.dumps([created_at.isoformat(), record_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[CursorKey]:
+    """Parse a cursor from encode_cursor; None starts from the newest record"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, record_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(record_id)
+    except (ValueError, TypeError):
+        raise BadRequestException("Invalid cursor")
+
+def page_before(
+    records: Sequence[Any],
+    key: Callable[[Any], CursorKey],
+    before: Optional[CursorKey],
+    limit: int
+) -> Tuple[List[Any], bool]:
+    """
+    Newest-first page of records that are sorted oldest-first by key, starting
+    strictly before the cursor. Returns (page, has_more). The cursor is found
+    by binary search, so deep pages cost the same as the first one.
+    """
+    end = len(records) if before is None else bisect.bisect_left(records, before, key=key)
+    start = max(0, end - limit)
+    return list(reversed(records[start:end])), start > 0
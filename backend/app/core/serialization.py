@@ -0,0 +1,28 @@
+# backend/app/core/serialization.py
+from typing import Any, Callable, Dict, Optional
+
+import orjson
+from fastapi.responses import Response
+
+def dumps(value: Any, sort_keys: bool = False, default: Callable[[Any], Any] = str) -> bytes:
+    """Serialize to JSON bytes (orjson; unsupported types are converted with default, str unless given)"""
+    option = orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(value, default=default, option=option)
+
+def json_bytes_response(
+    body: bytes,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+    encoding: Optional[str] = None
+) -> Response:
+    """
+    Response for an already serialized (and possibly already compressed)
+    JSON body, sent without re-encoding.
+    """
+    headers = dict(headers or {})
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        headers.setdefault("Vary", "Accept-Encoding")
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
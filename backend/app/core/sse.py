@@ -0,0 +1,38 @@
+# backend/app/core/sse.py
+import logging
+from typing import Any, AsyncIterator, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from app.core.exceptions import CustomException
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+def sse_event(event: str, data: Any) -> bytes:
+    """One server-sent event with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+def event_stream(events: AsyncIterator[Tuple[str, Any]]) -> StreamingResponse:
+    """
+    text/event-stream response for an async iterator of (event, data) pairs.
+
+    Errors raised after the stream has started can't change the status code
+    any more; they are sent as a final `error` event instead.
+    """
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for event, data in events:
+                yield sse_event(event, data)
+        except CustomException as e:
+            yield sse_event("error", {"detail": e.detail, "status_code": e.status_code})
+        except Exception as e:
+            logger.error(f"Error in event stream: {str(e)}")
+            yield sse_event("error", {"detail": str(e), "status_code": 500})
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        # Proxies must not buffer or cache the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,16 +1,23 @@
 # backend/app/main.py
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 import logging
 import uvicorn
 from typing import Dict, Any
 
 from app.api.v1.api import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.core.exceptions import CustomException
+from app.core.database import dispose_engine
+from app.services.code_runner import code_runner
+from app.services.job_queue import job_queue
+from app.services.learning_path_service import learning_path_service
+from app.services.progress_buffer import progress_buffer
+from app.services.snapshot import state_snapshotter
 
 # Setup logging
 setup_logging()
@@ -26,11 +33,24 @@ async def lifespan(app: FastAPI):
     logger.info(f"Environment: {settings.ENVIRONMENT}")
     logger.info(f"API Version: {settings.API_V1_STR}")
     logger.info(f"Debug Mode: {settings.DEBUG}")
+    state_snapshotter.load()
+    await learning_path_service.cache.start()
+    await progress_buffer.start()
+    await state_snapshotter.start()
+    await code_runner.start()
+    await job_queue.start()
     
     yield
     
     # Shutdown
     logger.info("🔌 Shutting down AI Learning Platform API...")
+    await job_queue.stop()
+    await code_runner.stop()
+    await progress_buffer.stop()
+    await state_snapshotter.stop()
+    await learning_path_service.cache.stop()
+    learning_path_service.store.close()
+    await dispose_engine()
 
 # Create FastAPI app instance
 app = FastAPI(
@@ -41,6 +61,7 @@ app = FastAPI(
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware configuration
@@ -52,6 +73,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip / brotli for large responses; cached paths arrive here already compressed
+app.add_middleware(CompressionMiddleware, minimum_size=settings.RESPONSE_COMPRESSION_MIN_BYTES)
+
 # Custom exception handler
 @app.exception_handler(CustomException)
 async def custom_exception_handler(request: Request, exc: CustomException):
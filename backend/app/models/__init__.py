@@ -0,0 +1,7 @@
+# Import every model so that Base.metadata is complete (used by Alembic)
+from app.models.base import Base
+from app.models.user import User
+from app.models.learning_path import LearningPath, PathNode, LearningProgress
+from app.models.exercise import Exercise, ExerciseSubmission
+from app.models.quiz import Quiz, QuizQuestion, QuizAttempt
+from app.models.progress import ProgressEvent, NodeProgress, PathProgressSummary, UserProgressSummary
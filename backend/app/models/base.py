@@ -2,12 +2,17 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, DateTime, String
+from sqlalchemy import Column, DateTime, String, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from uuid import uuid4
 
 # SQLAlchemy Base - for future database implementation
 Base = declarative_base()
 
+# JSON column type that is stored as JSONB on PostgreSQL (so it can be GIN
+# indexed and queried with @>) and falls back to plain JSON elsewhere
+JSONBType = JSON().with_variant(JSONB(), "postgresql")
+
 class BaseDBModel(Base):
     """Base database model with common fields"""
     __abstract__ = True
@@ -26,4 +31,4 @@ class BaseSchema(BaseModel):
         arbitrary_types_allowed = True
         json_encoders = {
             datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+        }
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, String, Integer, Text, JSON, Boolean, ForeignKey
+from sqlalchemy import Column, String, Integer, Text, JSON, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseDBModel
 
 class Exercise(BaseDBModel):
     """Exercise database model"""
     __tablename__ = "exercises"
+    __table_args__ = (
+        Index("ix_exercises_node_id", "node_id"),
+    )
     
     node_id = Column(String, ForeignKey("path_nodes.id"))
     title = Column(String(255), nullable=False)
@@ -21,14 +24,31 @@ class Exercise(BaseDBModel):
     
     # Relationships
     node = relationship("PathNode", back_populates="exercises")
-    submissions = relationship("ExerciseSubmission", back_populates="exercise")
+    submissions = relationship(
+        "ExerciseSubmission",
+        back_populates="exercise",
+        primaryjoin="Exercise.id == foreign(ExerciseSubmission.exercise_id)"
+    )
 
 class ExerciseSubmission(BaseDBModel):
     """Exercise Submission database model"""
     __tablename__ = "exercise_submissions"
+    __table_args__ = (
+        # A user's submissions for an exercise ordered by time
+        Index(
+            "ix_exercise_submissions_user_id_exercise_id_created_at",
+            "user_id",
+            "exercise_id",
+            "created_at",
+        ),
+        # All submissions for an exercise ordered by time
+        Index("ix_exercise_submissions_exercise_id_created_at", "exercise_id", "created_at"),
+    )
     
-    exercise_id = Column(String, ForeignKey("exercises.id"))
-    user_id = Column(String, ForeignKey("users.id"))
+    # No foreign keys: submissions are recorded for exercises and users that
+    # may only exist in the in-memory stores (see HistoryService)
+    exercise_id = Column(String)
+    user_id = Column(String)
     solution = Column(Text)
     language = Column(String(50))
     passed = Column(Boolean, default=False)
@@ -38,4 +58,8 @@ class ExerciseSubmission(BaseDBModel):
     feedback = Column(Text)
     
     # Relationships
-    exercise = relationship("Exercise", back_populates="submissions")
\ No newline at end of file
+    exercise = relationship(
+        "Exercise",
+        back_populates="submissions",
+        primaryjoin="Exercise.id == foreign(ExerciseSubmission.exercise_id)"
+    )
\ No newline at end of file
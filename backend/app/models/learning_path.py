@@ -1,20 +1,26 @@
-from sqlalchemy import Column, String, Integer, Text, JSON, Float, ForeignKey
+from sqlalchemy import Column, String, Integer, Text, JSON, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
-from app.models.base import BaseDBModel
+from app.models.base import BaseDBModel, JSONBType
 from typing import List, Optional
 from datetime import datetime
 
 class LearningPath(BaseDBModel):
     """Learning Path database model"""
     __tablename__ = "learning_paths"
+    __table_args__ = (
+        # A user's paths, newest first
+        Index("ix_learning_paths_user_id_created_at", "user_id", "created_at"),
+    )
     
     title = Column(String(255), nullable=False)
     description = Column(Text)
     total_duration_hours = Column(Integer)
     difficulty_level = Column(String(50))
     certification_target = Column(String(255))
-    user_id = Column(String, ForeignKey("users.id"))
-    metadata = Column(JSON)
+    # No foreign key: paths are recorded for users that only exist as IDs (see HistoryService)
+    user_id = Column(String)
+    # "metadata" is reserved by the declarative API, so map it under another name
+    path_metadata = Column("metadata", JSON)
     
     # Relationships
     nodes = relationship("PathNode", back_populates="learning_path", cascade="all, delete-orphan")
@@ -23,6 +29,23 @@ class LearningPath(BaseDBModel):
 class PathNode(BaseDBModel):
     """Path Node database model"""
     __tablename__ = "path_nodes"
+    __table_args__ = (
+        # Loading a path's nodes in order
+        Index("ix_path_nodes_learning_path_id_order", "learning_path_id", "order"),
+        # Containment filters such as topics @> '["MLOps"]' (PostgreSQL only, like migration 0002)
+        Index(
+            "ix_path_nodes_topics_gin",
+            "topics",
+            postgresql_using="gin",
+            postgresql_ops={"topics": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_path_nodes_prerequisites_gin",
+            "prerequisites",
+            postgresql_using="gin",
+            postgresql_ops={"prerequisites": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
     
     learning_path_id = Column(String, ForeignKey("learning_paths.id"))
     title = Column(String(255), nullable=False)
@@ -31,8 +54,8 @@ class PathNode(BaseDBModel):
     duration_hours = Column(Integer)
     type = Column(String(50))
     status = Column(String(50), default="not_started")
-    prerequisites = Column(JSON)
-    topics = Column(JSON)
+    prerequisites = Column(JSONBType)
+    topics = Column(JSONBType)
     resources = Column(JSON)
     
     # Relationships
@@ -43,10 +66,26 @@ class PathNode(BaseDBModel):
 class LearningProgress(BaseDBModel):
     """Learning Progress database model"""
     __tablename__ = "learning_progress"
+    __table_args__ = (
+        # One progress row per (user, path); also serves "all progress of a user"
+        Index(
+            "ix_learning_progress_user_id_learning_path_id",
+            "user_id",
+            "learning_path_id",
+            unique=True,
+        ),
+        Index("ix_learning_progress_learning_path_id", "learning_path_id"),
+        Index(
+            "ix_learning_progress_completed_nodes_gin",
+            "completed_nodes",
+            postgresql_using="gin",
+            postgresql_ops={"completed_nodes": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
     
     learning_path_id = Column(String, ForeignKey("learning_paths.id"))
     user_id = Column(String, ForeignKey("users.id"))
-    completed_nodes = Column(JSON, default=list)
+    completed_nodes = Column(JSONBType, default=list)
     current_node_id = Column(String)
     overall_progress = Column(Float, default=0.0)
     total_points_earned = Column(Integer, default=0)
@@ -55,4 +94,4 @@ class LearningProgress(BaseDBModel):
     time_spent_hours = Column(Float, default=0.0)
     
     # Relationships
-    learning_path = relationship("LearningPath", back_populates="progress")
\ No newline at end of file
+    learning_path = relationship("LearningPath", back_populates="progress")
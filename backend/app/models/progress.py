@@ -0,0 +1,59 @@
+from sqlalchemy import Column, String, Integer, DateTime, Index
+from app.models.base import Base, BaseDBModel
+from datetime import datetime
+
+# The progress tables carry no foreign keys: every progress update is a hot
+# insert, and paths may still live only in the in-memory store.
+
+class ProgressEvent(BaseDBModel):
+    """Append-only log of learner progress events"""
+    __tablename__ = "progress_events"
+    __table_args__ = (
+        # Replaying or auditing a learner's history on a path
+        Index(
+            "ix_progress_events_user_id_learning_path_id_created_at",
+            "user_id",
+            "learning_path_id",
+            "created_at",
+        ),
+    )
+    
+    user_id = Column(String, nullable=False)
+    learning_path_id = Column(String, nullable=False)
+    node_id = Column(String)
+    event_type = Column(String(50), nullable=False)  # node_started, node_completed, points_earned
+    points = Column(Integer, default=0)
+
+class NodeProgress(Base):
+    """Current state of one node for one learner, maintained from progress events"""
+    __tablename__ = "node_progress"
+    
+    user_id = Column(String, primary_key=True)
+    learning_path_id = Column(String, primary_key=True)
+    node_id = Column(String, primary_key=True)
+    status = Column(String(50), default="in_progress")
+    points_earned = Column(Integer, default=0)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime)
+
+class PathProgressSummary(Base):
+    """Materialized per-(user, path) progress summary, updated incrementally"""
+    __tablename__ = "path_progress_summaries"
+    
+    user_id = Column(String, primary_key=True)
+    learning_path_id = Column(String, primary_key=True)
+    started_nodes = Column(Integer, default=0)
+    completed_nodes = Column(Integer, default=0)
+    total_points_earned = Column(Integer, default=0)
+    current_node_id = Column(String)
+    last_activity = Column(DateTime, default=datetime.utcnow)
+
+class UserProgressSummary(Base):
+    """Materialized per-user progress summary across all paths"""
+    __tablename__ = "user_progress_summaries"
+    
+    user_id = Column(String, primary_key=True)
+    paths_started = Column(Integer, default=0)
+    completed_nodes = Column(Integer, default=0)
+    total_points_earned = Column(Integer, default=0)
+    last_activity = Column(DateTime, default=datetime.utcnow)
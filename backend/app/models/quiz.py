@@ -1,10 +1,13 @@
-from sqlalchemy import Column, String, Integer, Text, JSON, Boolean, ForeignKey
+from sqlalchemy import Column, String, Integer, Text, JSON, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseDBModel
 
 class Quiz(BaseDBModel):
     """Quiz database model"""
     __tablename__ = "quizzes"
+    __table_args__ = (
+        Index("ix_quizzes_node_id", "node_id"),
+    )
     
     node_id = Column(String, ForeignKey("path_nodes.id"))
     title = Column(String(255), nullable=False)
@@ -16,11 +19,17 @@ class Quiz(BaseDBModel):
     # Relationships
     node = relationship("PathNode", back_populates="quiz")
     questions = relationship("QuizQuestion", back_populates="quiz", cascade="all, delete-orphan")
-    attempts = relationship("QuizAttempt", back_populates="quiz")
+    attempts = relationship(
+        "QuizAttempt", back_populates="quiz", primaryjoin="Quiz.id == foreign(QuizAttempt.quiz_id)"
+    )
 
 class QuizQuestion(BaseDBModel):
     """Quiz Question database model"""
     __tablename__ = "quiz_questions"
+    __table_args__ = (
+        # Loading a quiz's questions in order
+        Index("ix_quiz_questions_quiz_id_order", "quiz_id", "order"),
+    )
     
     quiz_id = Column(String, ForeignKey("quizzes.id"))
     question = Column(Text, nullable=False)
@@ -38,9 +47,17 @@ class QuizQuestion(BaseDBModel):
 class QuizAttempt(BaseDBModel):
     """Quiz Attempt database model"""
     __tablename__ = "quiz_attempts"
+    __table_args__ = (
+        # A user's attempts on a quiz ordered by time (attempt counting, history)
+        Index("ix_quiz_attempts_user_id_quiz_id_created_at", "user_id", "quiz_id", "created_at"),
+        # All attempts on a quiz ordered by time
+        Index("ix_quiz_attempts_quiz_id_created_at", "quiz_id", "created_at"),
+    )
     
-    quiz_id = Column(String, ForeignKey("quizzes.id"))
-    user_id = Column(String, ForeignKey("users.id"))
+    # No foreign keys: attempts are recorded for quizzes and users that may
+    # only exist in the in-memory stores (see HistoryService)
+    quiz_id = Column(String)
+    user_id = Column(String)
     score = Column(Integer)
     passed = Column(Boolean, default=False)
     answers = Column(JSON)
@@ -48,4 +65,4 @@ class QuizAttempt(BaseDBModel):
     attempt_number = Column(Integer)
     
     # Relationships
-    quiz = relationship("Quiz", back_populates="attempts")
+    quiz = relationship("Quiz", back_populates="attempts", primaryjoin="Quiz.id == foreign(QuizAttempt.quiz_id)")
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String
+from app.models.base import BaseDBModel
+
+class User(BaseDBModel):
+    """User database model"""
+    __tablename__ = "users"
+    
+    email = Column(String(255), unique=True, nullable=False)
+    display_name = Column(String(255))
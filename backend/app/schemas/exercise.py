@@ -8,6 +8,7 @@ class ExerciseSubmission(BaseModel):
     solution: str
     language: Optional[str] = "python"
     time_taken_minutes: int
+    max_failures: Optional[int] = Field(None, ge=0)  # stop after this many failed tests; 0 = run all
 
 class ExerciseResult(BaseModel):
     """Exercise result model"""
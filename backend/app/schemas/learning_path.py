@@ -94,6 +94,16 @@ class LearningPathRequest(BaseModel):
         }
     )
 
+class BatchGetRequest(BaseModel):
+    """Request model for reading many nodes / exercises / quizzes at once"""
+    ids: List[str] = Field(..., min_length=1, max_length=200)
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {"ids": ["node_1a2b3c4d", "ex_5e6f7a8b", "quiz_9c0d1e2f"]}
+        }
+    )
+
 class LearningPathCreate(BaseModel):
     """Model for creating a learning path"""
     title: str
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Any, Dict
+from typing import List, Optional, Any, Dict
 
 class SuccessResponse(BaseModel):
     """Standard success response"""
@@ -15,9 +15,8 @@ class ErrorResponse(BaseModel):
     status_code: int
 
 class PaginatedResponse(BaseModel):
-    """Paginated response model"""
+    """Cursor-paginated response model (newest first)"""
     items: List[Any]
-    total: int
-    page: int
-    per_page: int
-    pages: int
\ No newline at end of file
+    limit: int
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page; None on the last page
+    total: Optional[int] = None  # only counted when include_total=true
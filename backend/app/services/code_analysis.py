@@ -0,0 +1,333 @@
+# backend/app/services/code_analysis.py
+"""
+Static analysis of Python submissions (standard library `ast` only).
+
+Computes per-function cyclomatic complexity, nesting depth and length,
+naming and lint issues, and loop patterns that are quadratic or worse, and
+turns them into deterministic 0-10 code_quality scores. Runs in a few
+milliseconds for typical submissions, so evaluations don't need the model
+to score code quality; callers on the event loop run it in a thread.
+"""
+import ast
+import builtins
+import re
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+
+MAX_FUNCTION_LINES = 30
+MAX_COMPLEXITY = 10
+MAX_NESTING = 3
+MAX_LINE_LENGTH = 99
+
+_SNAKE_CASE = re.compile(r"^_{0,2}[a-z][a-z0-9_]*_{0,2}$")
+_CAP_WORDS = re.compile(r"^_?[A-Z][a-zA-Z0-9]*$")
+_CONSTANT = re.compile(r"^_?[A-Z][A-Z0-9_]*$")
+_SHORT_NAMES_OK = {"i", "j", "k", "n", "m", "x", "y", "z", "a", "b", "c", "s", "_", "e", "f"}
+_BUILTIN_NAMES = {name for name in dir(builtins) if not name.startswith("_")}
+
+_BLOCKS = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.With, ast.AsyncWith, ast.Match)
+# Calls that are linear in the length of a list, so quadratic inside a loop
+_LINEAR_LIST_METHODS = {"index", "count", "remove", "insert"}
+
+# Points deducted per issue, and the most each kind of issue can cost
+_PENALTIES = {
+    "long-function": (1.0, 3), "complex-function": (1.5, 4), "deep-nesting": (1.0, 3),
+    "naming": (0.5, 2), "short-name": (0.25, 1), "long-line": (0.25, 1),
+    "bare-except": (2.0, 4), "mutable-default": (2.0, 4), "unused-import": (1.0, 3),
+    "unused-variable": (0.5, 2), "none-comparison": (1.0, 2), "shadowed-builtin": (1.0, 3),
+    "wildcard-import": (1.0, 1), "global-statement": (1.0, 2),
+    "nested-loop": (2.0, 4), "linear-call-in-loop": (2.0, 4), "string-concat-in-loop": (1.0, 2),
+    "sort-in-loop": (2.0, 4),
+}
+_SCORES = {
+    "readability": ("long-function", "complex-function", "deep-nesting", "naming", "short-name", "long-line"),
+    "best_practices": (
+        "bare-except", "mutable-default", "unused-import", "unused-variable", "none-comparison",
+        "shadowed-builtin", "wildcard-import", "global-statement",
+    ),
+    "efficiency": ("nested-loop", "linear-call-in-loop", "string-concat-in-loop", "sort-in-loop"),
+}
+
+def _complexity(node: ast.AST) -> int:
+    """McCabe complexity of a function body (nested functions are counted separately)"""
+    complexity = 1
+    for child in _walk_own(node):
+        if isinstance(child, (ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.Assert)):
+            complexity += 1
+        elif isinstance(child, ast.BoolOp):
+            complexity += len(child.values) - 1
+        elif isinstance(child, ast.comprehension):
+            complexity += 1 + len(child.ifs)
+        elif isinstance(child, ast.match_case):
+            complexity += 1
+    return complexity
+
+def _walk_own(node: ast.AST):
+    """Nodes of a function or module body, not descending into nested functions and classes"""
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        yield child
+        if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            stack.extend(ast.iter_child_nodes(child))
+
+def _nesting(node: ast.AST, depth: int = 0) -> int:
+    deepest = depth
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        deepest = max(deepest, _nesting(child, depth + 1 if isinstance(child, _BLOCKS) else depth))
+    return deepest
+
+def _loop_target_source(loop: ast.AST) -> Optional[str]:
+    if isinstance(loop, (ast.For, ast.AsyncFor)):
+        return ast.unparse(loop.iter)
+    return None
+
+class _Analyzer(ast.NodeVisitor):
+    def __init__(self, tree: ast.Module, source: str):
+        self.tree = tree
+        self.source = source
+        self.issues: List[Dict[str, Any]] = []
+        self.functions: List[Dict[str, Any]] = []
+        self.loops: List[ast.AST] = []
+        self.list_names: Set[str] = set()
+        # Loop variables may be short (for i in ..., for v in ...)
+        self.loop_targets: Set[int] = {
+            id(name)
+            for node in ast.walk(tree) if isinstance(node, (ast.For, ast.AsyncFor, ast.comprehension))
+            for name in ast.walk(node.target) if isinstance(name, ast.Name)
+        }
+
+    def issue(self, code: str, node: Optional[ast.AST], message: str) -> None:
+        self.issues.append({"code": code, "line": getattr(node, "lineno", None), "message": message})
+
+    def run(self) -> None:
+        self._collect_list_names()
+        self._check_imports()
+        self._check_lines()
+        self.visit(self.tree)
+
+    # Structure
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        length = (node.end_lineno or node.lineno) - node.lineno + 1
+        complexity = _complexity(node)
+        nesting = _nesting(node)
+        self.functions.append({
+            "name": node.name, "line": node.lineno, "lines": length,
+            "complexity": complexity, "nesting": nesting,
+        })
+        if length > MAX_FUNCTION_LINES:
+            self.issue("long-function", node, f"{node.name}() is {length} lines long (over {MAX_FUNCTION_LINES})")
+        if complexity > MAX_COMPLEXITY:
+            self.issue("complex-function", node, f"{node.name}() has cyclomatic complexity {complexity} (over {MAX_COMPLEXITY})")
+        if nesting > MAX_NESTING:
+            self.issue("deep-nesting", node, f"{node.name}() nests blocks {nesting} deep (over {MAX_NESTING})")
+        if not _SNAKE_CASE.match(node.name):
+            self.issue("naming", node, f"function {node.name} should be snake_case")
+        self._check_arguments(node)
+        self._check_unused_locals(node)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        if not _CAP_WORDS.match(node.name):
+            self.issue("naming", node, f"class {node.name} should be CapWords")
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Store):
+            if node.id in _BUILTIN_NAMES:
+                self.issue("shadowed-builtin", node, f"{node.id} shadows the built-in of the same name")
+            elif not (_SNAKE_CASE.match(node.id) or _CONSTANT.match(node.id)):
+                self.issue("naming", node, f"variable {node.id} should be snake_case")
+            elif len(node.id) == 1 and node.id not in _SHORT_NAMES_OK and id(node) not in self.loop_targets:
+                self.issue("short-name", node, f"variable {node.id} could have a descriptive name")
+
+    # Lint
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.type is None:
+            self.issue("bare-except", node, "bare except: also catches KeyboardInterrupt and SystemExit")
+        self.generic_visit(node)
+
+    def visit_Compare(self, node: ast.Compare) -> None:
+        for op, right in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.Eq, ast.NotEq)) and isinstance(right, ast.Constant) and right.value is None:
+                self.issue("none-comparison", node, "compare with None using `is` / `is not`")
+        if self.loops and any(isinstance(op, (ast.In, ast.NotIn)) for op in node.ops):
+            for right in node.comparators:
+                if isinstance(right, ast.Name) and right.id in self.list_names:
+                    self.issue(
+                        "linear-call-in-loop", node,
+                        f"`in {right.id}` scans the list on every iteration; a set makes it O(1)",
+                    )
+        self.generic_visit(node)
+
+    def visit_Global(self, node: ast.Global) -> None:
+        self.issue("global-statement", node, f"global {', '.join(node.names)}: pass values in and return them instead")
+
+    # Loops
+
+    def _visit_loop(self, node: ast.AST) -> None:
+        if self.loops:
+            outer, inner = _loop_target_source(self.loops[-1]), _loop_target_source(node)
+            if inner is not None and (inner == outer or inner.startswith(("range(len(", "enumerate("))):
+                self.issue("nested-loop", node, "nested loop over the same data is O(n^2)")
+        self.loops.append(node)
+        self.generic_visit(node)
+        self.loops.pop()
+
+    visit_For = visit_AsyncFor = visit_While = _visit_loop
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if self.loops and isinstance(node.func, ast.Attribute):
+            method = node.func.attr
+            owner = node.func.value
+            if method in _LINEAR_LIST_METHODS and isinstance(owner, ast.Name) and owner.id in self.list_names:
+                self.issue("linear-call-in-loop", node, f"{owner.id}.{method}() is O(n) inside a loop")
+            elif method == "pop" and node.args and isinstance(node.args[0], ast.Constant) and node.args[0].value == 0:
+                self.issue("linear-call-in-loop", node, "pop(0) shifts the whole list; collections.deque.popleft() is O(1)")
+            elif method == "sort":
+                self.issue("sort-in-loop", node, "sorting inside a loop; sort once, or keep a heap")
+        elif self.loops and isinstance(node.func, ast.Name) and node.func.id == "sorted":
+            self.issue("sort-in-loop", node, "sorted() inside a loop; sort once, or keep a heap")
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node: ast.AugAssign) -> None:
+        if (
+            self.loops and isinstance(node.op, ast.Add) and isinstance(node.target, ast.Name)
+            and isinstance(node.value, (ast.JoinedStr, ast.Constant)) and not isinstance(getattr(node.value, "value", ""), (int, float))
+        ):
+            self.issue("string-concat-in-loop", node, f"{node.target.id} += ... builds a string piece by piece; use ''.join()")
+        self.generic_visit(node)
+
+    # Helpers
+
+    def _collect_list_names(self) -> None:
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.Assign) and isinstance(node.value, (ast.List, ast.ListComp)):
+                self.list_names.update(target.id for target in node.targets if isinstance(target, ast.Name))
+            elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+                func = node.value.func
+                if isinstance(func, ast.Name) and func.id in ("list", "sorted"):
+                    self.list_names.update(target.id for target in node.targets if isinstance(target, ast.Name))
+
+    def _check_arguments(self, node: ast.FunctionDef) -> None:
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            if isinstance(default, (ast.List, ast.Dict, ast.Set)) or (
+                isinstance(default, ast.Call) and isinstance(default.func, ast.Name) and default.func.id in ("list", "dict", "set")
+            ):
+                self.issue("mutable-default", default, f"{node.name}() has a mutable default argument shared between calls")
+        for arg in node.args.args + node.args.kwonlyargs:
+            if arg.arg in _BUILTIN_NAMES:
+                self.issue("shadowed-builtin", arg, f"argument {arg.arg} shadows the built-in of the same name")
+
+    def _check_unused_locals(self, node: ast.FunctionDef) -> None:
+        stored: Dict[str, ast.AST] = {}
+        loaded: Set[str] = set()
+        declared: Set[str] = set()
+        for child in _walk_own(node):
+            if isinstance(child, ast.Name):
+                if isinstance(child.ctx, ast.Store):
+                    stored.setdefault(child.id, child)
+                else:
+                    loaded.add(child.id)
+            elif isinstance(child, (ast.Global, ast.Nonlocal)):
+                declared.update(child.names)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+                # Closures may read the name
+                loaded.update(name.id for name in ast.walk(child) if isinstance(name, ast.Name))
+        for name, where in stored.items():
+            if name not in loaded and name not in declared and not name.startswith("_"):
+                self.issue("unused-variable", where, f"{name} is assigned but never used")
+
+    def _check_imports(self) -> None:
+        used = {node.id for node in ast.walk(self.tree) if isinstance(node, ast.Name)}
+        used |= {node.value.id for node in ast.walk(self.tree) if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)}
+        for node in ast.walk(self.tree):
+            if not isinstance(node, (ast.Import, ast.ImportFrom)):
+                continue
+            for alias in node.names:
+                if alias.name == "*":
+                    self.issue("wildcard-import", node, f"from {node.module} import * hides where names come from")
+                    continue
+                name = (alias.asname or alias.name).split(".")[0]
+                if name not in used:
+                    self.issue("unused-import", node, f"{alias.name} is imported but not used")
+
+    def _check_lines(self) -> None:
+        for number, line in enumerate(self.source.splitlines(), 1):
+            if len(line) > MAX_LINE_LENGTH:
+                self.issue("long-line", None, f"line {number} is {len(line)} characters (over {MAX_LINE_LENGTH})")
+                self.issues[-1]["line"] = number
+
+def _scores(issues: List[Dict[str, Any]]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for issue in issues:
+        counts[issue["code"]] = counts.get(issue["code"], 0) + 1
+    scores = {}
+    for score, codes in _SCORES.items():
+        deducted = sum(
+            min(_PENALTIES[code][0] * counts.get(code, 0), _PENALTIES[code][1]) for code in codes
+        )
+        # Truncated, so any deduction shows up in the score
+        scores[score] = max(0, min(10, int(10 - deducted)))
+    return scores
+
+def analyze_code(code: str, language: Optional[str] = "python") -> Optional[Dict[str, Any]]:
+    """
+    Static analysis of a submission: code_quality scores, metrics and issues.
+    None for other languages, code that doesn't parse and code over the
+    submission size limit (CODE_MAX_SUBMISSION_CHARS) or nested too deeply.
+    """
+    if (language or "python").lower() != "python" or len(code) > settings.CODE_MAX_SUBMISSION_CHARS:
+        return None
+    started = time.perf_counter()
+    try:
+        tree = ast.parse(code)
+        analyzer = _Analyzer(tree, code)
+        analyzer.run()
+        functions = analyzer.functions
+        metrics = {
+            "lines": len(code.splitlines()),
+            "functions": functions,
+            "max_complexity": max((f["complexity"] for f in functions), default=_complexity(tree)),
+            "max_nesting": max([_nesting(tree)] + [f["nesting"] for f in functions]),
+            "longest_function": max((f["lines"] for f in functions), default=0),
+        }
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return None
+
+    issues = sorted(analyzer.issues, key=lambda issue: (issue["line"] or 0, issue["code"]))
+    return {
+        "code_quality": _scores(issues),
+        "metrics": metrics,
+        "issues": issues,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+def summarize_analysis(analysis: Dict[str, Any], max_issues: int = 10) -> str:
+    """Compact text form for a model prompt"""
+    quality = analysis["code_quality"]
+    stats = analysis["metrics"]
+    lines = [
+        f"Scores (0-10): readability {quality['readability']}, efficiency {quality['efficiency']}, "
+        f"best practices {quality['best_practices']}",
+        f"{stats['lines']} lines, {len(stats['functions'])} functions, max complexity {stats['max_complexity']}, "
+        f"max nesting {stats['max_nesting']}, longest function {stats['longest_function']} lines",
+    ]
+    issues = analysis["issues"]
+    lines.extend(
+        f"- line {issue['line']}: {issue['message']}" if issue["line"] else f"- {issue['message']}"
+        for issue in issues[:max_issues]
+    )
+    if len(issues) > max_issues:
+        lines.append(f"- ... {len(issues) - max_issues} more issues")
+    if not issues:
+        lines.append("No issues found.")
+    return "\n".join(lines)
@@ -0,0 +1,641 @@
+# backend/app/services/code_runner.py
+import asyncio
+import json
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.exceptions import BadRequestException
+from app.core.metrics import metrics
+from app.core.serialization import dumps
+from app.services.toolchains import toolchains
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+
+# Run in the sandbox interpreter itself; other languages go through their toolchain
+SUPPORTED_LANGUAGES = ("python",)
+
+# Outcomes that depend on load or the sandbox rather than the submitted code
+TRANSIENT_ERRORS = ("Timed out", "Wall-clock limit", "Sandbox ")
+
+def is_reproducible(run: Dict[str, Any]) -> bool:
+    """Whether running the same code again would give the same results (so they can be cached)"""
+    return not any(
+        (result.get("error") or "").startswith(TRANSIENT_ERRORS) for result in run["test_results"]
+    )
+
+# What a sandbox gets of a test case: never the expected output
+SANDBOX_TEST_FIELDS = ("input", "function", "args")
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ""
+    return json.dumps(value)
+
+def _normalize(text: str) -> str:
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+def matches_expected(actual: Any, expected: Any, function_mode: bool) -> bool:
+    """
+    Whether a test's output matches: function return values equal the
+    expected value (or its text), program output equals it ignoring
+    trailing whitespace
+    """
+    if function_mode and not isinstance(expected, str):
+        return actual == expected
+    actual_text = actual if isinstance(actual, str) else repr(actual)
+    candidates = {_normalize(_as_text(expected))}
+    if not isinstance(expected, str):
+        candidates.add(_normalize(str(expected)))
+    return _normalize(actual_text) in candidates
+
+def runner_limits() -> Dict[str, Any]:
+    """Resource limits applied inside every sandbox process"""
+    return {
+        "cpu_seconds": settings.CODE_RUNNER_CPU_SECONDS,
+        "memory_mb": settings.CODE_RUNNER_MEMORY_MB,
+        "max_open_files": settings.CODE_RUNNER_MAX_OPEN_FILES,
+        "max_file_bytes": settings.CODE_RUNNER_MAX_FILE_BYTES,
+        "max_output_bytes": settings.CODE_RUNNER_MAX_OUTPUT_BYTES,
+        "test_timeout_seconds": settings.CODE_RUNNER_TEST_TIMEOUT_SECONDS,
+        "sandbox_user": settings.CODE_RUNNER_SANDBOX_USER,
+    }
+
+def sandbox_env() -> Dict[str, str]:
+    """Environment of sandbox processes; nothing is inherited from the server's (API keys, database URLs)"""
+    return {
+        "PATH": "/usr/local/bin:/usr/bin:/bin",
+        "LANG": "C.UTF-8",
+        "PYTHONDONTWRITEBYTECODE": "1",
+        "PYTHONNOUSERSITE": "1",
+    }
+
+def protocol_line_limit() -> int:
+    """Longest result line a sandbox may send: a test's output, JSON-escaped, plus the rest of the result"""
+    return 8 * settings.CODE_RUNNER_MAX_OUTPUT_BYTES + 65536
+
+class SandboxWorker:
+    """A ready sandbox process waiting for one submission"""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer,
+        pid: int,
+        workdir: Optional[str],
+        process: Optional[asyncio.subprocess.Process] = None,
+        on_release: Optional[Callable[[], None]] = None
+    ):
+        self.reader = reader
+        self.writer = writer
+        self.pid = pid
+        self.workdir = workdir
+        self.process = process
+        self._on_release = on_release
+
+    @property
+    def alive(self) -> bool:
+        return self.process is None or self.process.returncode is None
+
+    async def run(self, job: Dict[str, Any], timeout: float) -> AsyncIterator[Dict[str, Any]]:
+        """Send a job and yield its results as they arrive, until done, EOF or the deadline"""
+        self.writer.write(dumps(job) + b"\n")
+        await self.writer.drain()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            line = await asyncio.wait_for(self.reader.readline(), remaining)
+            if not line:
+                return
+            message = json.loads(line)
+            if message.get("done"):
+                return
+            yield message
+
+    async def exit_status(self) -> Optional[int]:
+        """Exit status if known (forked children are reaped by the zygote, so theirs is not)"""
+        if self.process is None:
+            return None
+        try:
+            return await asyncio.wait_for(self.process.wait(), 1)
+        except asyncio.TimeoutError:
+            return None
+
+    def kill(self) -> None:
+        """Stop the process (and anything it started) and remove its working directory"""
+        if self.alive:
+            try:
+                os.killpg(self.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                try:
+                    os.kill(self.pid, signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    pass
+        self.writer.close()
+        if self.workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            self.workdir = None
+        if self._on_release is not None:
+            self._on_release()
+            self._on_release = None
+
+class WorkerPool:
+    """
+    Pool of pre-started sandbox interpreters.
+
+    Each worker runs a single submission and is then discarded, so no state
+    leaks between learners; a replacement is started in the background as
+    soon as one is taken, so requests don't wait for interpreter startup.
+    """
+
+    def __init__(self, size: int):
+        """
+        Args:
+            size: number of idle workers kept ready (and maximum concurrent runs)
+        """
+        self.size = size
+        self._idle: Optional[asyncio.Queue] = None
+        self._starting = 0
+        self._tasks: set = set()
+
+    async def start(self) -> None:
+        """Start the initial workers"""
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            self._replenish()
+
+    async def stop(self) -> None:
+        """Stop idle workers and pending startups"""
+        idle, self._idle = self._idle, None
+        if idle is not None:
+            while not idle.empty():
+                idle.get_nowait().kill()
+        # Let pending startups finish: they kill their worker (and remove its
+        # workdir) once they see the pool is stopped
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._starting = 0
+
+    async def acquire(self) -> SandboxWorker:
+        """Take a ready worker, waiting if all of them are busy"""
+        await self.start()
+        while True:
+            worker = await self._idle.get()
+            self._replenish()
+            if worker.alive:
+                return worker
+            worker.kill()
+
+    def _replenish(self) -> None:
+        while self._idle is not None and self._idle.qsize() + self._starting < self.size:
+            self._starting += 1
+            task = asyncio.create_task(self._spawn())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _spawn(self) -> None:
+        process = None
+        try:
+            started = time.perf_counter()
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-I", WORKER_SCRIPT, json.dumps(runner_limits()),
+                env=sandbox_env(),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                start_new_session=True,
+                limit=protocol_line_limit(),
+            )
+            ready = json.loads(await asyncio.wait_for(process.stdout.readline(), 10))
+            metrics.observe("code_runner_worker_start_seconds", time.perf_counter() - started)
+            worker = SandboxWorker(process.stdout, process.stdin, process.pid, ready.get("workdir"), process)
+            if self._idle is None:
+                worker.kill()
+            else:
+                self._idle.put_nowait(worker)
+        except asyncio.CancelledError:
+            if process is not None and process.returncode is None:
+                process.kill()
+            raise
+        except Exception as e:
+            metrics.inc("code_runner_worker_start_failures")
+            logger.error(f"Error starting sandbox worker: {str(e)}")
+            await asyncio.sleep(1)
+        finally:
+            self._starting = max(0, self._starting - 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "pool",
+            "size": self.size,
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "starting": self._starting,
+        }
+
+class ZygotePool:
+    """
+    Sandboxes forked from a zygote process.
+
+    The zygote imports the interpreter's commonly used standard library
+    modules and the test harness once. Each submission is a fork of it:
+    startup is a copy-on-write fork instead of a new interpreter, and the
+    preloaded pages stay shared between all running sandboxes. Children
+    drop to CODE_RUNNER_SANDBOX_USER (when the server runs as root) and
+    apply the resource limits before reading their job.
+    """
+
+    def __init__(self, size: int):
+        """
+        Args:
+            size: maximum number of sandboxes running at once
+        """
+        self.size = size
+        self._slots = asyncio.Semaphore(size)
+        self._running = 0
+        self._lock = asyncio.Lock()
+        self._zygote: Optional[asyncio.subprocess.Process] = None
+        self._control: Optional[socket.socket] = None
+        self._control_file = None
+
+    async def start(self) -> None:
+        """Start the zygote"""
+        if self._zygote is not None and self._zygote.returncode is None:
+            return
+        self._close_control()
+        ours, theirs = socket.socketpair()
+        try:
+            self._zygote = await asyncio.create_subprocess_exec(
+                sys.executable, "-I", WORKER_SCRIPT, "--zygote", str(theirs.fileno()),
+                json.dumps(runner_limits()),
+                env=sandbox_env(),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                pass_fds=(theirs.fileno(),),
+            )
+        finally:
+            theirs.close()
+        await asyncio.wait_for(self._zygote.stdout.readline(), 10)
+        self._control = ours
+        self._control_file = ours.makefile("rb")
+        metrics.inc("code_runner_zygote_starts")
+        logger.info(f"Sandbox zygote started (pid {self._zygote.pid})")
+
+    async def stop(self) -> None:
+        """Stop the zygote; running sandboxes are killed by their owners"""
+        self._close_control()
+        if self._zygote is not None and self._zygote.returncode is None:
+            self._zygote.kill()
+            await self._zygote.wait()
+        self._zygote = None
+
+    async def acquire(self) -> SandboxWorker:
+        """Fork a sandbox for one submission, waiting while `size` are running"""
+        await self._slots.acquire()
+        handshake = asyncio.ensure_future(self._fork())
+        try:
+            return await asyncio.shield(handshake)
+        except asyncio.CancelledError:
+            # The child may already be forked: let the handshake finish, then
+            # discard the sandbox (killing it and removing its workdir)
+            handshake.add_done_callback(self._discard)
+            raise
+
+    async def _fork(self) -> SandboxWorker:
+        """Fork a child and wait for it to report ready; on failure nothing is left behind"""
+        parent = None
+        pid = None
+        try:
+            started = time.perf_counter()
+            parent, child = socket.socketpair()
+            try:
+                async with self._lock:
+                    await self.start()
+                    pid = await asyncio.to_thread(self._request_fork, child)
+            finally:
+                child.close()
+            reader, writer = await asyncio.open_unix_connection(sock=parent, limit=protocol_line_limit())
+            ready = json.loads(await asyncio.wait_for(reader.readline(), 10))
+            metrics.observe("code_runner_fork_seconds", time.perf_counter() - started)
+        except BaseException:
+            if parent is not None:
+                parent.close()
+            if pid is not None:
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except (ProcessLookupError, PermissionError):
+                    pass
+            self._slots.release()
+            raise
+
+        self._running += 1
+        return SandboxWorker(reader, writer, pid, ready.get("workdir"), on_release=self._release)
+
+    @staticmethod
+    def _discard(handshake: asyncio.Future) -> None:
+        if not handshake.cancelled() and handshake.exception() is None:
+            handshake.result().kill()
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._slots.release()
+
+    def _request_fork(self, channel: socket.socket) -> int:
+        socket.send_fds(self._control, [b"F"], [channel.fileno()])
+        line = self._control_file.readline()
+        if not line:
+            raise RuntimeError("Sandbox zygote exited")
+        return int(line)
+
+    def _close_control(self) -> None:
+        if self._control_file is not None:
+            self._control_file.close()
+            self._control_file = None
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "zygote",
+            "size": self.size,
+            "running": self._running,
+            "zygote_pid": self._zygote.pid if self._zygote is not None else None,
+            "zygote_starts": metrics.get("code_runner_zygote_starts"),
+        }
+
+class CodeRunner:
+    """
+    Runs submissions against an exercise's test cases in sandboxed processes.
+
+    Each submission runs in sandbox processes (forked from the zygote, or
+    pre-started interpreters with CODE_RUNNER_MODE=pool) with CPU, memory,
+    file size and open file limits, a per-test timer and a wall-clock
+    deadline enforced from here.
+
+    A submission's test cases are dealt round-robin into shards that run in
+    parallel, one sandbox each, so long suites take about as long as their
+    slowest shard instead of the sum of all tests. Results are streamed per
+    test as shards report them, and the run can stop early after a number
+    of failures.
+
+    Other languages are first built by their toolchain (see toolchains.py)
+    and then run the same way, one child process of the sandbox per test;
+    compile time is reported apart from run time.
+    """
+
+    def __init__(self):
+        """Initialize the runner"""
+        size = settings.CODE_RUNNER_POOL_SIZE or os.cpu_count() or 1
+        if settings.CODE_RUNNER_MODE == "zygote" and hasattr(os, "fork") and hasattr(socket, "send_fds"):
+            self.pool = ZygotePool(size)
+        else:
+            self.pool = WorkerPool(size)
+        metrics.register_collector("code_runner", self.get_stats)
+
+    async def start(self) -> None:
+        """Start the worker pool and warm up the toolchains"""
+        if os.getuid() == 0 and not settings.CODE_RUNNER_SANDBOX_USER:
+            # Sandboxes would refuse to start (see sandbox_worker.resolve_owner)
+            raise RuntimeError("CODE_RUNNER_SANDBOX_USER must be set when the server runs as root")
+        await self.pool.start()
+        await toolchains.start()
+
+    async def stop(self) -> None:
+        """Stop the worker pool and compile servers"""
+        await toolchains.stop()
+        await self.pool.stop()
+
+    async def build(self, code: str, language: str = "python") -> Optional[Dict[str, Any]]:
+        """
+        Compile a submission for its toolchain (or reuse the cached build):
+        {"ok", "cached", "compile_ms", "error", "artifact"}. None for Python,
+        which runs in the sandbox interpreter directly.
+        """
+        language = self.check_language(language)
+        if language in SUPPORTED_LANGUAGES:
+            return None
+        return await toolchains.build(language, code)
+
+    async def stream_tests(
+        self,
+        code: str,
+        test_cases: List[Dict[str, Any]],
+        language: str = "python",
+        max_failures: Optional[int] = None,
+        build: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the test cases, yielding each result as it finishes (not in index
+        order). After `max_failures` failed tests (default
+        CODE_RUNNER_MAX_FAILURES, 0 = never) the remaining ones are stopped
+        and yielded as skipped. Compiled languages use `build` if given
+        (from build()), otherwise they are built first.
+        """
+        language = self.check_language(language)
+        if not test_cases:
+            return
+        if max_failures is None:
+            max_failures = settings.CODE_RUNNER_MAX_FAILURES
+        if build is None and language not in SUPPORTED_LANGUAGES:
+            build = await toolchains.build(language, code)
+        if build is not None and not build["ok"]:
+            # Nothing to run: every test fails with the compiler's message
+            for index, test in enumerate(test_cases):
+                yield self._format_result(index, test, {"actual": None, "error": build["error"], "duration_ms": 0.0})
+            return
+
+        metrics.inc("code_runner_submissions")
+        started = time.perf_counter()
+        job = {"code": code} if build is None else toolchains.job(language, code, build)
+        shard_count = self._shard_count(len(test_cases))
+        results: asyncio.Queue = asyncio.Queue()
+        shards = [
+            asyncio.create_task(self._run_shard(job, test_cases, list(range(i, len(test_cases), shard_count)), results))
+            for i in range(shard_count)
+        ]
+        metrics.observe("code_runner_shards", shard_count)
+
+        pending = set(range(len(test_cases)))
+        failures = 0
+        running = shard_count
+        try:
+            while running:
+                message = await results.get()
+                if message is None:
+                    running -= 1
+                    continue
+                index = message["index"]
+                pending.discard(index)
+                result = self._format_result(index, test_cases[index], message)
+                yield result
+                if not result["passed"]:
+                    failures += 1
+                    if max_failures and failures >= max_failures and pending:
+                        metrics.inc("code_runner_early_stops")
+                        break
+        finally:
+            for shard in shards:
+                shard.cancel()
+            await asyncio.gather(*shards, return_exceptions=True)
+            metrics.observe("code_runner_submission_seconds", time.perf_counter() - started)
+
+        skipped = {"actual": None, "error": f"Skipped after {failures} failed test(s)",
+                   "duration_ms": 0.0, "skipped": True}
+        for index in sorted(pending):
+            yield self._format_result(index, test_cases[index], skipped)
+
+    async def run_tests(
+        self,
+        code: str,
+        test_cases: List[Dict[str, Any]],
+        language: str = "python",
+        max_failures: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Run the test cases and return all results, in index order, with totals"""
+        started = time.perf_counter()
+        build = await self.build(code, language)
+        results = [result async for result in self.stream_tests(code, test_cases, language, max_failures, build)]
+        results.sort(key=lambda result: result["index"])
+        return self.summarize(results, time.perf_counter() - started, build)
+
+    @staticmethod
+    def supports(language: Optional[str]) -> bool:
+        """Whether submissions in this language can be run"""
+        language = (language or "python").lower()
+        return language in SUPPORTED_LANGUAGES or toolchains.available(language)
+
+    @staticmethod
+    def check_language(language: Optional[str]) -> str:
+        """Normalized language name; BadRequestException if it can't be run"""
+        language = (language or "python").lower()
+        if language in SUPPORTED_LANGUAGES:
+            return language
+        if language not in toolchains.toolchains:
+            raise BadRequestException(f"Running {language} code is not supported")
+        if not toolchains.available(language):
+            raise BadRequestException(
+                f"Running {language} code is not available on this server ({toolchains.unavailable_reason(language)})"
+            )
+        return language
+
+    @staticmethod
+    def compile_info(build: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """What clients see of a build: whether it worked, was cached and how long it took (None if nothing was compiled)"""
+        if build is None or (build["ok"] and build["compile_ms"] is None):
+            return None
+        return {"ok": build["ok"], "cached": build["cached"], "compile_ms": build["compile_ms"], "error": build["error"]}
+
+    @staticmethod
+    def summarize(results: List[Dict[str, Any]], seconds: float, build: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Totals for a set of test results; compile_ms is None when nothing was compiled"""
+        compile_ms = build["compile_ms"] if build is not None else None
+        duration_ms = round(seconds * 1000, 3)
+        return {
+            "test_results": results,
+            "all_passed": all(result["passed"] for result in results),
+            "passed_count": sum(1 for result in results if result["passed"]),
+            "skipped_count": sum(1 for result in results if result["skipped"]),
+            "total_count": len(results),
+            "duration_ms": duration_ms,
+            "compile": CodeRunner.compile_info(build),
+            "compile_ms": compile_ms,
+            "run_ms": round(max(0.0, duration_ms - (compile_ms or 0.0)), 3),
+        }
+
+    def _shard_count(self, test_count: int) -> int:
+        limit = settings.CODE_RUNNER_MAX_SHARDS or self.pool.size
+        per_shard = max(1, settings.CODE_RUNNER_MIN_TESTS_PER_SHARD)
+        return max(1, min(limit, self.pool.size, test_count // per_shard))
+
+    async def _run_shard(
+        self,
+        job: Dict[str, Any],
+        test_cases: List[Dict[str, Any]],
+        indexes: List[int],
+        results: asyncio.Queue
+    ) -> None:
+        """
+        Run some of a submission's tests in one sandbox, putting each outcome
+        on `results`, then None. Only the first outcome for each of the
+        shard's own indexes is taken; anything else the sandbox sends is dropped.
+        """
+        pending = set(indexes)
+        failure = None
+        worker = None
+        try:
+            worker = await self.pool.acquire()
+            tests = [
+                {field: test_cases[index][field] for field in SANDBOX_TEST_FIELDS if field in test_cases[index]}
+                for index in indexes
+            ]
+            job = {**job, "tests": tests, "indexes": indexes}
+            per_test = settings.CODE_RUNNER_TEST_TIMEOUT_SECONDS + job.get("startup_seconds", 0)
+            timeout = per_test * len(indexes) + 1
+            async for message in worker.run(job, timeout):
+                index = message.get("index") if isinstance(message, dict) else None
+                if type(index) is not int or index not in pending:
+                    metrics.inc("code_runner_dropped_messages")
+                    continue
+                pending.discard(index)
+                results.put_nowait(message)
+            if pending:
+                status = await worker.exit_status()
+                failure = "Sandbox exited unexpectedly" + (f" (status {status})" if status is not None else "")
+        except asyncio.TimeoutError:
+            metrics.inc("code_runner_timeouts")
+            failure = "Wall-clock limit exceeded"
+        except Exception as e:
+            logger.error(f"Error running tests in sandbox: {str(e)}")
+            failure = "Sandbox failed to run"
+        finally:
+            if worker is not None:
+                worker.kill()
+
+        for index in sorted(pending):
+            results.put_nowait({"index": index, "actual": None, "error": failure, "duration_ms": 0.0})
+        results.put_nowait(None)
+
+    @staticmethod
+    def _format_result(index: int, test: Dict[str, Any], outcome: Dict[str, Any]) -> Dict[str, Any]:
+        """A test's result, judged here against the server's copy of the test case"""
+        error = outcome.get("error")
+        passed = (
+            error is None
+            and not outcome.get("skipped")
+            and matches_expected(outcome.get("actual"), test.get("expected_output"), bool(test.get("function")))
+        )
+        return {
+            "index": index,
+            "name": test.get("name") or f"Test {index + 1}",
+            "input": test.get("input", test.get("args")),
+            "expected": test.get("expected_output"),
+            "actual": outcome.get("actual"),
+            "passed": passed,
+            "error": outcome.get("error"),
+            "duration_ms": outcome.get("duration_ms"),
+            "skipped": bool(outcome.get("skipped")),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Runner statistics for the metrics endpoint"""
+        return {
+            **self.pool.get_stats(),
+            "submissions": metrics.get("code_runner_submissions"),
+            "timeouts": metrics.get("code_runner_timeouts"),
+            "early_stops": metrics.get("code_runner_early_stops"),
+            "worker_start_failures": metrics.get("code_runner_worker_start_failures"),
+        }
+
+code_runner = CodeRunner()
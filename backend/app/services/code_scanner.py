@@ -0,0 +1,228 @@
+# backend/app/services/code_scanner.py
+import ast
+import hashlib
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.metrics import metrics
+from app.services.submission_cache import c_like_tokens
+
+logger = logging.getLogger(__name__)
+
+Finding = Dict[str, Any]
+
+# Python: modules a submission may not import at all
+PYTHON_BLOCKED_MODULES = {
+    "__main__", "_thread", "builtins", "code", "codeop", "ctypes", "fcntl", "fileinput", "ftplib", "gc", "glob",
+    "http", "importlib", "inspect", "linecache", "marshal", "mmap", "multiprocessing", "nt", "pathlib", "pickle",
+    "posix", "pty", "requests", "resource", "runpy", "shelve", "shutil", "signal", "smtplib", "socket",
+    "subprocess", "tempfile", "telnetlib", "urllib",
+}
+# Python: attributes of allowed modules that are not (prefixes for exec*, spawn*, ...)
+PYTHON_BLOCKED_ATTRIBUTES = {
+    "os": (
+        "system", "popen", "exec", "spawn", "fork", "kill", "remove", "unlink", "rmdir", "removedirs",
+        "rename", "renames", "replace", "chmod", "chown", "setuid", "setgid", "putenv", "symlink",
+        "link", "truncate", "open", "fdopen", "posix_spawn", "environ", "getenv",
+    ),
+    "sys": ("modules", "_getframe", "settrace", "setprofile", "meta_path", "path_hooks", "path", "addaudithook"),
+    "io": ("open", "FileIO"),
+    "codecs": ("open",),
+    "tokenize": ("open",),
+    "operator": ("attrgetter", "methodcaller"),
+}
+PYTHON_BLOCKED_BUILTINS = {"eval", "exec", "compile", "__import__", "open", "breakpoint", "globals", "vars", "__builtins__", "__loader__"}
+# Attributes used to climb from any object to the interpreter's internals
+PYTHON_BLOCKED_DUNDERS = {
+    "__subclasses__", "__globals__", "__builtins__", "__code__", "__closure__", "__bases__", "__base__",
+    "__mro__", "__loader__", "__spec__", "__getattribute__", "__dict__", "f_globals", "f_locals", "f_back",
+    "f_builtins", "gi_frame", "gi_code", "tb_frame", "co_code", "cr_frame",
+}
+PYTHON_REFLECTION = {"getattr", "setattr", "delattr"}
+
+# Other languages: patterns over the token stream (comments removed, tokens separated by
+# single spaces). Rules marked True see string literals (module names in imports); the
+# others run with every string literal replaced by "", so text inside strings can't match
+_JS_MODULES = r"""["'`](?:node:)?(?:child_process|fs|fs/promises|net|http|https|dgram|cluster|worker_threads|vm|v8)["'`]"""
+TOKEN_RULES: Dict[str, List[Tuple[str, str, bool]]] = {
+    "javascript": [
+        (r"\brequire \( " + _JS_MODULES, "requires a module that reaches outside the sandbox", True),
+        (r"""\bimport\b[^;'"`]*""" + _JS_MODULES, "imports a module that reaches outside the sandbox", True),
+        (r"\beval \(", "calls eval()", False),
+        (r"\bnew Function \(|\bFunction \(", "builds a function from a string", False),
+        (r"\bprocess \. (?:binding|dlopen|kill|env)\b", "uses process internals", False),
+        (r"\bconstructor \. constructor\b", "reaches the Function constructor", False),
+        (r"\bglobalThis\b", "uses globalThis", False),
+    ],
+    "java": [
+        (r"\bRuntime \. getRuntime\b|\bProcessBuilder\b", "runs external processes", False),
+        (r"\bjava \. net\b|\bSocket\b|\bURLConnection\b", "opens network connections", False),
+        (r"\bjava \. lang \. reflect\b|\bsetAccessible\b|\bClass \. forName\b", "uses reflection", False),
+        (r"\bFiles \. (?:write|delete|move|copy)\b|\bFileOutputStream\b|\bFileWriter\b", "writes files", False),
+        (r"\bSystem \. (?:load|loadLibrary|setSecurityManager)\b", "loads native code", False),
+    ],
+    "csharp": [
+        (r"\bSystem \. Diagnostics \. Process\b|\bProcess \. Start\b|\bProcessStartInfo\b", "runs external processes", False),
+        (r"\bSystem \. Net\b|\bHttpClient\b|\bTcpClient\b|\bSocket\b", "opens network connections", False),
+        (r"\bSystem \. Reflection\b|\bAssembly \. Load\w*\b|\bActivator \. CreateInstance\b", "uses reflection", False),
+        (r"\bDllImport\b|\bunsafe\b|\bMarshal \.", "uses native code", False),
+        (r"\bFile \. (?:Write\w*|Delete|Move|Copy|Create)\b|\bDirectory \. Delete\b", "writes files", False),
+    ],
+    "go": [
+        (r'''"(?:os/exec|syscall|net|net/http|unsafe|plugin|os/signal)"''', "imports a package that reaches outside the sandbox", True),
+        (r"\bos \. (?:Remove\w*|Rename|Chmod|Chown|Setenv|StartProcess|Create|WriteFile)\b", "modifies the system", False),
+    ],
+}
+TOKEN_RULES["typescript"] = TOKEN_RULES["javascript"]
+
+class _PythonScanner(ast.NodeVisitor):
+    def __init__(self):
+        self.findings: List[Finding] = []
+        # local name -> module it refers to (import os as o, from os import path)
+        self.aliases: Dict[str, str] = {}
+
+    def flag(self, node: ast.AST, rule: str, message: str) -> None:
+        self.findings.append({"rule": rule, "line": getattr(node, "lineno", None), "message": message})
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            root = alias.name.split(".")[0]
+            if root in PYTHON_BLOCKED_MODULES:
+                self.flag(node, "blocked-module", f"imports {alias.name}")
+            self.aliases[alias.asname or root] = alias.name if alias.asname else root
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        # o = os: o.system(...) is os.system(...)
+        if isinstance(node.value, ast.Name) and node.value.id in self.aliases:
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.aliases[target.id] = self.aliases[node.value.id]
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        module = node.module or ""
+        root = module.split(".")[0]
+        if root in PYTHON_BLOCKED_MODULES:
+            self.flag(node, "blocked-module", f"imports from {module}")
+            return
+        for alias in node.names:
+            if alias.name == "*" and root in PYTHON_BLOCKED_ATTRIBUTES:
+                self.flag(node, "blocked-attribute", f"imports * from {module}")
+            elif self._blocked_attribute(root, alias.name):
+                self.flag(node, "blocked-attribute", f"imports {module}.{alias.name}")
+            elif root == "os" and alias.name == "path":
+                self.aliases[alias.asname or alias.name] = "os.path"
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if node.attr in PYTHON_BLOCKED_DUNDERS:
+            self.flag(node, "introspection", f"uses .{node.attr}")
+        elif isinstance(node.value, ast.Name):
+            module = self.aliases.get(node.value.id)
+            if module is not None and self._blocked_attribute(module.split(".")[0], node.attr):
+                self.flag(node, "blocked-attribute", f"uses {module}.{node.attr}")
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load) and node.id in PYTHON_BLOCKED_BUILTINS:
+            self.flag(node, "blocked-builtin", f"uses {node.id}")
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if isinstance(node.func, ast.Name) and node.func.id in PYTHON_REFLECTION and len(node.args) >= 2:
+            name = node.args[1]
+            if not (isinstance(name, ast.Constant) and isinstance(name.value, str)):
+                self.flag(node, "dynamic-attribute", f"{node.func.id}() with a computed attribute name")
+            elif name.value.startswith("__") or name.value in PYTHON_BLOCKED_DUNDERS:
+                self.flag(node, "introspection", f"{node.func.id}() of {name.value}")
+            elif self._blocked_by_name(node.args[0], name.value):
+                self.flag(node, "blocked-attribute", f"{node.func.id}() of {name.value}")
+        self.generic_visit(node)
+
+    def _blocked_by_name(self, receiver: ast.AST, attribute: str) -> bool:
+        # getattr(os, "system") is os.system; when the receiver isn't a known module,
+        # the name is checked against every module's blocked attributes
+        module = self.aliases.get(receiver.id) if isinstance(receiver, ast.Name) else None
+        if module is not None:
+            return self._blocked_attribute(module.split(".")[0], attribute)
+        return any(self._blocked_attribute(root, attribute) for root in PYTHON_BLOCKED_ATTRIBUTES)
+
+    @staticmethod
+    def _blocked_attribute(module: str, attribute: str) -> bool:
+        prefixes = PYTHON_BLOCKED_ATTRIBUTES.get(module)
+        return bool(prefixes) and attribute.startswith(prefixes)
+
+def _scan_python(code: str) -> List[Finding]:
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        # Code that doesn't parse can't run either; the sandbox reports the syntax error
+        return []
+    except (RecursionError, MemoryError):
+        return [{"rule": "too-complex", "line": None, "message": "code is nested too deeply to check"}]
+    scanner = _PythonScanner()
+    try:
+        scanner.visit(tree)
+    except RecursionError:
+        return [{"rule": "too-complex", "line": None, "message": "code is nested too deeply to check"}]
+    return scanner.findings
+
+def _scan_tokens(code: str, language: str) -> List[Finding]:
+    # Comments are dropped and identifiers are whole tokens, so `evaluate` doesn't match `eval`
+    tokens = list(c_like_tokens(code))
+    streams = {
+        True: " ".join(text for _, text in tokens),
+        False: " ".join('""' if kind == "string" else text for kind, text in tokens),
+    }
+    findings = []
+    for pattern, message, sees_strings in TOKEN_RULES.get(language, []):
+        match = re.search(pattern, streams[sees_strings])
+        if match:
+            findings.append({"rule": "blocked-api", "line": None, "message": f"{message} ({match.group()})"})
+    return findings
+
+class CodeScanner:
+    """
+    Rejects submissions that try to reach outside the exercise (processes,
+    files, network, interpreter internals) before any sandbox or model work
+    is spent on them.
+
+    Python is checked on the AST, with import aliases resolved, so names
+    like `evaluate` or strings mentioning `open(` are fine while
+    `import os as o; o.system(...)` is not. Other languages are checked on
+    their token stream with comments removed. The sandbox remains the
+    actual security boundary; this is the cheap early filter. Verdicts are
+    cached by code hash.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """Initialize the scanner"""
+        self.verdicts: LRUCache[List[Finding]] = LRUCache(max_entries)
+        metrics.register_collector("code_scanner", self.get_stats)
+
+    def scan(self, code: str, language: Optional[str] = "python") -> List[Finding]:
+        """Findings for a submission (empty when it is acceptable)"""
+        language = (language or "python").lower()
+        key = hashlib.blake2b(language.encode() + b"\0" + code.encode(), digest_size=16).hexdigest()
+        findings = self.verdicts.get(key)
+        if findings is not None:
+            metrics.inc("code_scanner_hits")
+            return findings
+
+        metrics.inc("code_scanner_misses")
+        findings = _scan_python(code) if language == "python" else _scan_tokens(code, language)
+        if findings:
+            metrics.inc("code_scanner_rejections")
+            logger.info(f"Rejected {language} submission: {findings[0]['message']}")
+        self.verdicts.set(key, findings)
+        return findings
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Scanner statistics for the metrics endpoint"""
+        return {
+            "cached_verdicts": len(self.verdicts),
+            "hit_ratio": metrics.ratio("code_scanner_hits", "code_scanner_misses"),
+            "rejections": metrics.get("code_scanner_rejections"),
+        }
+
+code_scanner = CodeScanner()
@@ -0,0 +1,535 @@
+# backend/app/services/compact_path.py
+import hashlib
+import sys
+import weakref
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from app.core.serialization import dumps
+
+# Strings up to this length are interned, so repeated enum values ("not_started",
+# "multiple_choice"), option labels and topics are stored once per process.
+# IDs are unique, so they are not interned (they would only grow the intern table).
+# Longer strings are only shared within one path (repeated descriptions, explanations)
+INTERN_MAX_LENGTH = 64
+
+class _Missing:
+    """Marks a field that was absent from the source dict (as opposed to None)"""
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+MISSING = _Missing()
+
+def intern_value(value: Any, strings: Optional[Dict[str, str]] = None) -> Any:
+    """
+    Intern short strings, recursively through lists and dicts (keys included);
+    lists become tuples. Longer strings are deduplicated through `strings`
+    when given.
+    """
+    if isinstance(value, str):
+        if len(value) <= INTERN_MAX_LENGTH:
+            return sys.intern(value)
+        return value if strings is None else strings.setdefault(value, value)
+    if isinstance(value, (list, tuple)):
+        return tuple(intern_value(item, strings) for item in value)
+    if isinstance(value, dict):
+        return {
+            sys.intern(key) if isinstance(key, str) else key: intern_value(item, strings)
+            for key, item in value.items()
+        }
+    return value
+
+class CompactRecord:
+    """
+    Slotted record with a fixed set of fields.
+
+    Subclasses list their fields in FIELDS (as slots) and nested record types
+    in CHILDREN. Keys that are not fields are kept in `extra`, so converting a
+    dict to a record and back is lossless. Lists are held as tuples, which
+    have no spare capacity; to_dict and to_json turn them back into lists.
+    """
+    __slots__ = ("extra",)
+    FIELDS: Tuple[str, ...] = ()
+    CHILDREN: Dict[str, type] = {}
+    _FIELD_SET: FrozenSet[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], strings: Optional[Dict[str, str]] = None) -> "CompactRecord":
+        """Build a record; long strings repeated anywhere in data are stored once"""
+        if strings is None:
+            strings = {}
+        record = cls.__new__(cls)
+        for name in cls.FIELDS:
+            value = data.get(name, MISSING)
+            child = cls.CHILDREN.get(name)
+            if child is not None and isinstance(value, list):
+                value = tuple(
+                    child.from_dict(item, strings) if isinstance(item, dict) else intern_value(item, strings)
+                    for item in value
+                )
+            elif child is not None and isinstance(value, dict):
+                value = child.from_dict(value, strings)
+            elif value is not MISSING and name != "id":
+                value = intern_value(value, strings)
+            setattr(record, name, value)
+
+        record.extra = {
+            sys.intern(key): intern_value(value, strings)
+            for key, value in data.items()
+            if key not in cls._FIELD_SET
+        } or None
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict form; a new dict on every call, sharing nothing with the record"""
+        data = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not MISSING:
+                data[name] = _child_to_dict(value) if name in self.CHILDREN else _copy_value(value)
+        if self.extra:
+            data.update(_copy_value(self.extra))
+        return data
+
+    def to_json(self, sort_keys: bool = False) -> bytes:
+        """
+        Serialize to compact JSON bytes. Records are encoded directly:
+        orjson walks their fields without the copies to_dict makes.
+        """
+        return dumps(self, sort_keys=sort_keys, default=_encode)
+
+    def _fields(self) -> Dict[str, Any]:
+        """Present fields and extra keys, values as stored (child records included)"""
+        data = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not MISSING:
+                data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get_field(self, name: str) -> Any:
+        """Value of a field or extra key, MISSING if absent"""
+        if name in self._FIELD_SET:
+            return getattr(self, name)
+        return self.extra.get(name, MISSING) if self.extra else MISSING
+
+    def project(self, spec: "Projection") -> Dict[str, Any]:
+        """
+        Dict with only the fields in spec, in spec order. Only the requested
+        fields are converted; nested specs select fields of child records.
+        """
+        data = {}
+        for name, child_spec in spec.items():
+            value = self.get_field(name)
+            if value is not MISSING:
+                data[name] = _project_value(value, child_spec)
+        return data
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={getattr(self, 'id', None)!r})"
+
+def _copy_value(value: Any) -> Any:
+    """Copy nested lists (from tuples too) and dicts, so changes to a converted record never reach the (shared) original"""
+    if isinstance(value, (list, tuple)):
+        return [_copy_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy_value(item) for key, item in value.items()}
+    if isinstance(value, CompactRecord):
+        return value.to_dict()
+    return value
+
+def _encode(value: Any) -> Any:
+    # orjson default: records are encoded through their fields; anything else as str like dumps does
+    if isinstance(value, CompactRecord):
+        return value._fields()
+    return str(value)
+
+def _child_to_dict(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return [item.to_dict() if isinstance(item, CompactRecord) else _copy_value(item) for item in value]
+    if isinstance(value, CompactRecord):
+        return value.to_dict()
+    return _copy_value(value)
+
+def _project_value(value: Any, spec: Optional["Projection"]) -> Any:
+    if spec is None:
+        return _child_to_dict(value)
+    if isinstance(value, (list, tuple)):
+        return [_project_value(item, spec) for item in value]
+    if isinstance(value, CompactRecord):
+        return value.project(spec)
+    if isinstance(value, dict):
+        # Exercises and quizzes with their IDs put back (see PathNode.get_field)
+        return {name: _project_value(value[name], spec[name]) for name in spec if name in value}
+    return value
+
+class CompactResource(CompactRecord):
+    FIELDS = ("title", "type", "url", "duration_minutes", "is_required")
+    __slots__ = FIELDS
+
+class CompactQuizQuestion(CompactRecord):
+    FIELDS = ("id", "question", "type", "options", "correct_answer", "correct_answers", "explanation", "points")
+    __slots__ = FIELDS
+
+class CompactQuiz(CompactRecord):
+    FIELDS = ("id", "title", "description", "questions", "passing_score", "time_limit_minutes", "max_attempts")
+    __slots__ = FIELDS + ("__weakref__",)
+    CHILDREN = {"questions": CompactQuizQuestion}
+
+class CompactExercise(CompactRecord):
+    FIELDS = (
+        "id", "title", "description", "type", "difficulty", "estimated_time_minutes", "points",
+        "instructions", "sandbox_url", "starter_code", "test_cases", "hints",
+    )
+    __slots__ = FIELDS + ("__weakref__",)
+
+class CompactNode(CompactRecord):
+    FIELDS = (
+        "id", "title", "description", "order", "duration_hours", "type", "status", "prerequisites",
+        "topics", "learning_objectives", "resources", "exercises", "quiz", "completion_criteria",
+    )
+    __slots__ = FIELDS + ("__weakref__",)
+    CHILDREN = {"resources": CompactResource, "exercises": CompactExercise, "quiz": CompactQuiz}
+
+class CompactLearningPath(CompactRecord):
+    """
+    Compact in-memory form of a learning path.
+
+    Mirrors the PathNode / Exercise / Quiz / QuizQuestion schemas with slotted
+    records instead of nested dicts: field names live on the class rather than
+    in every object, and enum values and other short strings are interned.
+    """
+    FIELDS = (
+        "id", "title", "description", "total_duration_hours", "difficulty_level", "certification_target",
+        "nodes", "progress", "metadata", "created_at", "updated_at",
+    )
+    # Built by compact_learning_path: `content` is the pooled PathContent, whose
+    # fields are then MISSING here, and nodes are NodeRefs with their IDs in
+    # node_ids. Both are None for a record made with from_dict.
+    __slots__ = FIELDS + ("content", "node_ids")
+    CHILDREN = {"nodes": CompactNode}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], strings: Optional[Dict[str, str]] = None) -> "CompactLearningPath":
+        record = super().from_dict(data, strings)
+        record.content = None
+        record.node_ids = None
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.content is None and self.node_ids is None:
+            return super().to_dict()
+        return _copy_value(self._fields())
+
+    def _fields(self) -> Dict[str, Any]:
+        if self.content is None and self.node_ids is None:
+            return super()._fields()
+        data = {}
+        for name in self.FIELDS:
+            value = self.get_field(name)
+            if value is not MISSING:
+                data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get_field(self, name: str) -> Any:
+        if name == "nodes" and self.node_ids is not None:
+            return self._path_nodes()
+        value = super().get_field(name)
+        if value is MISSING and self.content is not None:
+            value = self.content.get_field(name)
+        return value
+
+    def _path_nodes(self) -> Tuple[Any, ...]:
+        """The NodeRefs with their IDs put back"""
+        ids = _unpack_ids(self.node_ids)
+        nodes = []
+        start = 0
+        for ref in self.nodes:
+            if isinstance(ref, NodeRef):
+                node = PathNode.__new__(PathNode)
+                node.extra = None
+                node.ids = ids[start:start + ref.id_count]
+                node.ref = ref
+                start += ref.id_count
+                ref = node
+            nodes.append(ref)
+        return tuple(nodes)
+
+class PathContent(CompactRecord):
+    """Path-level fields that are the same for every learner given the path"""
+    FIELDS = ("title", "description", "total_duration_hours", "difficulty_level", "certification_target", "metadata")
+    __slots__ = FIELDS + ("__weakref__",)
+
+# Node keys that belong to one learner's copy of a node rather than to its content
+NODE_OVERLAY_KEYS = ("id", "status", "prerequisites")
+
+# Field selection: name -> None for the whole value, or a nested selection for child records
+Projection = Dict[str, Optional[Dict[str, Any]]]
+
+# Outline of a path for overview pages: no resources, exercises or quizzes
+SKELETON_FIELDS = (
+    "id", "title", "description", "total_duration_hours", "difficulty_level", "certification_target",
+    "progress", "created_at", "updated_at",
+    "nodes.id", "nodes.title", "nodes.order", "nodes.duration_hours", "nodes.type", "nodes.status",
+    "nodes.prerequisites",
+)
+
+def parse_fields(fields: Iterable[str]) -> Projection:
+    """
+    Build a projection from field names, with dots for nested fields
+    (e.g. "nodes.title"). A bare name selects the whole value, even if
+    nested fields of it are also listed.
+    """
+    spec: Projection = {}
+    for field in fields:
+        names = [name for name in field.strip().split(".") if name]
+        level = spec
+        for depth, name in enumerate(names):
+            if depth == len(names) - 1:
+                level[name] = None
+                break
+            child = level.get(name, {})
+            if child is None:
+                break
+            level = level.setdefault(name, child)
+    return spec
+
+def projection_key(spec: Projection) -> str:
+    """Canonical string form of a projection, for cache keys and ETags"""
+    parts = []
+    for name in sorted(spec):
+        child = spec[name]
+        parts.append(name if child is None else f"{name}({projection_key(child)})")
+    return ",".join(parts)
+
+class ContentPool:
+    """
+    Content-addressed pool of node, exercise and quiz bodies and path content.
+
+    Bodies are keyed by a hash of their normalized content (everything except
+    IDs and learner state), so a module generated again for another learner,
+    or a fallback path handed out many times, is held once. Entries are weak
+    references: a body is dropped when no stored path uses it anymore.
+    Shared bodies are never handed out as-is: to_dict copies nested values
+    such as topics, test cases and hints.
+    """
+
+    def __init__(self):
+        """Initialize the pool"""
+        self._bodies: "weakref.WeakValueDictionary[Tuple[str, bytes], CompactRecord]" = (
+            weakref.WeakValueDictionary()
+        )
+        self.hits = 0
+        self.misses = 0
+        # JSON bytes of content that was found in the pool instead of being stored again
+        self.bytes_deduplicated = 0
+
+    def share(self, record: CompactRecord, canonical: Optional[bytes] = None) -> CompactRecord:
+        """
+        Return the pooled body with the same content, adding this one if it is
+        new. Content is compared as canonical JSON, the record's own by default.
+        """
+        if canonical is None:
+            canonical = record.to_json(sort_keys=True)
+        key = (type(record).__name__, hashlib.blake2b(canonical, digest_size=16).digest())
+        existing = self._bodies.get(key)
+        if existing is not None:
+            self.hits += 1
+            self.bytes_deduplicated += len(canonical)
+            return existing
+        self._bodies[key] = record
+        self.misses += 1
+        return record
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+# A path's entity IDs are packed into one string: with node bodies and
+# overlays shared, they are most of what a path still holds, and each str
+# costs ~50 bytes. Absent IDs are packed as empty strings.
+ID_SEPARATOR = "\x1f"
+
+def _pack_ids(ids: Tuple[Any, ...]) -> Any:
+    """Join IDs into one string, or keep the tuple when one is empty, not a str or has the separator"""
+    if all(
+        entity_id is MISSING or (isinstance(entity_id, str) and entity_id and ID_SEPARATOR not in entity_id)
+        for entity_id in ids
+    ):
+        return ID_SEPARATOR.join("" if entity_id is MISSING else entity_id for entity_id in ids)
+    return ids
+
+def _unpack_ids(ids: Any) -> Tuple[Any, ...]:
+    if isinstance(ids, str):
+        return tuple(entity_id or MISSING for entity_id in ids.split(ID_SEPARATOR))
+    return ids
+
+class NodeRef(CompactRecord):
+    """
+    One path's node without its IDs: learner state on top of a (possibly
+    shared) body. Nodes with the same state and body share a NodeRef too.
+    The path keeps the IDs: id_count of them per node, the node, quiz,
+    exercise_count exercise and then question IDs, in that order.
+    """
+    FIELDS = ("id_count", "exercise_count", "status", "prerequisites", "body")
+    __slots__ = FIELDS + ("__weakref__",)
+
+    def canonical(self) -> bytes:
+        # The body is pooled already, so it is keyed by identity rather than content
+        return dumps([id(self.body), self.id_count, self.exercise_count, self.status, self.prerequisites],
+                     default=_encode)
+
+class PathNode(CompactRecord):
+    """A NodeRef with its IDs put back, built when a path is converted or projected"""
+    FIELDS = ("ids", "ref")
+    __slots__ = FIELDS
+
+    @property
+    def id(self) -> Any:
+        return self.ids[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _copy_value(self._fields())
+
+    def _fields(self) -> Dict[str, Any]:
+        # The node as a whole: body fields with the IDs and learner state put back
+        ref, ids = self.ref, self.ids
+        node_id, quiz_id = ids[0], ids[1]
+        exercise_ids = ids[2:2 + ref.exercise_count]
+        question_ids = ids[2 + ref.exercise_count:]
+        data = {} if node_id is MISSING else {"id": node_id}
+        data.update(ref.body._fields())
+        if ref.status is not MISSING:
+            data["status"] = ref.status
+        if ref.prerequisites is not MISSING:
+            data["prerequisites"] = ref.prerequisites
+
+        exercises = data.get("exercises")
+        if exercise_ids and isinstance(exercises, tuple):
+            data["exercises"] = [
+                _with_id(_record_fields(item), entity_id) for item, entity_id in zip(exercises, exercise_ids)
+            ]
+
+        quiz = data.get("quiz")
+        if isinstance(quiz, CompactRecord):
+            quiz = _with_id(quiz._fields(), quiz_id)
+            questions = quiz.get("questions")
+            if question_ids and isinstance(questions, tuple):
+                quiz["questions"] = [
+                    _with_id(_record_fields(item), entity_id) for item, entity_id in zip(questions, question_ids)
+                ]
+            data["quiz"] = quiz
+        return data
+
+    def get_field(self, name: str) -> Any:
+        if name == "id":
+            return self.ids[0]
+        if name in NODE_OVERLAY_KEYS:
+            return getattr(self.ref, name)
+        if name in ("exercises", "quiz"):
+            # With the IDs put back, copied like to_dict
+            return _copy_value(self._fields().get(name, MISSING))
+        return self.ref.body.get_field(name)
+
+def _record_fields(item: Any) -> Any:
+    return item._fields() if isinstance(item, CompactRecord) else item
+
+def _with_id(item: Any, entity_id: Any) -> Any:
+    if entity_id is MISSING or not isinstance(item, dict):
+        return item
+    return {"id": entity_id, **item}
+
+def _split_ids(items: Any) -> Tuple[Tuple[Any, ...], Any]:
+    """Separate the IDs of a list of entities from their content"""
+    if not isinstance(items, list):
+        return (), items
+    ids = tuple(item.get("id", MISSING) if isinstance(item, dict) else MISSING for item in items)
+    bodies = [
+        {key: value for key, value in item.items() if key != "id"} if isinstance(item, dict) else item
+        for item in items
+    ]
+    return ids, bodies
+
+def _node_ref(
+    node: Dict[str, Any], pool: Optional[ContentPool], strings: Dict[str, str]
+) -> Tuple[NodeRef, Tuple[Any, ...]]:
+    """The NodeRef of a node and its IDs"""
+    ref = NodeRef.__new__(NodeRef)
+    ref.extra = None
+    ref.status = intern_value(node.get("status", MISSING))
+    ref.prerequisites = intern_value(node.get("prerequisites", MISSING), strings)
+
+    body = {key: value for key, value in node.items() if key not in NODE_OVERLAY_KEYS}
+    exercise_ids, exercises = _split_ids(body.get("exercises"))
+    if "exercises" in body:
+        body["exercises"] = exercises
+
+    quiz_id, question_ids = MISSING, ()
+    quiz = body.get("quiz")
+    if isinstance(quiz, dict):
+        quiz_id = quiz.get("id", MISSING)
+        quiz = {key: value for key, value in quiz.items() if key != "id"}
+        question_ids, questions = _split_ids(quiz.get("questions"))
+        if "questions" in quiz:
+            quiz["questions"] = questions
+        body["quiz"] = quiz
+    ids = (node.get("id", MISSING), quiz_id) + exercise_ids + question_ids
+    ref.id_count = len(ids)
+    ref.exercise_count = len(exercise_ids)
+
+    compact = CompactNode.from_dict(body, strings)
+    if pool is not None:
+        shared = pool.share(compact)
+        if shared is compact:
+            # A new node body: share its exercises and quiz on their own, so nodes
+            # that differ only in their text still reuse identical ones
+            if isinstance(compact.exercises, tuple):
+                compact.exercises = tuple(
+                    pool.share(item) if isinstance(item, CompactExercise) else item for item in compact.exercises
+                )
+            if isinstance(compact.quiz, CompactQuiz):
+                compact.quiz = pool.share(compact.quiz)
+        compact = shared
+    ref.body = compact
+    if pool is not None:
+        ref = pool.share(ref, ref.canonical())
+    return ref, ids
+
+def compact_learning_path(data: Dict[str, Any], pool: Optional[ContentPool] = None) -> CompactLearningPath:
+    """
+    Build the compact form of a path. Nodes become NodeRefs whose bodies
+    (node, exercise and quiz content without IDs) are shared through the pool,
+    and so are the refs themselves and the path's title, description and
+    metadata; the path keeps the IDs, packed into node_ids.
+    """
+    strings: Dict[str, str] = {}
+    path = CompactLearningPath.from_dict({key: value for key, value in data.items() if key != "nodes"}, strings)
+    if pool is not None:
+        content = {name: data[name] for name in PathContent.FIELDS if name in data}
+        path.content = pool.share(PathContent.from_dict(content, strings))
+        for name in PathContent.FIELDS:
+            setattr(path, name, MISSING)
+    nodes = data.get("nodes", MISSING)
+    if isinstance(nodes, list):
+        refs, ids = [], []
+        for node in nodes:
+            if isinstance(node, dict):
+                ref, node_ids = _node_ref(node, pool, strings)
+                refs.append(ref)
+                ids.extend(node_ids)
+            else:
+                refs.append(intern_value(node, strings))
+        nodes = tuple(refs)
+        path.node_ids = _pack_ids(tuple(ids))
+    elif nodes is not MISSING:
+        nodes = intern_value(nodes, strings)
+    path.nodes = nodes
+    return path
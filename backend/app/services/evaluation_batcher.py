@@ -0,0 +1,111 @@
+# backend/app/services/evaluation_batcher.py
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Set
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Evaluates a batch of items; one result per item, or the exception for that item
+BatchEvaluator = Callable[[List[Any]], Awaitable[List[Any]]]
+
+@dataclass
+class PendingBatch:
+    """Items collected for one key that haven't been sent yet"""
+    items: List[Any] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+class EvaluationBatcher:
+    """
+    Micro-batching in front of the model for evaluations.
+
+    The first evaluation for a key (the same exercise and kind of review)
+    opens a batch; evaluations for that key arriving within the window,
+    up to the maximum batch size, join it. The whole batch then goes to
+    the evaluator in one call and each waiter gets its own result back.
+    During a deadline rush this turns many requests repeating the same
+    exercise context into a few that share it.
+    """
+
+    def __init__(self, window_seconds: float = 0.5, max_batch_size: int = 8):
+        """
+        Args:
+            window_seconds: how long a batch stays open for more submissions
+            max_batch_size: a batch is sent as soon as it has this many (1 disables batching)
+        """
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.pending: Dict[Hashable, PendingBatch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        metrics.register_collector("evaluation_batcher", self.get_stats)
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0 and self.max_batch_size > 1
+
+    async def submit(self, key: Hashable, item: Any, evaluate: BatchEvaluator) -> Any:
+        """Evaluate `item`, batched with others for the same key"""
+        if not self.enabled:
+            return self._unwrap((await evaluate([item]))[0])
+
+        batch = self.pending.get(key)
+        if batch is None:
+            batch = self.pending[key] = PendingBatch()
+            task = asyncio.create_task(self._send(key, batch, evaluate))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        future = asyncio.get_running_loop().create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_batch_size:
+            # Later submissions start a new batch
+            self.pending.pop(key, None)
+            batch.full.set()
+        return self._unwrap(await future)
+
+    async def _send(self, key: Hashable, batch: PendingBatch, evaluate: BatchEvaluator) -> None:
+        try:
+            await asyncio.wait_for(batch.full.wait(), self.window_seconds)
+        except asyncio.TimeoutError:
+            pass
+        if self.pending.get(key) is batch:
+            del self.pending[key]
+
+        metrics.inc("evaluation_batches")
+        metrics.inc("evaluation_batched_items", len(batch.items))
+        metrics.observe("evaluation_batch_size", len(batch.items))
+        try:
+            results = await evaluate(batch.items)
+        except Exception as e:
+            logger.error(f"Error evaluating batch of {len(batch.items)}: {str(e)}")
+            results = [e] * len(batch.items)
+        for future, result in zip(batch.futures, results):
+            # A waiter that went away (client disconnected) has a cancelled future
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _unwrap(result: Any) -> Any:
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Batching statistics for the metrics endpoint"""
+        batches = metrics.get("evaluation_batches")
+        return {
+            "enabled": self.enabled,
+            "batches": batches,
+            "mean_batch_size": round(metrics.get("evaluation_batched_items") / batches, 2) if batches else 0.0,
+            "open_batches": len(self.pending),
+        }
+
+evaluation_batcher = EvaluationBatcher(
+    window_seconds=settings.EVALUATION_BATCH_WINDOW_SECONDS,
+    max_batch_size=settings.EVALUATION_BATCH_MAX_SIZE,
+)
@@ -1,8 +1,12 @@
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from datetime import datetime
 from app.schemas.exercise import ExerciseSubmission, ExerciseResult, ExerciseResponse
-from app.core.exceptions import NotFoundException, BadRequestException
+from app.core.config import settings
+from app.core.exceptions import CustomException, NotFoundException, BadRequestException
+from app.services.code_runner import code_runner, is_reproducible
+from app.services.submission_cache import submission_cache, submission_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -19,54 +23,75 @@ class ExerciseService:
             logger.error(f"Error getting exercise {exercise_id}: {str(e)}")
             raise NotFoundException(f"Exercise {exercise_id} not found")
     
-    def submit_exercise(self, exercise_id: str, submission: ExerciseSubmission) -> ExerciseResult:
+    async def submit_exercise(self, exercise: Dict[str, Any], submission: ExerciseSubmission) -> ExerciseResult:
         """Submit and evaluate exercise"""
+        exercise_id = exercise.get("id", submission.exercise_id)
         try:
-            # Get exercise data
-            exercise = self._get_mock_exercise_data(exercise_id)
-            
-            # Run tests (mock evaluation)
-            test_results = self._run_tests(exercise, submission.solution)
-            
-            # Check if all tests passed
-            passed = all(test["passed"] for test in test_results)
-            
-            # Calculate points
-            points_earned = exercise["points"] if passed else 0
-            
-            # Generate feedback
-            feedback = self._generate_feedback(test_results, passed)
-            
-            return ExerciseResult(
-                exercise_id=exercise_id,
-                passed=passed,
-                test_results=test_results,
-                feedback=feedback,
-                points_earned=points_earned,
-                submitted_at=datetime.utcnow()
+            # Run the exercise's test cases against the submission in the sandbox
+            result = await self._run_cached(
+                exercise, submission.solution, submission.language or "python", submission.max_failures
             )
+            return self._build_result(exercise, submission, result["test_results"])
             
+        except CustomException:
+            raise
         except Exception as e:
             logger.error(f"Error submitting exercise {exercise_id}: {str(e)}")
             raise BadRequestException(f"Failed to submit exercise: {str(e)}")
     
-    def run_tests(self, exercise_id: str, code: str, language: str = "python") -> Dict[str, Any]:
+    def stream_submission(
+        self,
+        exercise: Dict[str, Any],
+        submission: ExerciseSubmission
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Submit and evaluate exercise, streaming ("test", result) per test as
+        it finishes and then ("result", ExerciseResult)
+        """
+        code_runner.check_language(submission.language)
+        return self._stream_submission(exercise, submission)
+    
+    async def run_tests(
+        self,
+        exercise: Dict[str, Any],
+        code: str,
+        language: str = "python",
+        max_failures: Optional[int] = None
+    ) -> Dict[str, Any]:
         """Run tests on submitted code"""
         try:
-            exercise = self._get_mock_exercise_data(exercise_id)
-            test_results = self._run_tests(exercise, code)
-            
-            return {
-                "test_results": test_results,
-                "all_passed": all(test["passed"] for test in test_results),
-                "passed_count": sum(1 for test in test_results if test["passed"]),
-                "total_count": len(test_results)
-            }
-            
+            return await self._run_cached(exercise, code, language, max_failures)
+        except CustomException:
+            raise
         except Exception as e:
             logger.error(f"Error running tests: {str(e)}")
             raise BadRequestException(f"Failed to run tests: {str(e)}")
     
+    async def run_tests_for_review(
+        self,
+        exercise: Dict[str, Any],
+        code: str,
+        language: Optional[str] = "python"
+    ) -> Optional[Dict[str, Any]]:
+        """Test results to base an AI review on, or None when the exercise's tests can't be run"""
+        if not exercise.get("test_cases") or not code_runner.supports(language):
+            return None
+        return await self._run_cached(exercise, code, (language or "python").lower(), None)
+    
+    def stream_tests(
+        self,
+        exercise: Dict[str, Any],
+        code: str,
+        language: str = "python",
+        max_failures: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Run tests on submitted code, streaming ("compile", build info) for
+        compiled languages, ("test", result) per test and then ("summary", totals)
+        """
+        code_runner.check_language(language)
+        return self._stream_tests(exercise, code, language, max_failures)
+    
     def get_hints(self, exercise_id: str, level: int = 1) -> List[str]:
         """Get hints for exercise"""
         exercise = self._get_mock_exercise_data(exercise_id)
@@ -78,34 +103,108 @@ class ExerciseService:
         # In production, save to database
         logger.info(f"Saving progress for exercise {exercise_id}, user {user_id}")
     
-    def _run_tests(self, exercise: Dict[str, Any], code: str) -> List[Dict[str, Any]]:
-        """Run test cases on submitted code"""
-        # Mock test execution
-        # In production, use a sandboxed code execution environment
-        test_cases = exercise.get("test_cases", [])
+    def _tests_key(self, exercise: Dict[str, Any], code: str, language: str, max_failures: Optional[int]) -> str:
+        """Cache key for a test run: the submission fingerprint and the early-stop setting"""
+        if max_failures is None:
+            max_failures = settings.CODE_RUNNER_MAX_FAILURES
+        return f"{submission_fingerprint(exercise, code, language)}:{max_failures}"
+    
+    async def _run_cached(
+        self,
+        exercise: Dict[str, Any],
+        code: str,
+        language: str,
+        max_failures: Optional[int]
+    ) -> Dict[str, Any]:
+        """Test results for a submission, reused for unchanged (or only reformatted) code"""
+        run, cached = await submission_cache.get_or_compute(
+            "tests",
+            self._tests_key(exercise, code, language, max_failures),
+            lambda: code_runner.run_tests(code, exercise.get("test_cases") or [], language, max_failures),
+            cacheable=is_reproducible
+        )
+        return {**run, "cached": cached}
+    
+    async def _stream_tests(
+        self,
+        exercise: Dict[str, Any],
+        code: str,
+        language: str,
+        max_failures: Optional[int]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        key = self._tests_key(exercise, code, language, max_failures)
+        run = submission_cache.get("tests", key)
+        if run is not None:
+            if run.get("compile") is not None:
+                yield "compile", run["compile"]
+            for result in run["test_results"]:
+                yield "test", result
+            yield "summary", {**run, "cached": True}
+            return
+        
+        started = time.perf_counter()
+        build = await code_runner.build(code, language)
+        compile_info = code_runner.compile_info(build)
+        if compile_info is not None:
+            yield "compile", compile_info
         results = []
+        async for result in code_runner.stream_tests(
+            code, exercise.get("test_cases") or [], language, max_failures, build
+        ):
+            results.append(result)
+            yield "test", result
+        results.sort(key=lambda result: result["index"])
+        run = code_runner.summarize(results, time.perf_counter() - started, build)
+        if is_reproducible(run):
+            submission_cache.set("tests", key, run)
+        yield "summary", {**run, "cached": False}
+    
+    async def _stream_submission(
+        self,
+        exercise: Dict[str, Any],
+        submission: ExerciseSubmission
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        async for event, data in self._stream_tests(
+            exercise, submission.solution, submission.language or "python", submission.max_failures
+        ):
+            if event == "summary":
+                yield "result", self._build_result(exercise, submission, data["test_results"])
+            else:
+                yield event, data
+    
+    def _build_result(
+        self,
+        exercise: Dict[str, Any],
+        submission: ExerciseSubmission,
+        test_results: List[Dict[str, Any]]
+    ) -> ExerciseResult:
+        """Grade a submission from its test results"""
+        # Check if all tests passed
+        passed = bool(test_results) and all(test["passed"] for test in test_results)
         
-        for i, test in enumerate(test_cases):
-            # Mock test result
-            passed = len(code) > 50  # Simple mock condition
-            results.append({
-                "name": f"Test {i + 1}",
-                "input": test.get("input"),
-                "expected": test.get("expected_output"),
-                "actual": test.get("expected_output") if passed else "Error",
-                "passed": passed,
-                "error": None if passed else "Output mismatch"
-            })
+        # Calculate points
+        points_earned = exercise.get("points", 100) if passed else 0
         
-        return results
+        return ExerciseResult(
+            exercise_id=exercise.get("id", submission.exercise_id),
+            passed=passed,
+            test_results=test_results,
+            feedback=self._generate_feedback(test_results, passed),
+            points_earned=points_earned,
+            submitted_at=datetime.utcnow()
+        )
     
     def _generate_feedback(self, test_results: List[Dict[str, Any]], passed: bool) -> str:
         """Generate feedback based on test results"""
         if passed:
             return "Excellent work! All tests passed. You've mastered this concept!"
         else:
-            failed_count = sum(1 for test in test_results if not test["passed"])
-            return f"{failed_count} test(s) failed. Review your solution and try again."
+            failed_count = sum(1 for test in test_results if not test["passed"] and not test.get("skipped"))
+            skipped_count = sum(1 for test in test_results if test.get("skipped"))
+            feedback = f"{failed_count} test(s) failed."
+            if skipped_count:
+                feedback += f" {skipped_count} more were skipped."
+            return feedback + " Review your solution and try again."
     
     def _get_mock_exercise(self, exercise_id: str) -> ExerciseResponse:
         """Get mock exercise for testing"""
@@ -147,4 +246,6 @@ class ExerciseService:
                 "Consider edge cases",
                 "Review the documentation for best practices"
             ]
-        }
\ No newline at end of file
+        }
+
+exercise_service = ExerciseService()
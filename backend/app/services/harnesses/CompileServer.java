@@ -0,0 +1,72 @@
+// Warm Java compiler: java -cp HARNESS CompileServer
+//
+// Reads one {"source": path, "out": dir} per line and answers
+// {"ok": bool, "output": diagnostics}. One JVM keeps javac loaded and
+// JIT-compiled, so builds don't pay for its startup.
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.nio.charset.StandardCharsets;
+import java.util.HashMap;
+import java.util.Map;
+import java.util.regex.Matcher;
+import java.util.regex.Pattern;
+import javax.tools.JavaCompiler;
+import javax.tools.ToolProvider;
+
+public class CompileServer {
+    private static final Pattern FIELD = Pattern.compile("\"(\\w+)\"\\s*:\\s*\"((?:\\\\.|[^\"\\\\])*)\"");
+
+    public static void main(String[] args) throws IOException {
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        PrintStream out = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        out.println("{\"ready\": true}");
+
+        String line;
+        while ((line = in.readLine()) != null) {
+            Map<String, String> request = parse(line);
+            ByteArrayOutputStream diagnostics = new ByteArrayOutputStream();
+            boolean ok;
+            try {
+                new File(request.get("out")).mkdirs();
+                ok = compiler.run(null, diagnostics, diagnostics,
+                    "-proc:none", "-encoding", "UTF-8", "-nowarn",
+                    "-d", request.get("out"), request.get("source")) == 0;
+            } catch (RuntimeException e) {
+                ok = false;
+                diagnostics.write(String.valueOf(e).getBytes(StandardCharsets.UTF_8));
+            }
+            String output = ok ? "" : diagnostics.toString("UTF-8");
+            out.println("{\"ok\": " + ok + ", \"output\": " + quote(output) + "}");
+        }
+    }
+
+    private static Map<String, String> parse(String json) {
+        Map<String, String> fields = new HashMap<>();
+        Matcher matcher = FIELD.matcher(json);
+        while (matcher.find()) {
+            fields.put(matcher.group(1), matcher.group(2).replaceAll("\\\\(.)", "$1"));
+        }
+        return fields;
+    }
+
+    private static String quote(String text) {
+        StringBuilder quoted = new StringBuilder("\"");
+        for (char c : text.toCharArray()) {
+            if (c == '"' || c == '\\') {
+                quoted.append('\\').append(c);
+            } else if (c < 0x20) {
+                quoted.append(String.format("\\u%04x", (int) c));
+            } else {
+                quoted.append(c);
+            }
+        }
+        return quoted.append('"').toString();
+    }
+}
@@ -0,0 +1,56 @@
+// Calls one function from a learner's JavaScript file: node function_harness.js SOLUTION
+//
+// Reads {"function": name, "args": [...]} on stdin and writes {"value": ...}
+// or {"error": "..."} as the last line of stdout. The learner's own console
+// output is discarded, as it is for Python function tests.
+"use strict";
+const fs = require("fs");
+
+const write = process.stdout.write.bind(process.stdout);
+const report = (message) => write("\n" + JSON.stringify(message) + "\n");
+
+function describe(error) {
+  return error instanceof Error ? `${error.name}: ${error.message}` : `Uncaught ${String(error)}`;
+}
+
+async function main() {
+  const test = JSON.parse(fs.readFileSync(0, "utf8"));
+  const name = String(test.function);
+  if (!/^[A-Za-z_$][\w$]*$/.test(name)) {
+    throw new Error(`invalid function name ${JSON.stringify(name)}`);
+  }
+  const source = fs.readFileSync(process.argv[2], "utf8");
+
+  const silent = () => {};
+  console.log = console.info = console.warn = console.error = console.debug = silent;
+  process.stdout.write = () => true;
+
+  // Declarations (function f, const f = ...) and CommonJS exports both count
+  const module = { exports: {} };
+  const load = new Function(
+    "module", "exports", "require",
+    `${source}\n;return typeof ${name} === "function" ? ${name} : undefined;`
+  );
+  let target = load(module, module.exports, require);
+  if (target === undefined && module.exports) {
+    target = module.exports[name];
+  }
+  if (typeof target !== "function") {
+    throw new ReferenceError(`function ${name} is not defined`);
+  }
+
+  const args = test.args === undefined ? [] : test.args;
+  let value = Array.isArray(args) ? target(...args) : target(args);
+  if (value && typeof value.then === "function") {
+    value = await value;
+  }
+  report({ value: value === undefined ? null : value });
+}
+
+main().then(
+  () => process.exit(0),
+  (error) => {
+    report({ error: describe(error) });
+    process.exit(0);
+  }
+);
@@ -0,0 +1,52 @@
+// Warm TypeScript compiler: node transpile_server.js TYPESCRIPT_LIB
+//
+// Reads one {"source": path, "out": dir} per line and answers
+// {"ok": bool, "output": diagnostics}. Types are stripped without being
+// checked, as bundlers do; syntax errors fail the build.
+"use strict";
+const fs = require("fs");
+const path = require("path");
+const readline = require("readline");
+const ts = require(process.argv[2]);
+
+const compilerOptions = {
+  target: ts.ScriptTarget.ES2020,
+  module: ts.ModuleKind.CommonJS,
+  esModuleInterop: true,
+};
+
+function format(diagnostic, fileName) {
+  const message = ts.flattenDiagnosticMessageText(diagnostic.messageText, "\n");
+  if (diagnostic.file && diagnostic.start !== undefined) {
+    const { line, character } = diagnostic.file.getLineAndCharacterOfPosition(diagnostic.start);
+    return `${fileName}(${line + 1},${character + 1}): error TS${diagnostic.code}: ${message}`;
+  }
+  return `error TS${diagnostic.code}: ${message}`;
+}
+
+function compile(request) {
+  const fileName = path.basename(request.source);
+  const result = ts.transpileModule(fs.readFileSync(request.source, "utf8"), {
+    compilerOptions,
+    fileName,
+    reportDiagnostics: true,
+  });
+  const diagnostics = (result.diagnostics || []).map((diagnostic) => format(diagnostic, fileName));
+  if (diagnostics.length) {
+    return { ok: false, output: diagnostics.join("\n") };
+  }
+  fs.mkdirSync(request.out, { recursive: true });
+  fs.writeFileSync(path.join(request.out, fileName.replace(/\.ts$/, ".js")), result.outputText);
+  return { ok: true, output: "" };
+}
+
+readline.createInterface({ input: process.stdin }).on("line", (line) => {
+  let response;
+  try {
+    response = compile(JSON.parse(line));
+  } catch (error) {
+    response = { ok: false, output: String((error && error.message) || error) };
+  }
+  process.stdout.write(JSON.stringify(response) + "\n");
+});
+process.stdout.write(JSON.stringify({ ready: true }) + "\n");
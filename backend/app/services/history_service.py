@@ -0,0 +1,262 @@
+# backend/app/services/history_service.py
+import bisect
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import func, or_, select
+
+from app.core.database import get_session_factory
+from app.core.pagination import CursorKey, decode_cursor, encode_cursor, page_before
+from app.models.exercise import ExerciseSubmission
+from app.models.learning_path import LearningPath
+from app.models.quiz import QuizAttempt
+from app.schemas.response import PaginatedResponse
+
+logger = logging.getLogger(__name__)
+
+def _time_key(row) -> CursorKey:
+    return row.created_at, row.id
+
+class HistoryService:
+    """
+    Time-ordered history of generated paths, quiz attempts and exercise
+    submissions, listed newest first with keyset (cursor) pagination.
+
+    Pages are addressed by the (created_at, id) of the last row seen rather
+    than an offset, so they are served from the (owner, created_at) indexes
+    and a deep page costs the same as the first. Totals are only counted
+    when asked for.
+    """
+
+    def __init__(self):
+        """Initialize the service"""
+        # In-memory stores used when no database is configured, each list sorted by (created_at, id)
+        self.paths_by_user: Dict[str, List[LearningPath]] = {}
+        self.attempts_by_quiz: Dict[str, List[QuizAttempt]] = {}
+        self.submissions_by_exercise: Dict[str, List[ExerciseSubmission]] = {}
+
+    async def record_path(self, user_id: str, learning_path: Dict[str, Any]) -> None:
+        """Record a generated path under the user it was generated for"""
+        now = datetime.utcnow()
+        row = LearningPath(
+            id=learning_path["id"],
+            user_id=user_id,
+            title=learning_path.get("title", ""),
+            description=learning_path.get("description"),
+            total_duration_hours=learning_path.get("total_duration_hours"),
+            difficulty_level=learning_path.get("difficulty_level"),
+            certification_target=learning_path.get("certification_target"),
+            created_at=now,
+            updated_at=now,
+        )
+        await self._add(row, self.paths_by_user.setdefault(user_id, []))
+
+    async def record_quiz_attempt(
+        self,
+        user_id: str,
+        quiz_id: str,
+        score: float,
+        passed: bool,
+        answers: Dict[str, Any],
+        time_taken_minutes: int
+    ) -> None:
+        """Record a graded quiz attempt"""
+        now = datetime.utcnow()
+        row = QuizAttempt(
+            id=str(uuid4()),
+            quiz_id=quiz_id,
+            user_id=user_id,
+            score=round(score),
+            passed=passed,
+            answers=answers,
+            time_taken_minutes=time_taken_minutes,
+            attempt_number=await self._count_user_attempts(user_id, quiz_id) + 1,
+            created_at=now,
+            updated_at=now,
+        )
+        await self._add(row, self.attempts_by_quiz.setdefault(quiz_id, []))
+
+    async def record_submission(
+        self,
+        user_id: str,
+        exercise_id: str,
+        solution: str,
+        language: Optional[str],
+        time_taken_minutes: int,
+        result: Dict[str, Any]
+    ) -> None:
+        """Record an evaluated exercise submission"""
+        now = datetime.utcnow()
+        row = ExerciseSubmission(
+            id=str(uuid4()),
+            exercise_id=exercise_id,
+            user_id=user_id,
+            solution=solution,
+            language=language,
+            passed=result.get("passed", False),
+            test_results=result.get("test_results"),
+            points_earned=result.get("points_earned", 0),
+            time_taken_minutes=time_taken_minutes,
+            feedback=result.get("feedback"),
+            created_at=now,
+            updated_at=now,
+        )
+        await self._add(row, self.submissions_by_exercise.setdefault(exercise_id, []))
+
+    async def list_paths(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        include_total: bool = False
+    ) -> PaginatedResponse:
+        """A user's paths, newest first"""
+        return await self._list(
+            LearningPath, LearningPath.user_id, user_id, self.paths_by_user,
+            cursor, limit, include_total, self._path_to_dict,
+        )
+
+    async def list_quiz_attempts(
+        self,
+        quiz_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        include_total: bool = False
+    ) -> PaginatedResponse:
+        """Attempts on a quiz, newest first"""
+        return await self._list(
+            QuizAttempt, QuizAttempt.quiz_id, quiz_id, self.attempts_by_quiz,
+            cursor, limit, include_total, self._attempt_to_dict,
+        )
+
+    async def list_submissions(
+        self,
+        exercise_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        include_total: bool = False
+    ) -> PaginatedResponse:
+        """Submissions for an exercise, newest first"""
+        return await self._list(
+            ExerciseSubmission, ExerciseSubmission.exercise_id, exercise_id, self.submissions_by_exercise,
+            cursor, limit, include_total, self._submission_to_dict,
+        )
+
+    async def _add(self, row, memory: List[Any]) -> None:
+        session_factory = get_session_factory()
+        if session_factory is None:
+            bisect.insort(memory, row, key=_time_key)
+            return
+
+        try:
+            async with session_factory() as db:
+                async with db.begin():
+                    db.add(row)
+        except Exception as e:
+            # History is a record of the request, not part of it; don't fail the caller
+            logger.error(f"Error recording {type(row).__name__}: {str(e)}")
+
+    async def _list(
+        self,
+        model,
+        owner_column,
+        owner_id: str,
+        memory: Dict[str, List[Any]],
+        cursor: Optional[str],
+        limit: int,
+        include_total: bool,
+        to_dict: Callable[[Any], Dict[str, Any]]
+    ) -> PaginatedResponse:
+        before = decode_cursor(cursor)
+        total = None
+
+        session_factory = get_session_factory()
+        if session_factory is None:
+            rows = memory.get(owner_id, [])
+            page, has_more = page_before(rows, _time_key, before, limit)
+            if include_total:
+                total = len(rows)
+        else:
+            query = select(model).where(owner_column == owner_id)
+            if before is not None:
+                created_at, record_id = before
+                # The first condition alone is a range on the (owner, created_at) index
+                query = query.where(
+                    model.created_at <= created_at,
+                    or_(model.created_at < created_at, model.id < record_id),
+                )
+            query = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+            async with session_factory() as db:
+                page = list((await db.execute(query)).scalars())
+                if include_total:
+                    total = await db.scalar(
+                        select(func.count()).select_from(model).where(owner_column == owner_id)
+                    )
+            has_more = len(page) > limit
+            page = page[:limit]
+
+        next_cursor = encode_cursor(*_time_key(page[-1])) if has_more else None
+        return PaginatedResponse(
+            items=[to_dict(row) for row in page],
+            limit=limit,
+            next_cursor=next_cursor,
+            total=total,
+        )
+
+    async def _count_user_attempts(self, user_id: str, quiz_id: str) -> int:
+        session_factory = get_session_factory()
+        if session_factory is None:
+            return sum(1 for row in self.attempts_by_quiz.get(quiz_id, []) if row.user_id == user_id)
+
+        async with session_factory() as db:
+            return await db.scalar(
+                select(func.count()).select_from(QuizAttempt).where(
+                    QuizAttempt.user_id == user_id, QuizAttempt.quiz_id == quiz_id
+                )
+            ) or 0
+
+    @staticmethod
+    def _path_to_dict(row: LearningPath) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "title": row.title,
+            "description": row.description,
+            "total_duration_hours": row.total_duration_hours,
+            "difficulty_level": row.difficulty_level,
+            "certification_target": row.certification_target,
+            "created_at": row.created_at.isoformat(),
+        }
+
+    @staticmethod
+    def _attempt_to_dict(row: QuizAttempt) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "quiz_id": row.quiz_id,
+            "user_id": row.user_id,
+            "attempt_number": row.attempt_number,
+            "score": row.score,
+            "passed": row.passed,
+            "answers": row.answers,
+            "time_taken_minutes": row.time_taken_minutes,
+            "created_at": row.created_at.isoformat(),
+        }
+
+    @staticmethod
+    def _submission_to_dict(row: ExerciseSubmission) -> Dict[str, Any]:
+        # The solution itself is left out of listings; it can be large
+        return {
+            "id": row.id,
+            "exercise_id": row.exercise_id,
+            "user_id": row.user_id,
+            "language": row.language,
+            "passed": row.passed,
+            "points_earned": row.points_earned,
+            "time_taken_minutes": row.time_taken_minutes,
+            "feedback": row.feedback,
+            "created_at": row.created_at.isoformat(),
+        }
+
+history_service = HistoryService()
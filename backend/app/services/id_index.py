@@ -0,0 +1,148 @@
+# backend/app/services/id_index.py
+import itertools
+import logging
+import uuid
+from typing import Dict, Any, Iterator, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Entity kind -> ID prefix used for generated IDs
+ID_PREFIXES = {
+    "node": "node_",
+    "exercise": "ex_",
+    "quiz": "quiz_",
+    "question": "q_",
+}
+
+class IndexEntry(NamedTuple):
+    """Where an entity lives inside a stored learning path"""
+    kind: str  # node, exercise, quiz, question
+    path_id: str
+    node_index: int
+    item_index: Optional[int] = None  # exercise / question position within the node
+
+class IdIndex:
+    """
+    Global index from node, exercise, quiz and question IDs to their owning
+    path and position, so any generated entity is found in constant time.
+
+    After a restart, IDs of paths not indexed yet are looked up in the
+    previous run's snapshot instead of reindexing every path up front.
+    """
+
+    def __init__(self):
+        """Initialize the index"""
+        self.entries: Dict[str, IndexEntry] = {}
+        self.path_ids: Dict[str, list] = {}  # path_id -> IDs indexed for that path
+        self.snapshot = None
+        # Paths (re)indexed or removed in this process; their snapshot entries are stale
+        self._masked: set = set()
+
+    def index_path(self, learning_path: Dict[str, Any]) -> bool:
+        """
+        (Re)index every entity of a path.
+
+        IDs that are missing, lack their prefix or are already used by another
+        path are replaced with fresh ones in place (the model sometimes echoes
+        placeholder IDs such as "q1" from the prompt), and prerequisites are
+        rewritten to follow renamed nodes. Returns whether any ID was replaced.
+        """
+        path_id = learning_path["id"]
+        self.remove_path(path_id)
+
+        owned = []
+        renamed_nodes: Dict[str, str] = {}
+        replaced = False
+
+        def claim(entity: Dict[str, Any], kind: str, entry: IndexEntry) -> None:
+            nonlocal replaced
+            entity_id = entity.get("id")
+            if (
+                not isinstance(entity_id, str)
+                or not entity_id.startswith(ID_PREFIXES[kind])
+                or entity_id in self.entries
+                or self._snapshot_lookup(entity_id) is not None
+            ):
+                new_id = f"{ID_PREFIXES[kind]}{uuid.uuid4().hex[:8]}"
+                if kind == "node" and isinstance(entity_id, str):
+                    renamed_nodes[entity_id] = new_id
+                entity["id"] = entity_id = new_id
+                replaced = True
+            self.entries[entity_id] = entry
+            owned.append(entity_id)
+
+        for node_index, node in enumerate(learning_path.get("nodes") or []):
+            claim(node, "node", IndexEntry("node", path_id, node_index))
+
+            for exercise_index, exercise in enumerate(node.get("exercises") or []):
+                claim(exercise, "exercise", IndexEntry("exercise", path_id, node_index, exercise_index))
+
+            quiz = node.get("quiz")
+            if quiz:
+                claim(quiz, "quiz", IndexEntry("quiz", path_id, node_index))
+                for question_index, question in enumerate(quiz.get("questions") or []):
+                    claim(question, "question", IndexEntry("question", path_id, node_index, question_index))
+
+        if renamed_nodes:
+            for node in learning_path.get("nodes") or []:
+                if node.get("prerequisites"):
+                    node["prerequisites"] = [renamed_nodes.get(p, p) for p in node["prerequisites"]]
+
+        self.path_ids[path_id] = owned
+        logger.debug(f"Indexed {len(owned)} entities for path {path_id}")
+        return replaced
+
+    def remove_path(self, path_id: str) -> None:
+        """Drop every entry owned by a path"""
+        self._masked.add(path_id)
+        for entity_id in self.path_ids.pop(path_id, []):
+            self.entries.pop(entity_id, None)
+
+    def lookup(self, entity_id: str) -> Optional[IndexEntry]:
+        """Find where an entity lives"""
+        entry = self.entries.get(entity_id)
+        if entry is None:
+            entry = self._snapshot_lookup(entity_id)
+        return entry
+
+    def snapshot_entries(self) -> Iterator[Tuple[str, IndexEntry]]:
+        """
+        Entries to include in the next snapshot: the in-memory index plus the
+        previous snapshot's entries for paths not reindexed since. Safe to
+        consume from a background thread.
+        """
+        entries = list(self.entries.items())
+        if self.snapshot is None:
+            return iter(entries)
+
+        previous = self.snapshot
+        masked = set(self._masked)
+        carried = (
+            (entity_id, entry)
+            for entity_id, entry in previous.iter_ids()
+            if entry.path_id not in masked
+        )
+        return itertools.chain(entries, carried)
+
+    def _snapshot_lookup(self, entity_id: str) -> Optional[IndexEntry]:
+        if self.snapshot is None:
+            return None
+        entry = self.snapshot.lookup_id(entity_id)
+        if entry is None or entry.path_id in self._masked:
+            return None
+        return entry
+
+    @staticmethod
+    def resolve(entry: IndexEntry, learning_path: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fetch the entity an entry points at from its (already loaded) path"""
+        try:
+            node = learning_path["nodes"][entry.node_index]
+            if entry.kind == "node":
+                return node
+            if entry.kind == "exercise":
+                return node["exercises"][entry.item_index]
+            if entry.kind == "quiz":
+                return node["quiz"]
+            return node["quiz"]["questions"][entry.item_index]
+        except (KeyError, IndexError, TypeError):
+            return None
@@ -0,0 +1,435 @@
+# backend/app/services/job_queue.py
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+from app.core.config import settings
+from app.core.exceptions import BadRequestException, CustomException
+from app.core.metrics import metrics
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+class JobStore:
+    """SQLite table of jobs, so payloads, states and results survive restarts"""
+
+    COLUMNS = "id, type, user_id, status, attempts, result, error, created_at, started_at, finished_at"
+
+    def __init__(self, path: str):
+        """Open (or create) the job database"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Several server processes may share the file; wait for each other's writes
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, type TEXT NOT NULL, user_id TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, payload BLOB NOT NULL, result BLOB, error BLOB, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (type, status, created_at)")
+        # Files from before leases existed
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "claimed_by" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN claimed_by TEXT")
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires_at REAL")
+
+    def insert(self, job_id: str, job_type: str, user_id: str, payload: bytes, created_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, type, user_id, status, payload, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, job_type, user_id, payload, created_at),
+            )
+
+    def claim(self, job_type: str, owner: str, started_at: float, lease_until: float) -> Optional[Tuple[str, bytes]]:
+        """Mark the oldest queued job of a type running under `owner`'s lease and return (id, payload)"""
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1, "
+                "claimed_by = ?, lease_expires_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE type = ? AND status = 'queued' ORDER BY created_at LIMIT 1) "
+                "AND status = 'queued' RETURNING id, payload",
+                (started_at, owner, lease_until, job_type),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def renew(self, job_id: str, owner: str, lease_until: float) -> bool:
+        """Extend the lease on a running job; False if `owner` no longer holds it"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND claimed_by = ? AND status = 'running'",
+                (lease_until, job_id, owner),
+            )
+        return cursor.rowcount > 0
+
+    def finish(
+        self,
+        job_id: str,
+        owner: str,
+        status: str,
+        result: Optional[bytes],
+        error: Optional[bytes],
+        finished_at: float
+    ) -> bool:
+        """Store a job's outcome; False (and nothing stored) if `owner` lost the lease meanwhile"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires_at = NULL "
+                "WHERE id = ? AND claimed_by = ? AND status = 'running'",
+                (status, result, error, finished_at, job_id, owner),
+            )
+        return cursor.rowcount > 0
+
+    def release(self, job_id: str, owner: str) -> None:
+        """Put a running job back in the queue without counting the attempt (on shutdown)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, attempts = attempts - 1, "
+                "claimed_by = NULL, lease_expires_at = NULL "
+                "WHERE id = ? AND claimed_by = ? AND status = 'running'",
+                (job_id, owner),
+            )
+
+    def cancel(self, job_id: str, finished_at: float) -> bool:
+        """Cancel a job that hasn't started; False if it already has"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (finished_at, job_id),
+            )
+        return cursor.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(f"SELECT {self.COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def recover(self, max_attempts: int, error: bytes, now: float) -> Tuple[int, int]:
+        """
+        Running jobs whose lease has expired (their process died or hung):
+        queued again, or failed once they have used up their attempts.
+        Jobs other processes are still renewing are left alone. Returns
+        (requeued, failed).
+        """
+        expired = "status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)"
+        with self._lock:
+            failed = self._conn.execute(
+                f"UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, claimed_by = NULL, "
+                f"lease_expires_at = NULL WHERE {expired} AND attempts >= ?",
+                (error, now, now, max_attempts),
+            ).rowcount
+            requeued = self._conn.execute(
+                f"UPDATE jobs SET status = 'queued', started_at = NULL, claimed_by = NULL, "
+                f"lease_expires_at = NULL WHERE {expired}",
+                (now,),
+            ).rowcount
+        return requeued, failed
+
+    def delete_finished(self, before: float) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed', 'cancelled') AND finished_at < ?",
+                (before,),
+            ).rowcount
+
+    def counts(self) -> Dict[Tuple[str, str], int]:
+        """Number of jobs per (type, status)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT type, status, COUNT(*) FROM jobs GROUP BY type, status").fetchall()
+        return {(row[0], row[1]): row[2] for row in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class JobQueue:
+    """
+    Durable background jobs for work that shouldn't hold a request open
+    (LLM generation and evaluation).
+
+    Submitting a job stores it in SQLite and returns its ID immediately;
+    each registered job type has its own number of workers taking jobs
+    from the table in order. States and results are kept there too, so a
+    client can poll or subscribe after a reconnect.
+
+    Several server processes can share the database file: claims are
+    atomic, and a running job is leased to the process running it, which
+    renews the lease until the job finishes. Jobs whose lease expires
+    (their process died) are run again, up to JOB_MAX_ATTEMPTS times, by
+    whichever process notices first; jobs of live processes are left alone.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        result_ttl_seconds: float = 86400,
+        max_attempts: int = 3,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 30.0
+    ):
+        """
+        Args:
+            path: SQLite file for jobs and results; without it jobs are disabled
+            result_ttl_seconds: how long finished jobs (and their results) are kept
+            max_attempts: runs allowed for a job that keeps getting interrupted
+            poll_interval: how often idle workers and watchers check the table for
+                changes made by other processes
+            lease_seconds: how long a running job stays claimed without a renewal;
+                leases are renewed every third of it
+        """
+        self.path = path
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        # Identifies this process's leases in the shared table
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, Handler] = {}
+        self.concurrency: Dict[str, int] = {}
+        self._store: Optional[JobStore] = None
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._changes: Dict[str, asyncio.Event] = {}
+        self._running: Dict[str, int] = {}
+        self._tasks: List[asyncio.Task] = []
+        metrics.register_collector("jobs", self.get_stats)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore(self.path)
+        return self._store
+
+    def register(self, job_type: str, handler: Handler, concurrency: int) -> None:
+        """Run jobs of `job_type` with `handler(payload)`, at most `concurrency` at a time per process"""
+        self.handlers[job_type] = handler
+        self.concurrency[job_type] = max(1, concurrency)
+        self._running[job_type] = 0
+
+    async def start(self) -> None:
+        """Recover interrupted jobs and start the workers"""
+        if not self.enabled or self._tasks:
+            return
+        await self._recover()
+        await asyncio.to_thread(self.store.delete_finished, time.time() - self.result_ttl_seconds)
+
+        for job_type, concurrency in self.concurrency.items():
+            self._wakeups[job_type] = asyncio.Event()
+            for _ in range(concurrency):
+                self._tasks.append(asyncio.create_task(self._work(job_type)))
+        self._tasks.append(asyncio.create_task(self._clean_up_periodically()))
+        self._tasks.append(asyncio.create_task(self._recover_periodically()))
+        logger.info(f"Job queue started ({', '.join(f'{t}={c}' for t, c in self.concurrency.items())})")
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they were running are queued again for the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    async def submit(self, job_type: str, payload: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        """Queue a job and return its view"""
+        if not self.enabled:
+            raise BadRequestException("Background jobs are not enabled on this server")
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type {job_type}")
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(self.store.insert, job_id, job_type, user_id, dumps(payload), time.time())
+        metrics.inc(f"jobs_{job_type}_submitted")
+        wakeup = self._wakeups.get(job_type)
+        if wakeup is not None:
+            wakeup.set()
+        return await self.get(job_id)
+
+    async def get(self, job_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """A job's view, or None if it doesn't exist (or belongs to another user)"""
+        row = await asyncio.to_thread(self.store.get, job_id)
+        if row is None or (user_id is not None and row[2] != user_id):
+            return None
+        return self._view(row)
+
+    async def cancel(self, job_id: str, user_id: Optional[str] = None) -> Optional[bool]:
+        """Cancel a queued job: True if cancelled, False if it already started, None if not found"""
+        if await self.get(job_id, user_id) is None:
+            return None
+        cancelled = await asyncio.to_thread(self.store.cancel, job_id, time.time())
+        if cancelled:
+            self._changed(job_id)
+        return cancelled
+
+    async def watch(self, job_id: str, user_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job's view now and after every status change, until it has finished"""
+        last_status = None
+        while True:
+            change = self._changes.setdefault(job_id, asyncio.Event())
+            change.clear()
+            job = await self.get(job_id, user_id)
+            if job is None:
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield job
+            if last_status in FINISHED:
+                return
+            try:
+                await asyncio.wait_for(change.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _work(self, job_type: str) -> None:
+        wakeup = self._wakeups[job_type]
+        while True:
+            wakeup.clear()
+            try:
+                now = time.time()
+                claimed = await asyncio.to_thread(self.store.claim, job_type, self.owner, now, now + self.lease_seconds)
+            except sqlite3.Error as e:
+                logger.error(f"Error claiming {job_type} job: {str(e)}")
+                claimed = None
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # Another worker may find more work in the meantime
+            wakeup.set()
+            await self._run(job_type, *claimed)
+
+    async def _run(self, job_type: str, job_id: str, payload: bytes) -> None:
+        self._changed(job_id)
+        self._running[job_type] += 1
+        heartbeat = asyncio.create_task(self._renew_lease(job_id))
+        started = time.perf_counter()
+        result, error, status = None, None, "succeeded"
+        try:
+            result = dumps(await self.handlers[job_type](orjson.loads(payload)))
+        except asyncio.CancelledError:
+            # Shutting down: leave the job for the next start
+            await asyncio.shield(asyncio.to_thread(self.store.release, job_id, self.owner))
+            raise
+        except CustomException as e:
+            status, error = "failed", dumps({"detail": e.detail, "status_code": e.status_code})
+        except Exception as e:
+            logger.error(f"Error running {job_type} job {job_id}: {str(e)}")
+            status, error = "failed", dumps({"detail": str(e), "status_code": 500})
+        finally:
+            heartbeat.cancel()
+            self._running[job_type] -= 1
+
+        metrics.inc(f"jobs_{job_type}_{status}")
+        metrics.observe(f"jobs_{job_type}_seconds", time.perf_counter() - started)
+        stored = await asyncio.to_thread(self.store.finish, job_id, self.owner, status, result, error, time.time())
+        if not stored:
+            # The lease expired (e.g. the event loop was blocked) and the job was taken over
+            metrics.inc("jobs_lost_leases")
+            logger.warning(f"Lost the lease on {job_type} job {job_id}; its outcome here was discarded")
+        self._changed(job_id)
+
+    async def _renew_lease(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await asyncio.to_thread(self.store.renew, job_id, self.owner, time.time() + self.lease_seconds)
+            except sqlite3.Error as e:
+                logger.error(f"Error renewing the lease on job {job_id}: {str(e)}")
+                continue
+            if not renewed:
+                return
+
+    async def _recover(self) -> None:
+        error = dumps({"detail": "Interrupted too many times", "status_code": 500})
+        requeued, failed = await asyncio.to_thread(self.store.recover, self.max_attempts, error, time.time())
+        if requeued or failed:
+            logger.info(f"Recovered jobs with expired leases: {requeued} queued again, {failed} failed")
+            for wakeup in self._wakeups.values():
+                wakeup.set()
+
+    async def _recover_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds)
+            try:
+                await self._recover()
+            except sqlite3.Error as e:
+                logger.error(f"Error recovering jobs: {str(e)}")
+
+    def _changed(self, job_id: str) -> None:
+        change = self._changes.pop(job_id, None)
+        if change is not None:
+            change.set()
+
+    async def _clean_up_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.result_ttl_seconds, 600))
+            try:
+                deleted = await asyncio.to_thread(self.store.delete_finished, time.time() - self.result_ttl_seconds)
+                if deleted:
+                    logger.info(f"Deleted {deleted} expired jobs")
+            except sqlite3.Error as e:
+                logger.error(f"Error deleting expired jobs: {str(e)}")
+
+    @staticmethod
+    def _view(row: tuple) -> Dict[str, Any]:
+        job_id, job_type, _, status, attempts, result, error, created_at, started_at, finished_at = row
+        view = {
+            "job_id": job_id,
+            "type": job_type,
+            "status": status,
+            "attempts": attempts,
+            "created_at": datetime.utcfromtimestamp(created_at).isoformat(),
+            "started_at": datetime.utcfromtimestamp(started_at).isoformat() if started_at else None,
+            "finished_at": datetime.utcfromtimestamp(finished_at).isoformat() if finished_at else None,
+        }
+        if result is not None:
+            view["result"] = orjson.loads(result)
+        if error is not None:
+            view["error"] = orjson.loads(error)
+        return view
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue statistics for the metrics endpoint"""
+        if not self.enabled:
+            return {"enabled": False}
+        counts = self.store.counts() if self._tasks else {}
+        stats: Dict[str, Any] = {"enabled": True, "lost_leases": metrics.get("jobs_lost_leases")}
+        for job_type, concurrency in self.concurrency.items():
+            stats[job_type] = {
+                "concurrency": concurrency,
+                "running": self._running[job_type],
+                "queued": counts.get((job_type, "queued"), 0),
+                "succeeded": metrics.get(f"jobs_{job_type}_succeeded"),
+                "failed": metrics.get(f"jobs_{job_type}_failed"),
+            }
+        return stats
+
+job_queue = JobQueue(
+    settings.JOB_QUEUE_PATH,
+    result_ttl_seconds=settings.JOB_RESULT_TTL_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+)
@@ -1,18 +1,52 @@
 # backend/app/services/learning_path_service.py
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, NamedTuple, Optional
 from datetime import datetime
 import json
 
+from app.core.cache import CacheEntry, LRUCache, TwoLevelCache
+from app.core.compression import compressed_variant
+from app.core.config import settings
+from app.core.exceptions import NotFoundException
+from app.core.serialization import dumps
+from app.services.compact_path import Projection, projection_key
+from app.services.id_index import IdIndex
+from app.services.path_store import PathStore
+
 logger = logging.getLogger(__name__)
 
+class EncodedBody(NamedTuple):
+    """A serialized response body"""
+    body: bytes
+    encoding: Optional[str]  # content encoding applied, if any
+    version: Optional[int]  # stored version it was built from; None for mock data
+
 class LearningPathService:
     """Service for managing learning paths"""
     
     def __init__(self):
         """Initialize the service"""
-        # In production, this would connect to a database
-        self.storage = {}
+        # In production, this would connect to a database. For now paths live in
+        # memory up to a budget, with least recently used paths spilled to disk.
+        self.store = PathStore(
+            memory_budget_bytes=settings.PATH_STORE_MEMORY_BUDGET_MB * 1024 * 1024,
+            spill_path=settings.PATH_STORE_SPILL_PATH,
+        )
+        # Node / exercise / quiz / question ID -> owning path and position
+        self.id_index = IdIndex()
+        # Read-through cache in front of the store, shared across workers through Redis
+        self.cache = TwoLevelCache(
+            "learning_path",
+            loader=self.store.get,
+            l1_max_entries=settings.PATH_CACHE_L1_MAX_ENTRIES,
+            redis_url=settings.REDIS_URL,
+            ttl_seconds=settings.REDIS_TTL,
+            on_load=self._index_loaded,
+        )
+        # Serialized field projections per "path_id:version", built from the compact stored form
+        self.projections: LRUCache[CacheEntry] = LRUCache(settings.PATH_CACHE_L1_MAX_ENTRIES)
+        self._tasks: set = set()
     
     async def save_learning_path(self, learning_path: Dict[str, Any]) -> Dict[str, Any]:
         """Save learning path to storage"""
@@ -21,7 +55,10 @@ class LearningPathService:
             # For now, store in memory
             path_id = learning_path.get('id')
             if path_id:
-                self.storage[path_id] = learning_path
+                self.id_index.index_path(learning_path)
+                # A new version invalidates cached copies in every worker
+                entry = await self.cache.put(path_id, learning_path)
+                await self.store.put(path_id, learning_path, entry.version)
                 logger.info(f"Saved learning path: {path_id}")
             
             return learning_path
@@ -30,18 +67,202 @@ class LearningPathService:
             return learning_path
     
     async def get_by_id(self, path_id: str) -> Dict[str, Any]:
-        """Get learning path by ID"""
+        """
+        Get learning path by ID. The dict is shared with the cache: treat it
+        as read-only and store changes with save_learning_path. Raises
+        NotFoundException for unknown paths.
+        """
+        # Read through the cache to storage
+        entry = await self.cache.get(path_id)
+        if entry is None:
+            raise NotFoundException(f"Learning path {path_id} not found")
+        return entry.value
+    
+    async def get_version(self, path_id: str) -> Optional[int]:
+        """Stored version of a path, without loading or serializing it (None if not stored)"""
+        version = self.cache.peek_version(path_id)
+        if version is None:
+            version = await self.store.get_version(path_id)
+        return version
+    
+    async def get_path_json(self, path_id: str, encoding: Optional[str] = None) -> EncodedBody:
+        """
+        Get a learning path as JSON bytes, compressed with the given encoding
+        when it is large enough. Stored paths are serialized and compressed
+        once per version, and the bytes are kept with the cached entry.
+        Raises NotFoundException for unknown paths.
+        """
+        entry = await self.cache.get(path_id)
+        if entry is None:
+            raise NotFoundException(f"Learning path {path_id} not found")
+        return self._derive_json(entry, "json", lambda: entry.value, encoding)
+    
+    def get_mock_path_json(self, encoding: Optional[str] = None) -> EncodedBody:
+        """The mock learning path as JSON bytes, for testing clients"""
+        return EncodedBody(*compressed_variant(dumps(self._get_mock_learning_path("mock")), encoding), None)
+    
+    async def get_path_projection_json(
+        self,
+        path_id: str,
+        spec: Projection,
+        encoding: Optional[str] = None
+    ) -> EncodedBody:
+        """
+        Get only the selected fields of a learning path as JSON bytes. The
+        projection is read straight from the compact stored records, so fields
+        that were not requested (e.g. node bodies) are never materialized.
+        Raises NotFoundException for unknown paths.
+        """
+        # Read through the cache like get_path_json, so paths saved by other workers are found
+        cached = await self.cache.get(path_id)
+        if cached is None:
+            raise NotFoundException(f"Learning path {path_id} not found")
+        
+        loaded = await self.store.get_compact(path_id)
+        if loaded is None or loaded[1] < cached.version:
+            # Came from Redis: keep a compact copy in this worker's store to project from
+            await self.store.put(path_id, cached.value, cached.version)
+            loaded = await self.store.get_compact(path_id)
+        
+        compact, version = loaded
+        entry_key = f"{path_id}:{version}"
+        entry = self.projections.get(entry_key)
+        if entry is None:
+            entry = CacheEntry(None, version)
+            self.projections.set(entry_key, entry)
+        return self._derive_json(entry, f"fields:{projection_key(spec)}", lambda: compact.project(spec), encoding)
+    
+    async def get_node_content_json(
+        self,
+        path_id: str,
+        node_id: str,
+        encoding: Optional[str] = None
+    ) -> Optional[EncodedBody]:
+        """Get the content view of a node like get_path_json, or None if there is no such path or node"""
+        entry = await self.cache.get(path_id)
+        if entry is None:
+            return None
+        
+        index_entry = self.id_index.lookup(node_id)
+        if not index_entry or index_entry.kind != "node" or index_entry.path_id != path_id:
+            return None
+        node = self.id_index.resolve(index_entry, entry.value)
+        if not node:
+            return None
+        return self._derive_json(entry, f"node:{node_id}", lambda: self._node_content(node_id, node), encoding)
+    
+    def _index_loaded(self, path_id: str, entry: CacheEntry) -> None:
+        """Index a path entering this process; IDs replaced while indexing are written back to the store"""
+        if self.id_index.index_path(entry.value):
+            task = asyncio.create_task(self._write_back(path_id, entry))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _write_back(self, path_id: str, entry: CacheEntry) -> None:
+        # Otherwise every reload from the store would replace the IDs again
         try:
-            # In production, fetch from database
-            # For now, return from memory or mock
-            if path_id in self.storage:
-                return self.storage[path_id]
-            
-            # Return mock data if not found
-            return self._get_mock_learning_path(path_id)
+            if await self.store.get_version(path_id) in (None, entry.version):
+                await self.store.put(path_id, entry.value, entry.version)
         except Exception as e:
-            logger.error(f"Error getting learning path {path_id}: {str(e)}")
-            return self._get_mock_learning_path(path_id)
+            logger.error(f"Error storing reindexed learning path {path_id}: {str(e)}")
+    
+    @staticmethod
+    def _derive_json(entry, key: str, view, encoding: Optional[str]) -> EncodedBody:
+        """Serialized (and compressed) bytes of a view of a cached entry, built once per version"""
+        raw = entry.derive(key, lambda: dumps(view()))
+        body, applied = compressed_variant(
+            raw, encoding, lambda variant, build: entry.derive(f"{key}:{variant}", build)
+        )
+        return EncodedBody(body, applied, entry.version)
+    
+    @staticmethod
+    def _node_content(node_id: str, node: Dict[str, Any]) -> Dict[str, Any]:
+        """The AI-generated content of a node as returned by the content endpoint"""
+        return {
+            "node_id": node_id,
+            "content": node.get("content", {}),
+            "exercises": node.get("exercises", []),
+            "quiz": node.get("quiz")
+        }
+    
+    async def get_node(self, path_id: str, node_id: str) -> Optional[Dict[str, Any]]:
+        """Get a node of a learning path by ID (None for unknown paths or nodes)"""
+        entry = await self.cache.get(path_id)
+        if entry is None:
+            return None
+        
+        index_entry = self.id_index.lookup(node_id)
+        if index_entry and index_entry.kind == "node" and index_entry.path_id == path_id:
+            return self.id_index.resolve(index_entry, entry.value)
+        return None
+    
+    async def get_exercise(self, exercise_id: str) -> Optional[Dict[str, Any]]:
+        """Get a generated exercise by ID"""
+        return await self._get_entity(exercise_id, "exercise")
+    
+    async def get_quiz(self, quiz_id: str) -> Optional[Dict[str, Any]]:
+        """Get a generated quiz by ID"""
+        return await self._get_entity(quiz_id, "quiz")
+    
+    async def get_question(self, question_id: str) -> Optional[Dict[str, Any]]:
+        """Get a generated quiz question by ID"""
+        return await self._get_entity(question_id, "question")
+    
+    async def get_quiz_question(self, quiz_id: str, question_id: str) -> Optional[Dict[str, Any]]:
+        """Get a question only if it belongs to the given quiz"""
+        quiz_entry = self.id_index.lookup(quiz_id)
+        question_entry = self.id_index.lookup(question_id)
+        if (
+            not quiz_entry
+            or not question_entry
+            or question_entry.kind != "question"
+            or (quiz_entry.path_id, quiz_entry.node_index)
+            != (question_entry.path_id, question_entry.node_index)
+        ):
+            return None
+        return await self._get_entity(question_id, "question")
+    
+    async def get_many(self, entity_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Resolve node, exercise, quiz and question IDs of any paths in one pass.
+        
+        IDs are looked up in the index first and each owning path is loaded
+        once (concurrently), however many of its entities were asked for.
+        Returns one result per requested ID, in order; unknown IDs get a
+        not-found entry instead of failing the batch.
+        """
+        entries = {entity_id: self.id_index.lookup(entity_id) for entity_id in dict.fromkeys(entity_ids)}
+        path_ids = list({entry.path_id for entry in entries.values() if entry is not None})
+        loaded = await asyncio.gather(*(self.cache.get(path_id) for path_id in path_ids))
+        paths = {path_id: entry.value for path_id, entry in zip(path_ids, loaded) if entry is not None}
+        
+        results = []
+        for entity_id in entity_ids:
+            entry = entries[entity_id]
+            learning_path = paths.get(entry.path_id) if entry is not None else None
+            item = self.id_index.resolve(entry, learning_path) if learning_path is not None else None
+            if item is None:
+                results.append({"id": entity_id, "found": False})
+            else:
+                results.append({
+                    "id": entity_id,
+                    "found": True,
+                    "kind": entry.kind,
+                    "path_id": entry.path_id,
+                    "item": item
+                })
+        return results
+    
+    async def _get_entity(self, entity_id: str, kind: str) -> Optional[Dict[str, Any]]:
+        entry = self.id_index.lookup(entity_id)
+        if not entry or entry.kind != kind:
+            return None
+        
+        cached = await self.cache.get(entry.path_id)
+        if cached is None:
+            return None
+        return self.id_index.resolve(entry, cached.value)
+
     
     def process_ai_response(self, ai_response: Dict[str, Any]) -> Dict[str, Any]:
         """Process and structure AI response"""
@@ -182,4 +403,6 @@ class LearningPathService:
                 "ai_generated": False,
                 "is_mock": True
             }
-        }
\ No newline at end of file
+        }
+
+learning_path_service = LearningPathService()
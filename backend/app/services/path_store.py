@@ -0,0 +1,283 @@
+# backend/app/services/path_store.py
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+import orjson
+
+from app.core.metrics import metrics
+from app.services.compact_path import CompactLearningPath, ContentPool, compact_learning_path
+
+logger = logging.getLogger(__name__)
+
+class StoredPath:
+    """A learning path held in memory (in compact form) with its version and approximate size"""
+    __slots__ = ("value", "version", "size", "spilled_version")
+
+    def __init__(self, value: CompactLearningPath, version: int, size: int, spilled_version: int = 0):
+        self.value = value
+        self.version = version
+        self.size = size
+        # Version already present on disk; evicting this version needs no write
+        self.spilled_version = spilled_version
+
+class SpillFile:
+    """SQLite file holding learning paths evicted from memory"""
+
+    def __init__(self, path: str):
+        """Open (or create) the spill database"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS paths ("
+            "path_id TEXT PRIMARY KEY, version INTEGER NOT NULL, body BLOB NOT NULL)"
+        )
+
+    def write(self, path_id: str, version: int, body: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paths (path_id, version, body) VALUES (?, ?, ?)",
+                (path_id, version, body),
+            )
+
+    def read(self, path_id: str) -> Optional[Tuple[int, bytes]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, body FROM paths WHERE path_id = ?", (path_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def read_version(self, path_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM paths WHERE path_id = ?", (path_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def delete(self, path_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM paths WHERE path_id = ?", (path_id,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM paths").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class PathStore:
+    """
+    Bounded in-memory store for learning paths with LRU eviction to disk.
+
+    Paths are kept in memory up to a byte budget (measured as the size of
+    their JSON encoding). When the budget is exceeded the least recently used
+    paths are spilled to a local SQLite file and transparently loaded back on
+    the next access, so memory stays predictable without losing data. After a
+    restart, paths are also read lazily from the last state snapshot.
+
+    Paths are held as CompactLearningPath records and handed out as dicts.
+    Node, exercise and quiz content is deduplicated across paths through a
+    content-addressed pool, so each path only owns its IDs and node statuses.
+    """
+
+    def __init__(self, memory_budget_bytes: int, spill_path: Optional[str] = None):
+        """
+        Args:
+            memory_budget_bytes: total JSON size of the paths kept in memory
+            spill_path: SQLite file for evicted paths; without it eviction is disabled
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_path = spill_path
+        self.hot: "OrderedDict[str, StoredPath]" = OrderedDict()
+        self.hot_bytes = 0
+        self.pool = ContentPool()
+        self._spill: Optional[SpillFile] = None
+        # Read-only snapshot from the previous run; paths deleted since are masked
+        self.snapshot = None
+        self._deleted: set = set()
+        metrics.register_collector("path_store", self.get_stats)
+
+    @property
+    def spill(self) -> Optional[SpillFile]:
+        if self._spill is None and self.spill_path:
+            self._spill = SpillFile(self.spill_path)
+        return self._spill
+
+    async def put(self, path_id: str, value: Dict[str, Any], version: int) -> None:
+        """Store (or replace) a path"""
+        stored = StoredPath(*self._compact(value, version))
+        self._remove_hot(path_id)
+        self._deleted.discard(path_id)
+        self.hot[path_id] = stored
+        self.hot_bytes += stored.size
+        await self._evict()
+
+    async def get(self, path_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """
+        Get (path, version), loading it back from disk if it was spilled.
+
+        The path is a new dict on every call, so changes to it are not stored;
+        write them back with put. It is decoded from the record's JSON (as
+        spilled paths are), which is faster than building it with to_dict.
+        """
+        stored = self.hot.get(path_id)
+        if stored is not None:
+            self.hot.move_to_end(path_id)
+            return orjson.loads(stored.value.to_json()), stored.version
+
+        loaded = await self._load(path_id)
+        if loaded is None:
+            return None
+        stored, value = loaded
+        return value, stored.version
+
+    async def get_compact(self, path_id: str) -> Optional[Tuple[CompactLearningPath, int]]:
+        """Get (compact path, version) without converting it to a dict, e.g. to project a few fields"""
+        stored = self.hot.get(path_id)
+        if stored is not None:
+            self.hot.move_to_end(path_id)
+        else:
+            loaded = await self._load(path_id)
+            if loaded is None:
+                return None
+            stored = loaded[0]
+        return stored.value, stored.version
+
+    async def _load(self, path_id: str) -> Optional[Tuple[StoredPath, Dict[str, Any]]]:
+        """Load a path that is not in memory from disk or the snapshot, with its decoded dict"""
+        if path_id in self._deleted:
+            return None
+
+        row = None
+        if self.spill is not None:
+            row = await asyncio.to_thread(self.spill.read, path_id)
+
+        # Either copy may be newer: a path can be updated and spilled after the snapshot was taken
+        snapshot_row = self.snapshot.get_path(path_id) if self.snapshot is not None else None
+        if snapshot_row is not None and (row is None or snapshot_row[1] > row[0]):
+            value, version = snapshot_row
+            metrics.inc("path_store_snapshot_reads")
+            stored = StoredPath(*self._compact(value, version))
+        elif row is not None:
+            version, body = row
+            metrics.inc("path_store_spill_reads")
+            value = json.loads(body)
+            stored = StoredPath(*self._compact(value, version), spilled_version=version)
+        else:
+            return None
+
+        self.hot[path_id] = stored
+        self.hot_bytes += stored.size
+        await self._evict(keep=path_id)
+        return stored, value
+
+    async def get_version(self, path_id: str) -> Optional[int]:
+        """Current version of a path without loading its body"""
+        stored = self.hot.get(path_id)
+        if stored is not None:
+            return stored.version
+        if path_id in self._deleted:
+            return None
+
+        versions = []
+        if self.spill is not None:
+            versions.append(await asyncio.to_thread(self.spill.read_version, path_id))
+        if self.snapshot is not None:
+            versions.append(self.snapshot.get_version(path_id))
+        versions = [version for version in versions if version is not None]
+        return max(versions) if versions else None
+
+    async def delete(self, path_id: str) -> None:
+        """Remove a path from memory and disk"""
+        self._remove_hot(path_id)
+        self._deleted.add(path_id)
+        if self.spill is not None:
+            await asyncio.to_thread(self.spill.delete, path_id)
+
+    def snapshot_records(self) -> Iterator[Tuple[str, int, Optional[CompactLearningPath], Optional[bytes]]]:
+        """
+        Paths to include in the next snapshot: everything in memory, plus
+        previous snapshot records that were not replaced or deleted since
+        (carried over without decoding). Spilled paths stay in the spill file.
+
+        The set of paths is fixed when this is called, so the returned iterator
+        can be consumed from a background thread.
+        """
+        hot = [(path_id, stored.version, stored.value, None) for path_id, stored in self.hot.items()]
+        if self.snapshot is None:
+            return iter(hot)
+
+        previous = self.snapshot
+        skip = set(self.hot) | self._deleted
+        carried = (
+            (path_id, version, None, body)
+            for path_id, version, body in previous.iter_raw_paths()
+            if path_id not in skip
+        )
+        return itertools.chain(hot, carried)
+
+    def close(self) -> None:
+        """Close the spill file"""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Store statistics for the metrics endpoint"""
+        return {
+            "hot_paths": len(self.hot),
+            "hot_bytes": self.hot_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "evictions": metrics.get("path_store_evictions"),
+            "spill_writes": metrics.get("path_store_spill_writes"),
+            "spill_reads": metrics.get("path_store_spill_reads"),
+            "snapshot_reads": metrics.get("path_store_snapshot_reads"),
+            "unique_bodies": len(self.pool),
+            "deduplicated_bodies": self.pool.hits,
+        }
+
+    def _compact(self, value: Dict[str, Any], version: int) -> Tuple[CompactLearningPath, int, int]:
+        """Compact a path; its size only counts content that was not already in the pool"""
+        deduplicated = self.pool.bytes_deduplicated
+        compact = compact_learning_path(value, self.pool)
+        size = len(compact.to_json()) - (self.pool.bytes_deduplicated - deduplicated)
+        return compact, version, max(size, 1)
+
+    def _remove_hot(self, path_id: str) -> None:
+        stored = self.hot.pop(path_id, None)
+        if stored is not None:
+            self.hot_bytes -= stored.size
+
+    async def _evict(self, keep: Optional[str] = None) -> None:
+        """Spill least recently used paths until memory is back under budget"""
+        if self.spill is None:
+            return
+
+        while self.hot_bytes > self.memory_budget_bytes and len(self.hot) > 1:
+            path_id, stored = next(iter(self.hot.items()))
+            if path_id == keep:
+                self.hot.move_to_end(path_id)
+                continue
+
+            if stored.spilled_version != stored.version:
+                body = stored.value.to_json()
+                await asyncio.to_thread(self.spill.write, path_id, stored.version, body)
+                stored.spilled_version = stored.version
+                metrics.inc("path_store_spill_writes")
+
+            # The path may have been touched while the write was in flight
+            if self.hot.get(path_id) is stored:
+                self._remove_hot(path_id)
+                metrics.inc("path_store_evictions")
@@ -0,0 +1,210 @@
+# backend/app/services/progress_buffer.py
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.progress_service import ProgressService, STATUS_EVENTS, progress_service
+
+logger = logging.getLogger(__name__)
+
+# Later statuses win when updates to the same node are merged
+STATUS_RANK = {"in_progress": 1, "completed": 2}
+
+@dataclass
+class PendingUpdate:
+    """Merged, not yet flushed progress updates for one (user, path, node)"""
+    status: str
+    points_earned: int
+    last_update: datetime
+
+class ProgressWriteBuffer:
+    """
+    Write-behind buffer in front of the progress event log.
+
+    Updates to the same (user, path, node) are merged in memory and flushed
+    to the ProgressService in batches, either every flush interval or as soon
+    as the number of pending keys reaches the size threshold. Reads go through
+    the buffer so they see updates that have not been flushed yet, including
+    the batch being written.
+    """
+
+    def __init__(
+        self,
+        service: ProgressService,
+        flush_interval: float = 2.0,
+        max_pending: int = 500,
+        enabled: bool = True
+    ):
+        """Initialize the buffer"""
+        self.service = service
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self.pending: Dict[Tuple[str, str, str], PendingUpdate] = {}
+        # Batch being written by the current flush, still visible to reads until it is stored
+        self.in_flight: Dict[Tuple[str, str, str], PendingUpdate] = {}
+        self.updates_received = 0
+        self.events_flushed = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._timer_task: Optional[asyncio.Task] = None
+        metrics.register_collector("progress_buffer", self.get_stats)
+
+    async def start(self) -> None:
+        """Start the periodic flush loop"""
+        if self.enabled and self._timer_task is None:
+            self._timer_task = asyncio.create_task(self._flush_periodically())
+            logger.info(f"Progress write-behind buffer started (interval={self.flush_interval}s)")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and flush everything still pending"""
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+            try:
+                await self._timer_task
+            except asyncio.CancelledError:
+                pass
+            self._timer_task = None
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.flush()
+        logger.info(f"Progress write-behind buffer stopped ({self.events_flushed} events flushed)")
+
+    async def add(
+        self,
+        user_id: str,
+        path_id: str,
+        node_id: str,
+        status: str,
+        points_earned: int = 0
+    ) -> None:
+        """Buffer a progress update, merging it with pending updates for the same node"""
+        if not self.enabled:
+            await self.service.record_update(user_id, path_id, node_id, status, points_earned)
+            return
+
+        # Validate eagerly so bad requests fail now rather than at flush time
+        if status not in STATUS_EVENTS:
+            self.service.build_events(user_id, path_id, node_id, status)
+
+        self.updates_received += 1
+        key = (user_id, path_id, node_id)
+        now = datetime.utcnow()
+        pending = self.pending.get(key)
+        if pending is None:
+            self.pending[key] = PendingUpdate(status, points_earned, now)
+        else:
+            if STATUS_RANK[status] > STATUS_RANK[pending.status]:
+                pending.status = status
+            pending.points_earned += points_earned
+            pending.last_update = now
+
+        if len(self.pending) >= self.max_pending and (
+            self._flush_task is None or self._flush_task.done()
+        ):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Write all pending updates in one batch; returns the number of events written"""
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+
+            batch, self.pending = self.pending, {}
+            self.in_flight = batch
+            try:
+                events = self._to_events(batch.items())
+                await self.service.append_events(events)
+            except Exception as e:
+                # append_events stores all of a batch or none of it, so it is requeued whole
+                logger.error(f"Error flushing {len(batch)} progress updates: {str(e)}")
+                self._requeue(batch)
+                return 0
+            finally:
+                self.in_flight = {}
+
+            self.events_flushed += len(events)
+            logger.debug(f"Flushed {len(batch)} progress updates as {len(events)} events")
+            return len(events)
+
+    async def get_path_summary(
+        self,
+        user_id: str,
+        path_id: str,
+        total_nodes: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Get a path summary including updates that are still buffered"""
+        pending = self._pending_for(user_id, path_id)
+        if not pending:
+            return await self.service.get_path_summary(user_id, path_id, total_nodes)
+        return await self.service.preview_path_summary(
+            user_id, path_id, self._to_events(pending), total_nodes
+        )
+
+    async def get_node_statuses(self, user_id: str, path_id: str) -> Dict[str, str]:
+        """Get node statuses including updates that are still buffered"""
+        statuses = await self.service.get_node_statuses(user_id, path_id)
+        for (_, _, node_id), update in self._pending_for(user_id, path_id):
+            if STATUS_RANK[update.status] > STATUS_RANK.get(statuses.get(node_id), 0):
+                statuses[node_id] = update.status
+        return statuses
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer statistics"""
+        return {
+            "enabled": self.enabled,
+            "pending_updates": len(self.pending),
+            "in_flight_updates": len(self.in_flight),
+            "updates_received": self.updates_received,
+            "events_flushed": self.events_flushed,
+        }
+
+    def _pending_for(self, user_id: str, path_id: str) -> List[Tuple[Tuple[str, str, str], PendingUpdate]]:
+        # In-flight updates come first; a node may have both, and both are not stored yet
+        return [
+            (key, update)
+            for updates in (self.in_flight, self.pending)
+            for key, update in updates.items()
+            if key[0] == user_id and key[1] == path_id
+        ]
+
+    def _to_events(self, updates) -> List[Any]:
+        # Replay in order of last update so the current node ends up being the most recent one
+        events = []
+        for (user_id, path_id, node_id), update in sorted(updates, key=lambda item: item[1].last_update):
+            events.extend(
+                self.service.build_events(
+                    user_id, path_id, node_id, update.status, update.points_earned, at=update.last_update
+                )
+            )
+        return events
+
+    def _requeue(self, batch: Dict[Tuple[str, str, str], PendingUpdate]) -> None:
+        """Merge a failed batch back in front of updates that arrived meanwhile"""
+        for key, update in batch.items():
+            newer = self.pending.get(key)
+            if newer is None:
+                self.pending[key] = update
+                continue
+            if STATUS_RANK[update.status] > STATUS_RANK[newer.status]:
+                newer.status = update.status
+            newer.points_earned += update.points_earned
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error in progress flush loop: {str(e)}")
+
+progress_buffer = ProgressWriteBuffer(
+    progress_service,
+    flush_interval=settings.PROGRESS_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.PROGRESS_FLUSH_MAX_PENDING,
+    enabled=settings.PROGRESS_WRITE_BEHIND_ENABLED,
+)
@@ -0,0 +1,434 @@
+# backend/app/services/progress_service.py
+import itertools
+import logging
+from collections import deque
+from typing import Deque, Dict, Any, Iterator, List, Optional, Tuple
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import get_session_factory
+from app.core.exceptions import BadRequestException
+from app.core.serialization import dumps
+from app.models.progress import (
+    ProgressEvent,
+    NodeProgress,
+    PathProgressSummary,
+    UserProgressSummary,
+)
+
+logger = logging.getLogger(__name__)
+
+NODE_STARTED = "node_started"
+NODE_COMPLETED = "node_completed"
+POINTS_EARNED = "points_earned"
+
+# Node statuses accepted by PATCH /learning-path/{path_id}/progress and the events they emit
+STATUS_EVENTS = {
+    "in_progress": [NODE_STARTED],
+    "completed": [NODE_STARTED, NODE_COMPLETED],
+}
+
+# Attempts at a database append; concurrent first updates race to create the same rows
+APPEND_ATTEMPTS = 3
+
+class ProgressService:
+    """
+    Service for learner progress, stored as an append-only event log.
+
+    Every update appends small events; per-node state and the per-(user, path)
+    and per-user summaries are maintained incrementally from those events, so
+    reads are single-row lookups no matter how many nodes a learner completed.
+    """
+
+    def __init__(self):
+        """Initialize the service"""
+        # In-memory stores used when no database is configured (only the newest events are kept)
+        self.events: Deque[ProgressEvent] = deque(maxlen=settings.PROGRESS_MEMORY_MAX_EVENTS)
+        self.node_progress: Dict[Tuple[str, str], Dict[str, NodeProgress]] = {}
+        self.path_summaries: Dict[Tuple[str, str], PathProgressSummary] = {}
+        self.user_summaries: Dict[str, UserProgressSummary] = {}
+        # Previous run's snapshot; its events stay in the mapped file and are never decoded
+        self.snapshot = None
+
+    def build_events(
+        self,
+        user_id: str,
+        path_id: str,
+        node_id: str,
+        status: str,
+        points_earned: int = 0,
+        at: Optional[datetime] = None
+    ) -> List[ProgressEvent]:
+        """Translate a progress update into the events it represents"""
+        if status not in STATUS_EVENTS:
+            raise BadRequestException(
+                f"Unsupported status '{status}'. Expected one of: {', '.join(STATUS_EVENTS)}"
+            )
+
+        now = at or datetime.utcnow()
+        event_types = list(STATUS_EVENTS[status])
+        if points_earned:
+            event_types.append(POINTS_EARNED)
+
+        return [
+            ProgressEvent(
+                id=str(uuid4()),
+                user_id=user_id,
+                learning_path_id=path_id,
+                node_id=node_id,
+                event_type=event_type,
+                points=points_earned if event_type == POINTS_EARNED else 0,
+                created_at=now,
+                updated_at=now,
+            )
+            for event_type in event_types
+        ]
+
+    async def record_update(
+        self,
+        user_id: str,
+        path_id: str,
+        node_id: str,
+        status: str,
+        points_earned: int = 0
+    ) -> Dict[str, Any]:
+        """Record a node status / points update and return the new path summary"""
+        events = self.build_events(user_id, path_id, node_id, status, points_earned)
+        await self.append_events(events)
+        return await self.get_path_summary(user_id, path_id)
+
+    async def append_events(self, events: List[ProgressEvent]) -> None:
+        """Append events to the log and fold them into the summaries, all or none of them"""
+        if not events:
+            return
+
+        session_factory = get_session_factory()
+        if session_factory is None:
+            # Fold into copies and store them once every event applied, like a transaction
+            rows: Dict[Any, Any] = {}
+
+            async def load(model, key):
+                if (model, key) not in rows:
+                    rows[(model, key)] = self._detached_copy(await self._load_memory_row(model, key))
+                return rows[(model, key)]
+
+            for event in events:
+                for row in await self._apply_event(event, load):
+                    rows[(type(row), self._row_key(row))] = row
+            for row in rows.values():
+                if row is not None:
+                    self._store_memory_row(row)
+            self.events.extend(events)
+            return
+
+        for attempt in range(APPEND_ATTEMPTS):
+            try:
+                await self._append_to_database(session_factory, events)
+                return
+            except IntegrityError:
+                # Another request created a missing row first; retrying locks and updates it
+                if attempt == APPEND_ATTEMPTS - 1:
+                    raise
+                logger.info(f"Retrying progress append after a concurrent insert ({attempt + 1})")
+
+    async def _append_to_database(self, session_factory, events: List[ProgressEvent]) -> None:
+        async with session_factory() as db:
+            async with db.begin():
+                rows: Dict[Any, Any] = {}
+
+                async def load(model, key):
+                    # Keep rows for the whole transaction so a batch locks each row once
+                    if (model, key) not in rows:
+                        rows[(model, key)] = await db.get(model, key, with_for_update=True)
+                    return rows[(model, key)]
+
+                for event in events:
+                    for row in await self._apply_event(event, load):
+                        rows[(type(row), self._row_key(row))] = row
+                        db.add(row)
+                    db.add(event)
+
+    async def get_path_summary(
+        self,
+        user_id: str,
+        path_id: str,
+        total_nodes: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Get a learner's progress summary for one path"""
+        summary = await self._get_row(PathProgressSummary, (user_id, path_id))
+        return self._format_path_summary(user_id, path_id, summary, total_nodes)
+
+    async def preview_path_summary(
+        self,
+        user_id: str,
+        path_id: str,
+        pending: List[ProgressEvent],
+        total_nodes: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Get a path summary as it will be once the pending (not yet appended)
+        events are stored. The stored rows are not modified.
+        """
+        stored = await self._get_row(PathProgressSummary, (user_id, path_id))
+        rows: Dict[Any, Any] = {
+            (PathProgressSummary, (user_id, path_id)): self._detached_copy(stored),
+            (UserProgressSummary, user_id): UserProgressSummary(
+                user_id=user_id, paths_started=0, completed_nodes=0, total_points_earned=0
+            ),
+        }
+        statuses = await self.get_node_statuses(user_id, path_id) if pending else {}
+        for node_id, status in statuses.items():
+            rows[(NodeProgress, (user_id, path_id, node_id))] = NodeProgress(
+                user_id=user_id, learning_path_id=path_id, node_id=node_id, status=status
+            )
+
+        async def load(model, key):
+            return rows.get((model, key))
+
+        for event in pending:
+            for row in await self._apply_event(event, load):
+                rows[(type(row), self._row_key(row))] = row
+
+        summary = rows[(PathProgressSummary, (user_id, path_id))]
+        return self._format_path_summary(user_id, path_id, summary, total_nodes)
+
+    async def get_user_summary(self, user_id: str) -> Dict[str, Any]:
+        """Get a learner's progress summary across all paths"""
+        summary = await self._get_row(UserProgressSummary, user_id)
+
+        return {
+            "user_id": user_id,
+            "paths_started": summary.paths_started if summary else 0,
+            "completed_nodes_count": summary.completed_nodes if summary else 0,
+            "total_points_earned": summary.total_points_earned if summary else 0,
+            "last_activity": summary.last_activity.isoformat() if summary else None,
+        }
+
+    async def get_node_statuses(self, user_id: str, path_id: str) -> Dict[str, str]:
+        """Get the status of every node the learner has touched on a path"""
+        session_factory = get_session_factory()
+        if session_factory is None:
+            nodes = self.node_progress.get((user_id, path_id), {})
+            return {node_id: row.status for node_id, row in nodes.items()}
+
+        async with session_factory() as db:
+            result = await db.execute(
+                select(NodeProgress.node_id, NodeProgress.status).where(
+                    NodeProgress.user_id == user_id,
+                    NodeProgress.learning_path_id == path_id,
+                )
+            )
+            return {node_id: status for node_id, status in result.all()}
+
+    def export_state(self) -> Dict[str, Any]:
+        """
+        In-memory state as JSON-serializable rows (empty when a database is
+        configured). Events are written separately by snapshot_events.
+        """
+        if get_session_factory() is not None:
+            return {}
+
+        return {
+            "node_progress": [
+                self._row_to_dict(row) for nodes in self.node_progress.values() for row in nodes.values()
+            ],
+            "path_summaries": [self._row_to_dict(row) for row in self.path_summaries.values()],
+            "user_summaries": [self._row_to_dict(row) for row in self.user_summaries.values()],
+        }
+
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """Restore in-memory stores exported by export_state"""
+        if not state or get_session_factory() is not None:
+            return
+
+        # Only snapshots written before events had their own section carry them here
+        self.events.clear()
+        self.events.extend(self._row_from_dict(ProgressEvent, row) for row in state.get("events", []))
+        for model, key in (
+            (NodeProgress, "node_progress"),
+            (PathProgressSummary, "path_summaries"),
+            (UserProgressSummary, "user_summaries"),
+        ):
+            for row in state.get(key, []):
+                self._store_memory_row(self._row_from_dict(model, row))
+        logger.info(f"Restored progress of {len(self.path_summaries)} learner paths from snapshot")
+
+    def snapshot_events(self) -> Iterator[bytes]:
+        """
+        Events to include in the next snapshot as JSON lines: the newest of the
+        previous snapshot's events (carried over without decoding) plus those
+        appended since, up to the in-memory cap. Safe to consume from a
+        background thread.
+        """
+        if get_session_factory() is not None:
+            return iter(())
+
+        events = list(self.events)
+        appended = (dumps(self._row_to_dict(event)) for event in events)
+        carried = self.events.maxlen - len(events)
+        if self.snapshot is None or carried <= 0:
+            return appended
+        return itertools.chain(self.snapshot.iter_raw_events(last=carried), appended)
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        values = {}
+        for column in row.__table__.columns:
+            value = getattr(row, column.key)
+            values[column.key] = value.isoformat() if isinstance(value, datetime) else value
+        return values
+
+    @staticmethod
+    def _row_from_dict(model, values: Dict[str, Any]):
+        row = {}
+        for column in model.__table__.columns:
+            value = values.get(column.key)
+            if value is not None and column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            row[column.key] = value
+        return model(**row)
+
+    @staticmethod
+    def _format_path_summary(
+        user_id: str,
+        path_id: str,
+        summary: Optional[PathProgressSummary],
+        total_nodes: Optional[int]
+    ) -> Dict[str, Any]:
+        completed = summary.completed_nodes if summary else 0
+        overall = 0.0
+        if total_nodes:
+            overall = round(min(completed / total_nodes, 1.0) * 100, 1)
+
+        return {
+            "user_id": user_id,
+            "path_id": path_id,
+            "started_nodes": summary.started_nodes if summary else 0,
+            "completed_nodes_count": completed,
+            "current_node_id": summary.current_node_id if summary else None,
+            "overall_progress": overall,
+            "total_points_earned": summary.total_points_earned if summary else 0,
+            "last_activity": summary.last_activity.isoformat() if summary else None,
+        }
+
+    @staticmethod
+    def _detached_copy(row):
+        """Copy a row into a new transient instance (None stays None)"""
+        if row is None:
+            return None
+        return type(row)(**{column.key: getattr(row, column.key) for column in row.__table__.columns})
+
+    async def _get_row(self, model, key):
+        session_factory = get_session_factory()
+        if session_factory is None:
+            return await self._load_memory_row(model, key)
+
+        async with session_factory() as db:
+            return await db.get(model, key)
+
+    async def _load_memory_row(self, model, key):
+        if model is NodeProgress:
+            user_id, path_id, node_id = key
+            return self.node_progress.get((user_id, path_id), {}).get(node_id)
+        if model is PathProgressSummary:
+            return self.path_summaries.get(key)
+        return self.user_summaries.get(key)
+
+    def _store_memory_row(self, row) -> None:
+        key = self._row_key(row)
+        if isinstance(row, NodeProgress):
+            self.node_progress.setdefault(key[:2], {})[row.node_id] = row
+        elif isinstance(row, PathProgressSummary):
+            self.path_summaries[key] = row
+        else:
+            self.user_summaries[key] = row
+
+    @staticmethod
+    def _row_key(row):
+        if isinstance(row, NodeProgress):
+            return (row.user_id, row.learning_path_id, row.node_id)
+        if isinstance(row, PathProgressSummary):
+            return (row.user_id, row.learning_path_id)
+        return row.user_id
+
+    async def _apply_event(self, event: ProgressEvent, load) -> List[Any]:
+        """Fold one event into the rows returned by load; returns newly created rows"""
+        node = None
+        if event.node_id:
+            node = await load(NodeProgress, (event.user_id, event.learning_path_id, event.node_id))
+        path_summary = await load(PathProgressSummary, (event.user_id, event.learning_path_id))
+        user_summary = await load(UserProgressSummary, event.user_id)
+        return self._fold(event, node, path_summary, user_summary)
+
+    @staticmethod
+    def _fold(
+        event: ProgressEvent,
+        node: Optional[NodeProgress],
+        path_summary: Optional[PathProgressSummary],
+        user_summary: Optional[UserProgressSummary]
+    ) -> List[Any]:
+        """
+        Apply one event to the node state and both summaries.
+
+        Repeated events are idempotent for the counters: starting or completing
+        a node twice only counts once. Returns rows that did not exist yet.
+        """
+        created: List[Any] = []
+        now = event.created_at or datetime.utcnow()
+
+        if user_summary is None:
+            user_summary = UserProgressSummary(
+                user_id=event.user_id,
+                paths_started=0,
+                completed_nodes=0,
+                total_points_earned=0,
+                last_activity=now,
+            )
+            created.append(user_summary)
+
+        if path_summary is None:
+            path_summary = PathProgressSummary(
+                user_id=event.user_id,
+                learning_path_id=event.learning_path_id,
+                started_nodes=0,
+                completed_nodes=0,
+                total_points_earned=0,
+                last_activity=now,
+            )
+            user_summary.paths_started += 1
+            created.append(path_summary)
+
+        if event.event_type in (NODE_STARTED, NODE_COMPLETED) and node is None:
+            node = NodeProgress(
+                user_id=event.user_id,
+                learning_path_id=event.learning_path_id,
+                node_id=event.node_id,
+                status="in_progress",
+                points_earned=0,
+                started_at=now,
+            )
+            path_summary.started_nodes += 1
+            created.append(node)
+
+        if event.event_type == NODE_STARTED:
+            path_summary.current_node_id = event.node_id
+        elif event.event_type == NODE_COMPLETED and node.status != "completed":
+            node.status = "completed"
+            node.completed_at = now
+            path_summary.completed_nodes += 1
+            user_summary.completed_nodes += 1
+        elif event.event_type == POINTS_EARNED:
+            if node is not None:
+                node.points_earned = (node.points_earned or 0) + event.points
+            path_summary.total_points_earned += event.points
+            user_summary.total_points_earned += event.points
+
+        path_summary.last_activity = now
+        user_summary.last_activity = now
+        return created
+
+progress_service = ProgressService()
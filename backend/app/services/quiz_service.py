@@ -4,27 +4,31 @@ from datetime import datetime
 import random
 from app.schemas.quiz import QuizSubmission, QuizResult, QuizResponse
 from app.core.exceptions import NotFoundException, BadRequestException
+from app.services.learning_path_service import learning_path_service
 
 logger = logging.getLogger(__name__)
 
 class QuizService:
     """Service for managing quizzes"""
     
-    def get_quiz(self, quiz_id: str) -> QuizResponse:
+    async def get_quiz(self, quiz_id: str) -> QuizResponse:
         """Get quiz by ID"""
         try:
-            # In production, fetch from database
-            # For now, return mock data
+            quiz = await learning_path_service.get_quiz(quiz_id)
+            if quiz:
+                return self._to_client_quiz(quiz)
+            
+            # Not part of a stored path - return mock data
             return self._get_mock_quiz(quiz_id)
         except Exception as e:
             logger.error(f"Error getting quiz {quiz_id}: {str(e)}")
             raise NotFoundException(f"Quiz {quiz_id} not found")
     
-    def submit_quiz(self, quiz_id: str, submission: QuizSubmission) -> QuizResult:
+    async def submit_quiz(self, quiz_id: str, submission: QuizSubmission) -> QuizResult:
         """Submit and evaluate quiz"""
         try:
             # Get quiz data
-            quiz = self._get_mock_quiz_data(quiz_id)
+            quiz = await self._get_quiz_data(quiz_id)
             
             # Evaluate answers
             correct_answers = 0
@@ -65,11 +69,14 @@ class QuizService:
             logger.error(f"Error submitting quiz {quiz_id}: {str(e)}")
             raise BadRequestException(f"Failed to submit quiz: {str(e)}")
     
-    def validate_answer(self, quiz_id: str, question_id: str, answer: Any) -> bool:
+    async def validate_answer(self, quiz_id: str, question_id: str, answer: Any) -> bool:
         """Validate a single answer"""
         try:
-            quiz = self._get_mock_quiz_data(quiz_id)
-            question = next((q for q in quiz["questions"] if q["id"] == question_id), None)
+            question = await learning_path_service.get_quiz_question(quiz_id, question_id)
+            if question is None and not await learning_path_service.get_quiz(quiz_id):
+                # Not part of a stored path - check against the mock quiz
+                quiz = self._get_mock_quiz_data(quiz_id)
+                question = next((q for q in quiz["questions"] if q["id"] == question_id), None)
             
             if not question:
                 raise NotFoundException(f"Question {question_id} not found")
@@ -105,6 +112,33 @@ class QuizService:
         
         return False
     
+    async def _get_quiz_data(self, quiz_id: str) -> Dict[str, Any]:
+        """Get quiz data with answers, from the generated learning paths or mock data"""
+        quiz = await learning_path_service.get_quiz(quiz_id)
+        if quiz:
+            return quiz
+        return self._get_mock_quiz_data(quiz_id)
+    
+    def _to_client_quiz(self, quiz: Dict[str, Any]) -> QuizResponse:
+        """Build the client view of a quiz, without answers or explanations"""
+        hidden = {"correct_answer", "correct_answers", "explanation"}
+        questions = [
+            {k: v for k, v in question.items() if k not in hidden}
+            for question in quiz.get("questions", [])
+        ]
+        max_attempts = quiz.get("max_attempts", 3)
+        
+        return QuizResponse(
+            id=quiz["id"],
+            title=quiz.get("title", "Knowledge Check"),
+            description=quiz.get("description", ""),
+            questions=questions,
+            time_limit_minutes=quiz.get("time_limit_minutes", 30),
+            passing_score=quiz.get("passing_score", 70),
+            max_attempts=max_attempts,
+            attempts_remaining=max_attempts
+        )
+    
     def _get_mock_quiz(self, quiz_id: str) -> QuizResponse:
         """Get mock quiz for testing"""
         questions = self._generate_mock_questions()
@@ -0,0 +1,415 @@
+# backend/app/services/sandbox_worker.py
+"""
+Sandbox worker: runs one submission's test cases, then exits.
+
+Two ways to start one:
+- python -I sandbox_worker.py LIMITS_JSON
+    a standalone worker, talking over stdin / stdout (started ahead of time
+    by the code runner's WorkerPool)
+- python -I sandbox_worker.py --zygote CONTROL_FD LIMITS_JSON
+    a zygote: preloads the standard library modules exercises use, then
+    forks one copy-on-write child per request received on CONTROL_FD. Each
+    request carries a socket (SCM_RIGHTS) that the child talks over.
+
+Either way a worker reports ready, reads one job, and writes one JSON line
+per test followed by {"done": true}.
+
+Test cases are either
+    {"input": ...}
+        the program is run with input on stdin and its stdout is reported, or
+    {"function": "name", "args": [...]}
+        the program is loaded and the value of name(*args) is reported.
+
+Results carry only what the submission did (actual, error, duration); the
+expected outputs never reach the sandbox, and the code runner decides
+whether a test passed.
+
+Python jobs carry the code and run it in a child of this process that
+holds none of the protocol's file descriptors. Jobs for other languages
+carry a command instead (built by the code runner's toolchains), which is
+run as a child process per test. Children inherit the limits.
+
+Only the standard library is used here; this file is never imported by the app.
+"""
+import builtins
+import contextlib
+import gc
+import importlib
+import io
+import json
+import os
+import resource
+import signal
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+# Imported once by the zygote so forked children start with them loaded
+PRELOAD_MODULES = (
+    "abc", "array", "bisect", "collections", "copy", "dataclasses", "datetime", "decimal", "enum",
+    "fractions", "functools", "heapq", "itertools", "math", "operator", "random", "re", "statistics",
+    "string", "textwrap", "typing", "unicodedata",
+)
+
+# Highest fd a child closes up to (read before the open file limit is lowered)
+MAXFD = os.sysconf("SC_OPEN_MAX")
+
+# Fields of a result passed on from the child that ran the submission
+RESULT_FIELDS = ("actual", "error", "duration_ms")
+
+class TestTimeout(BaseException):
+    """Raised by the per-test timer; a BaseException so `except Exception` in the submission can't swallow it"""
+
+# First stderr line of an uncaught error in node, Java, .NET or Go
+_ERROR_LINE = re.compile(r"^(?:Exception in thread|Unhandled exception|panic:|[\w.$]*(?:Error|Exception)\b)")
+
+def apply_limits(limits):
+    """Resource limits for this process (and anything it starts)"""
+    cpu = int(limits["cpu_seconds"])
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    output = int(limits["max_file_bytes"])
+    resource.setrlimit(resource.RLIMIT_FSIZE, (output, output))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+def limit_memory(memory_mb):
+    """Address space limit; set once the job is known, since runtimes other than Python need more"""
+    if memory_mb is not None:
+        memory = int(memory_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+def limit_open_files(files):
+    resource.setrlimit(resource.RLIMIT_NOFILE, (int(files), int(files)))
+
+def _on_timer(signum, frame):
+    raise TestTimeout()
+
+def _as_text(value):
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ""
+    return json.dumps(value)
+
+def run_test(code, test, timeout, max_output):
+    """Run one test case in a fresh module namespace"""
+    function = test.get("function")
+    stdout = io.StringIO()
+    namespace = {"__name__": "__main__" if not function else "submission", "__builtins__": builtins}
+    sys.stdin = io.StringIO(_as_text(test.get("input")))
+    actual, error = None, None
+
+    start = time.perf_counter()
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with contextlib.redirect_stdout(stdout):
+            exec(code, namespace)
+            if function:
+                target = namespace.get(function)
+                if not callable(target):
+                    raise NameError(f"function {function!r} is not defined")
+                args = test.get("args", [])
+                actual = target(*args) if isinstance(args, list) else target(args)
+    except TestTimeout:
+        error = f"Timed out after {timeout:g}s"
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = f"Exited with status {e.code}"
+    except MemoryError:
+        error = "Memory limit exceeded"
+    except BaseException as e:
+        frames = traceback.extract_tb(e.__traceback__)
+        line = next((frame.lineno for frame in reversed(frames) if frame.filename == "<submission>"), None)
+        error = f"{type(e).__name__}: {e}" + (f" (line {line})" if line else "")
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        sys.stdin = sys.__stdin__
+    duration_ms = (time.perf_counter() - start) * 1000
+
+    output = stdout.getvalue()
+    if len(output) > max_output:
+        output = output[:max_output]
+        error = error or "Output limit exceeded"
+    if not function:
+        actual = output
+
+    if function and not isinstance(actual, (str, int, float, bool, list, dict, type(None))):
+        actual = repr(actual)
+    return {
+        "actual": actual,
+        "error": error,
+        "duration_ms": round(duration_ms, 3),
+    }
+
+def _exit_error(status, stderr, source_name):
+    """Error message for a test process that failed with `status`"""
+    if "out of memory" in stderr.lower() or "OutOfMemoryError" in stderr:
+        return "Memory limit exceeded"
+    if status < 0:
+        signum = -status
+        if signum == signal.SIGXCPU:
+            return "CPU time limit exceeded"
+        if signum == signal.SIGXFSZ:
+            return "Output limit exceeded"
+        return f"Killed by {signal.Signals(signum).name}" if signum in signal.valid_signals() else f"Killed by signal {signum}"
+    lines = [line.strip() for line in stderr.splitlines() if line.strip()]
+    error = next((line for line in lines if _ERROR_LINE.match(line)), lines[-1] if lines else None)
+    if error is None:
+        return f"Exited with status {status}"
+    line = re.search(re.escape(source_name) + r":(?:line )?(\d+)", stderr) if source_name else None
+    return error[:500] + (f" (line {line.group(1)})" if line else "")
+
+def run_command_test(job, test, timeout, max_output):
+    """Run one test case as a child process: input (or the function call) on stdin, stdout reported"""
+    function = test.get("function")
+    command = job["function_command"] if function else job["command"]
+    if not command:
+        return {"actual": None, "error": f"Function tests are not supported for {job['language']}", "duration_ms": 0.0}
+    if function:
+        stdin = json.dumps({"function": function, "args": test.get("args", [])})
+    else:
+        stdin = _as_text(test.get("input"))
+    actual, error = None, None
+
+    # Output goes to files, so RLIMIT_FSIZE bounds it and this process never buffers more than it reads
+    with open("stdout.txt", "w+b") as stdout, open("stderr.txt", "w+b") as stderr:
+        start = time.perf_counter()
+        try:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=stdout, stderr=stderr, env=job["env"])
+        except OSError as e:
+            return {"actual": None, "error": f"Sandbox could not start {os.path.basename(command[0])}: {e.strerror}",
+                    "duration_ms": 0.0}
+        try:
+            process.communicate(stdin.encode(), timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            error = f"Timed out after {timeout:g}s"
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        stdout.seek(0)
+        output = stdout.read(max_output + 1).decode("utf-8", "replace")
+        stderr.seek(0)
+        errors = stderr.read(16384).decode("utf-8", "replace")
+
+    if error is None and process.returncode != 0:
+        error = _exit_error(process.returncode, errors, job.get("source_name"))
+    if len(output) > max_output:
+        output = output[:max_output]
+        error = error or "Output limit exceeded"
+
+    if not function:
+        actual = output
+    elif error is None:
+        # The harness reports on the last line of its output
+        lines = output.strip().splitlines()
+        try:
+            reply = json.loads(lines[-1]) if lines else None
+        except ValueError:
+            reply = None
+        if not isinstance(reply, dict):
+            error = "Exited without returning a value"
+        elif "error" in reply:
+            error = str(reply["error"])
+        else:
+            actual = reply.get("value")
+
+    return {
+        "actual": actual,
+        "error": error,
+        "duration_ms": round(duration_ms, 3),
+    }
+
+def run_commands(job, send, limits):
+    """Run every test of a job for another language, sending one result per test"""
+    for name, content in job.get("files", {}).items():
+        with open(name, "w") as f:
+            f.write(content)
+    job["env"] = {**job["env"], "HOME": os.getcwd(), "TMPDIR": os.getcwd()}
+    timeout = float(limits["test_timeout_seconds"]) + float(job.get("startup_seconds", 0))
+    for index, test in zip(job["indexes"], job["tests"]):
+        result = run_command_test(job, test, timeout, int(limits["max_output_bytes"]))
+        result["index"] = index
+        send(result)
+
+def run_python(job, report, limits):
+    """Run every test of a Python job in this process, reporting one result per test (in order)"""
+    try:
+        code = compile(job["code"], "<submission>", "exec")
+    except SyntaxError as e:
+        error = f"SyntaxError: {e.msg} (line {e.lineno})"
+        for _ in job["tests"]:
+            report({"actual": None, "error": error, "duration_ms": 0.0})
+        return
+
+    for test in job["tests"]:
+        report(run_test(code, test, float(limits["test_timeout_seconds"]), int(limits["max_output_bytes"])))
+
+def run_isolated(job, send, limits):
+    """
+    Run a Python job in a forked child that keeps only a pipe back to this
+    process (and /dev/null on 0-2), so the submission can't write to the
+    protocol. Only the result fields of each line are passed on, under the
+    index of the next test; a malformed line ends the run.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            os.close(read_fd)
+            os.dup2(write_fd, 3)
+            os.closerange(4, MAXFD)
+            pipe = os.fdopen(3, "w", buffering=1)
+            run_python(job, lambda result: pipe.write(json.dumps(result, default=repr) + "\n"), limits)
+        except BaseException:
+            status = 1
+        finally:
+            os._exit(status)
+
+    os.close(write_fd)
+    indexes = list(job["indexes"])
+    line_limit = 8 * int(limits["max_output_bytes"]) + 65536
+    with os.fdopen(read_fd, "rb") as pipe:
+        while indexes:
+            line = pipe.readline(line_limit)
+            if not line:
+                break
+            try:
+                result = json.loads(line)
+            except ValueError:
+                result = None
+            if not isinstance(result, dict) or not line.endswith(b"\n"):
+                os.kill(pid, signal.SIGKILL)
+                send({"index": indexes.pop(0), "actual": None, "error": "Submission interfered with the test runner",
+                      "duration_ms": 0.0})
+                break
+            send({"index": indexes.pop(0), **{field: result.get(field) for field in RESULT_FIELDS}})
+
+    try:
+        _, status = os.waitpid(pid, 0)
+    except ChildProcessError:
+        return
+    if indexes:
+        # The test that was running when the child ended gets the reason, the rest weren't run
+        code = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        error = _exit_error(code, "", None)
+        send({"index": indexes[0], "actual": None, "error": error, "duration_ms": 0.0})
+        for index in indexes[1:]:
+            send({"index": index, "actual": None, "error": f"Not run: the program ended in an earlier test ({error})",
+                  "duration_ms": 0.0})
+
+def run_job(job, send, limits):
+    """Run every test of a job, sending one result per test"""
+    if "command" in job:
+        run_commands(job, send, limits)
+    else:
+        run_isolated(job, send, limits)
+
+def serve(protocol, read_line, limits, owner=None):
+    """
+    Report ready, read one job and run it. fds 0-2 are pointed at /dev/null
+    first, so writes by the submission can't interleave with the protocol.
+    """
+    signal.signal(signal.SIGALRM, _on_timer)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+
+    workdir = tempfile.mkdtemp(prefix="sandbox-")
+    if owner is not None:
+        os.chown(workdir, *owner)
+        drop_privileges(*owner)
+    os.chdir(workdir)
+    apply_limits(limits)
+
+    def send(message):
+        protocol.write(json.dumps(message, default=repr) + "\n")
+
+    send({"ready": True, "pid": os.getpid(), "workdir": workdir})
+    line = read_line()
+    if not line:
+        return
+    os.dup2(devnull, 0)
+    job = json.loads(line)
+    limit_memory(job.get("memory_mb", limits["memory_mb"]) if "command" in job else limits["memory_mb"])
+    limit_open_files(job.get("max_open_files") or limits["max_open_files"])
+
+    try:
+        run_job(job, send, limits)
+    finally:
+        send({"done": True})
+
+def drop_privileges(uid, gid):
+    """Switch to an unprivileged user for good (only possible when started as root)"""
+    os.setgroups([])
+    os.setgid(gid)
+    os.setuid(uid)
+
+def resolve_owner(user):
+    """(uid, gid) to drop to, or None when not running as root (submissions never run as root)"""
+    if os.getuid() != 0:
+        return None
+    if not user:
+        raise RuntimeError("refusing to run submissions as root: set CODE_RUNNER_SANDBOX_USER")
+    import pwd
+    entry = pwd.getpwnam(user)
+    return entry.pw_uid, entry.pw_gid
+
+def zygote_main(control_fd, limits):
+    """Preload, then fork one child per request until the control socket closes"""
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    owner = resolve_owner(limits.get("sandbox_user"))
+    # Children are never waited for; let the kernel reap them
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    control = socket.socket(fileno=control_fd)
+    # Keep preloaded objects out of future collections, so children don't
+    # dirty (copy) the shared pages by touching their GC headers
+    gc.freeze()
+
+    sys.stdout.write(json.dumps({"ready": True, "pid": os.getpid()}) + "\n")
+    sys.stdout.flush()
+
+    while True:
+        try:
+            message, fds, _, _ = socket.recv_fds(control, 16, 1)
+        except InterruptedError:
+            continue
+        if not message or not fds:
+            return
+
+        pid = os.fork()
+        if pid == 0:
+            control.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            status = 0
+            try:
+                os.setsid()
+                protocol = os.fdopen(os.dup(fds[0]), "w", buffering=1)
+                serve(protocol, os.fdopen(fds[0], "rb").readline, limits, owner)
+            except BaseException:
+                status = 1
+            finally:
+                os._exit(status)
+
+        os.close(fds[0])
+        control.sendall(f"{pid}\n".encode())
+
+def worker_main(limits):
+    """Standalone worker talking over stdin / stdout"""
+    owner = resolve_owner(limits.get("sandbox_user"))
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    serve(protocol, sys.stdin.buffer.readline, limits, owner)
+
+if __name__ == "__main__":
+    if sys.argv[1] == "--zygote":
+        zygote_main(int(sys.argv[2]), json.loads(sys.argv[3]))
+    else:
+        worker_main(json.loads(sys.argv[1]))
@@ -0,0 +1,587 @@
+# backend/app/services/snapshot.py
+import asyncio
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from collections import deque
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.serialization import dumps
+from app.services.compact_path import CompactLearningPath
+from app.services.id_index import IdIndex, IndexEntry
+from app.services.learning_path_service import learning_path_service
+from app.services.path_store import PathStore
+from app.services.progress_service import ProgressService, progress_service
+
+logger = logging.getLogger(__name__)
+
+# File layout (little endian):
+#   header | path bodies (zlib JSON) | strings | path table | id table | extra state (zlib JSON)
+#   | progress events (JSON lines)
+# Both tables are sorted by key so lookups binary-search the memory-mapped file;
+# nothing is parsed at load time besides the header and the extra state.
+# The header ends with the length of the events section (0 in older snapshots).
+MAGIC = b"LPSNAP01"
+HEADER = struct.Struct("<8sQIIQQQQQQ")
+# key offset, key length, version, body offset, body length
+PATH_RECORD = struct.Struct("<IHQQI")
+# key offset, key length, path id offset, path id length, kind, node index, item index
+ID_RECORD = struct.Struct("<IHIHBHh")
+
+KINDS = ["node", "exercise", "quiz", "question"]
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+class SnapshotReader:
+    """Memory-mapped, lazily decoded view of a snapshot file"""
+
+    def __init__(self, path: str):
+        """Map the file and parse the header"""
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            self.created_ns,
+            self.path_count,
+            self.id_count,
+            self._strings_off,
+            self._path_table_off,
+            self._id_table_off,
+            self._state_off,
+            self._state_len,
+            self._events_len,
+        ) = HEADER.unpack_from(self._mm, 0)
+        self._events_off = self._state_off + self._state_len
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a learning path snapshot")
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def get_path(self, path_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Decode one path; returns (path, version)"""
+        record = self._find(path_id.encode(), self._path_table_off, PATH_RECORD, self.path_count)
+        if record is None:
+            return None
+        _, _, version, body_off, body_len = record
+        body = zlib.decompress(self._mm[body_off:body_off + body_len])
+        return json.loads(body), version
+
+    def get_version(self, path_id: str) -> Optional[int]:
+        """Version of a path without decoding it"""
+        record = self._find(path_id.encode(), self._path_table_off, PATH_RECORD, self.path_count)
+        return record[2] if record is not None else None
+
+    def lookup_id(self, entity_id: str) -> Optional[IndexEntry]:
+        """Find an entity in the snapshot's ID index"""
+        record = self._find(entity_id.encode(), self._id_table_off, ID_RECORD, self.id_count)
+        if record is None:
+            return None
+        _, _, path_off, path_len, kind, node_index, item_index = record
+        return IndexEntry(
+            KINDS[kind],
+            self._string(path_off, path_len),
+            node_index,
+            item_index if item_index >= 0 else None,
+        )
+
+    def iter_raw_paths(self) -> Iterator[Tuple[str, int, bytes]]:
+        """Yield (path_id, version, compressed body) without decoding"""
+        for i in range(self.path_count):
+            key_off, key_len, version, body_off, body_len = PATH_RECORD.unpack_from(
+                self._mm, self._path_table_off + i * PATH_RECORD.size
+            )
+            yield self._string(key_off, key_len), version, self._mm[body_off:body_off + body_len]
+
+    def iter_versions(self) -> Iterator[Tuple[str, int]]:
+        """Yield (path_id, version) of every path, bodies untouched"""
+        for i in range(self.path_count):
+            key_off, key_len, version, _, _ = PATH_RECORD.unpack_from(
+                self._mm, self._path_table_off + i * PATH_RECORD.size
+            )
+            yield self._string(key_off, key_len), version
+
+    def iter_ids(self) -> Iterator[Tuple[str, IndexEntry]]:
+        """Yield every (entity_id, entry) of the ID index"""
+        for i in range(self.id_count):
+            key_off, key_len, path_off, path_len, kind, node_index, item_index = ID_RECORD.unpack_from(
+                self._mm, self._id_table_off + i * ID_RECORD.size
+            )
+            yield self._string(key_off, key_len), IndexEntry(
+                KINDS[kind],
+                self._string(path_off, path_len),
+                node_index,
+                item_index if item_index >= 0 else None,
+            )
+
+    def get_state(self) -> Dict[str, Any]:
+        """Decode the extra (non path) state section"""
+        if not self._state_len:
+            return {}
+        raw = self._mm[self._state_off:self._state_off + self._state_len]
+        return json.loads(zlib.decompress(raw))
+
+    def iter_raw_events(self, last: Optional[int] = None) -> Iterator[bytes]:
+        """Yield stored progress events as JSON lines without decoding; only the newest `last` if given"""
+        start, end = self._events_off, self._events_off + self._events_len
+        if last is not None:
+            # Walk back from the end, so skipped events are never scanned
+            start = end
+            for _ in range(last):
+                if start == self._events_off:
+                    break
+                start = self._mm.rfind(b"\n", self._events_off, start - 1) + 1 or self._events_off
+        while start < end:
+            stop = self._mm.find(b"\n", start, end)
+            yield self._mm[start:stop]
+            start = stop + 1
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_off + offset
+        return self._mm[start:start + length].decode()
+
+    def _find(self, key: bytes, table_off: int, record: struct.Struct, count: int):
+        low, high = 0, count - 1
+        while low <= high:
+            mid = (low + high) // 2
+            values = record.unpack_from(self._mm, table_off + mid * record.size)
+            start = self._strings_off + values[0]
+            probe = self._mm[start:start + values[1]]
+            if probe == key:
+                return values
+            if probe < key:
+                low = mid + 1
+            else:
+                high = mid - 1
+        return None
+
+class SnapshotSet:
+    """
+    The snapshots left by every worker, read as one.
+
+    Each worker writes its own file, so lookups search all of them and take
+    the newest version of a path. What the next snapshot carries forward
+    (the iter_* methods) only comes from the files this worker claimed:
+    files of workers that are gone, each claimed by exactly one worker, so
+    carried paths and events are not multiplied across the new files.
+    """
+
+    def __init__(self, readers: List[SnapshotReader], claimed: List[SnapshotReader]):
+        """Readers of every file; claimed ones are carried forward by this worker"""
+        # Newest first, so lookups and carried IDs prefer the latest snapshot
+        self.readers = sorted(readers, key=lambda reader: reader.created_ns, reverse=True)
+        self.claimed = [reader for reader in self.readers if reader in claimed]
+        self._released = False
+
+    @property
+    def path_count(self) -> int:
+        return sum(reader.path_count for reader in self.readers)
+
+    @property
+    def id_count(self) -> int:
+        return sum(reader.id_count for reader in self.readers)
+
+    def close(self) -> None:
+        for reader in self.readers:
+            reader.close()
+
+    def get_path(self, path_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Decode the newest version of a path found in any file"""
+        best = None
+        for reader in self.readers:
+            version = reader.get_version(path_id)
+            if version is not None and (best is None or version > best[0]):
+                best = (version, reader)
+        return best[1].get_path(path_id) if best is not None else None
+
+    def get_version(self, path_id: str) -> Optional[int]:
+        versions = [reader.get_version(path_id) for reader in self.readers]
+        versions = [version for version in versions if version is not None]
+        return max(versions) if versions else None
+
+    def lookup_id(self, entity_id: str) -> Optional[IndexEntry]:
+        for reader in self.readers:
+            entry = reader.lookup_id(entity_id)
+            if entry is not None:
+                return entry
+        return None
+
+    def iter_raw_paths(self) -> Iterator[Tuple[str, int, bytes]]:
+        """Newest version of every path in the claimed files"""
+        if len(self.claimed) == 1:
+            yield from self.claimed[0].iter_raw_paths()
+            return
+        newest: Dict[str, int] = {}
+        for reader in self.claimed:
+            for path_id, version in reader.iter_versions():
+                if version > newest.get(path_id, -1):
+                    newest[path_id] = version
+        for reader in self.claimed:
+            for path_id, version, body in reader.iter_raw_paths():
+                if newest.get(path_id) == version:
+                    del newest[path_id]
+                    yield path_id, version, body
+
+    def iter_ids(self) -> Iterator[Tuple[str, IndexEntry]]:
+        seen = set()
+        for reader in self.claimed:
+            for entity_id, entry in reader.iter_ids():
+                if entity_id not in seen:
+                    seen.add(entity_id)
+                    yield entity_id, entry
+
+    def iter_raw_events(self, last: Optional[int] = None) -> Iterator[bytes]:
+        """Events of the claimed files, oldest file first; only the newest `last` if given"""
+        events = (line for reader in reversed(self.claimed) for line in reader.iter_raw_events(last))
+        return iter(deque(events, maxlen=last)) if last is not None else events
+
+    def release_claims(self) -> None:
+        """
+        Remove the claimed files once this worker's own snapshot holds their
+        content. They stay mapped (and locked) until close; a file that was
+        replaced in the meantime (the previous run's file of a worker with
+        this pid) is left alone.
+        """
+        if self._released:
+            return
+        self._released = True
+        for reader in self.claimed:
+            try:
+                if os.stat(reader.path).st_ino == os.fstat(reader._file.fileno()).st_ino:
+                    os.unlink(reader.path)
+            except FileNotFoundError:
+                pass
+
+def snapshot_files(path: str) -> List[Tuple[str, Optional[int]]]:
+    """
+    (file, writer pid) of the snapshots under a configured path: one
+    "<path>.<pid>" per worker, and the single file older versions wrote at
+    the path itself (no pid).
+    """
+    directory = os.path.dirname(path) or "."
+    prefix = os.path.basename(path) + "."
+    files: List[Tuple[str, Optional[int]]] = [(path, None)] if os.path.exists(path) else []
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                files.append((os.path.join(directory, name), int(name[len(prefix):])))
+    return files
+
+def _claim(reader: SnapshotReader, pid: Optional[int]) -> bool:
+    """Take a snapshot no running worker writes anymore, so only this worker carries it forward"""
+    if pid is not None and pid != os.getpid() and _process_alive(pid):
+        return False
+    fd = reader._file.fileno()
+    try:
+        # Held until the reader is closed; a worker that loses the race only reads the file
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # Already carried forward and removed (or replaced) by a worker that claimed it first
+        return os.stat(reader.path).st_ino == os.fstat(fd).st_ino
+    except OSError:
+        return False
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def write_snapshot(
+    path: str,
+    paths: Iterable[Tuple[str, int, Any, Optional[bytes]]],
+    ids: Iterable[Tuple[str, IndexEntry]],
+    state: Optional[Dict[str, Any]] = None,
+    events: Iterable[bytes] = ()
+) -> Dict[str, Any]:
+    """
+    Write a snapshot atomically (temp file, fsync, rename). Each call writes
+    its own temp file, so concurrent writers never interleave; the last
+    rename wins (workers write separate files, see StateSnapshotter).
+
+    Args:
+        paths: (path_id, version, path, already compressed body) tuples; the
+            body is used as-is when given, otherwise the path (a dict or a
+            CompactLearningPath) is encoded
+        ids: (entity_id, entry) pairs of the ID index
+        state: extra JSON-serializable state stored alongside the paths
+        events: progress events, each encoded as one line of JSON
+    """
+    started = time.perf_counter()
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        result = _write_snapshot_file(fd, paths, ids, state, events)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+    result["bytes"] = os.path.getsize(path)
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+def _write_snapshot_file(
+    fd: int,
+    paths: Iterable[Tuple[str, int, Any, Optional[bytes]]],
+    ids: Iterable[Tuple[str, IndexEntry]],
+    state: Optional[Dict[str, Any]],
+    events: Iterable[bytes]
+) -> Dict[str, Any]:
+    """Write and fsync the snapshot body to an open file; returns record counts"""
+
+    strings = bytearray()
+    string_offsets: Dict[str, int] = {}
+
+    def intern(value: str) -> Tuple[int, int]:
+        if value not in string_offsets:
+            string_offsets[value] = len(strings)
+            strings.extend(value.encode())
+        return string_offsets[value], len(value.encode())
+
+    path_records: List[Tuple[bytes, tuple]] = []
+    with open(fd, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        offset = HEADER.size
+
+        for path_id, version, value, body in paths:
+            if body is None:
+                raw = value.to_json() if isinstance(value, CompactLearningPath) else dumps(value)
+                body = zlib.compress(raw, 1)
+            f.write(body)
+            key_off, key_len = intern(path_id)
+            path_records.append((path_id.encode(), (key_off, key_len, version, offset, len(body))))
+            offset += len(body)
+
+        id_records = []
+        for entity_id, entry in ids:
+            key_off, key_len = intern(entity_id)
+            path_off, path_len = intern(entry.path_id)
+            item_index = -1 if entry.item_index is None else entry.item_index
+            id_records.append((
+                entity_id.encode(),
+                (key_off, key_len, path_off, path_len, KIND_CODES[entry.kind], entry.node_index, item_index),
+            ))
+
+        strings_off = offset
+        f.write(strings)
+        offset += len(strings)
+
+        path_records.sort(key=lambda item: item[0])
+        path_table_off = offset
+        for _, values in path_records:
+            f.write(PATH_RECORD.pack(*values))
+        offset += len(path_records) * PATH_RECORD.size
+
+        id_records.sort(key=lambda item: item[0])
+        id_table_off = offset
+        for _, values in id_records:
+            f.write(ID_RECORD.pack(*values))
+        offset += len(id_records) * ID_RECORD.size
+
+        state_raw = zlib.compress(dumps(state), 1) if state else b""
+        state_off = offset
+        f.write(state_raw)
+
+        events_len = 0
+        event_count = 0
+        for line in events:
+            f.write(line)
+            f.write(b"\n")
+            events_len += len(line) + 1
+            event_count += 1
+
+        f.seek(0)
+        f.write(HEADER.pack(
+            MAGIC,
+            time.time_ns(),
+            len(path_records),
+            len(id_records),
+            strings_off,
+            path_table_off,
+            id_table_off,
+            state_off,
+            len(state_raw),
+            events_len,
+        ))
+        f.flush()
+        os.fsync(f.fileno())
+
+    return {"paths": len(path_records), "ids": len(id_records), "events": event_count}
+
+class StateSnapshotter:
+    """
+    Periodic, crash-safe snapshots of in-process state for warm restarts.
+
+    The path store, the entity ID index and the in-memory progress stores are
+    written every interval (and at shutdown) from a background thread. At
+    startup the snapshots are memory-mapped and attached to the store, the
+    index and the progress log, which read from them lazily, so restoring does
+    not depend on how many paths or events they hold. Caches warm up from the store on first access.
+
+    Every worker process holds its own state, so each writes its own file,
+    "<path>.<pid>", and every worker loads all of them (see SnapshotSet).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        interval: float,
+        store: PathStore,
+        id_index: IdIndex,
+        progress: ProgressService
+    ):
+        """Initialize the snapshotter; without a path snapshots are disabled"""
+        self.path = path
+        self.interval = interval
+        self.store = store
+        self.id_index = id_index
+        self.progress = progress
+        self.reader: Optional[SnapshotSet] = None
+        self.last_result: Dict[str, Any] = {}
+        self._lock = asyncio.Lock()
+        self._timer_task: Optional[asyncio.Task] = None
+        metrics.register_collector("snapshot", self.get_stats)
+
+    def load(self) -> bool:
+        """Attach the snapshots left by the previous run (or by other running workers), if any"""
+        if not self.path:
+            return False
+
+        started = time.perf_counter()
+        readers, claimed, states = [], [], []
+        for file, pid in snapshot_files(self.path):
+            try:
+                reader = SnapshotReader(file)
+            except FileNotFoundError:
+                # Carried forward and removed by another worker since it was listed
+                continue
+            except Exception as e:
+                logger.error(f"Ignoring unreadable snapshot {file}: {str(e)}")
+                continue
+            try:
+                states.append((reader.created_ns, reader.get_state()))
+            except Exception as e:
+                logger.error(f"Ignoring unreadable snapshot {file}: {str(e)}")
+                reader.close()
+                continue
+            readers.append(reader)
+            if _claim(reader, pid):
+                claimed.append(reader)
+        if not readers:
+            return False
+
+        snapshots = SnapshotSet(readers, claimed)
+        self.reader = snapshots
+        self.store.snapshot = snapshots
+        self.id_index.snapshot = snapshots
+        self.progress.snapshot = snapshots
+        # Oldest first, so the newest copy of a progress row wins
+        for _, state in sorted(states, key=lambda item: item[0]):
+            self.progress.import_state(state.get("progress", {}))
+        elapsed = time.perf_counter() - started
+        metrics.observe("snapshot_load_seconds", elapsed)
+        logger.info(
+            f"Loaded {len(readers)} snapshots ({len(claimed)} carried forward by this worker) with "
+            f"{snapshots.path_count} paths and {snapshots.id_count} IDs in {elapsed:.3f}s"
+        )
+        return True
+
+    async def start(self) -> None:
+        """Start the periodic snapshot loop"""
+        if self.path and self._timer_task is None:
+            self._timer_task = asyncio.create_task(self._snapshot_periodically())
+            logger.info(f"State snapshots enabled (interval={self.interval}s, path={self.path})")
+
+    async def stop(self) -> None:
+        """Stop the loop, take a final snapshot and release the loaded one"""
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+            try:
+                await self._timer_task
+            except asyncio.CancelledError:
+                pass
+            self._timer_task = None
+        if self.path:
+            await self.take_snapshot()
+        if self.reader is not None:
+            self.store.snapshot = None
+            self.id_index.snapshot = None
+            self.progress.snapshot = None
+            self.reader.close()
+            self.reader = None
+
+    async def take_snapshot(self) -> Dict[str, Any]:
+        """Write a snapshot of the current state"""
+        async with self._lock:
+            # Collect references on the event loop; encoding and I/O happen in a thread
+            paths = self.store.snapshot_records()
+            ids = self.id_index.snapshot_entries()
+            state = {"progress": self.progress.export_state()}
+            events = self.progress.snapshot_events()
+            path = self.worker_path()
+            try:
+                result = await asyncio.to_thread(write_snapshot, path, paths, ids, state, events)
+            except Exception as e:
+                logger.error(f"Error writing snapshot {path}: {str(e)}")
+                metrics.inc("snapshot_failures")
+                return {}
+            if self.reader is not None:
+                # This worker's file now holds what it carried from the claimed ones
+                self.reader.release_claims()
+
+            self.last_result = result
+            metrics.inc("snapshots_written")
+            metrics.observe("snapshot_write_seconds", result["seconds"])
+            logger.info(
+                f"Wrote snapshot: {result['paths']} paths, {result['ids']} IDs, "
+                f"{result['events']} progress events, {result['bytes']} bytes"
+            )
+            return result
+
+    def worker_path(self) -> str:
+        """This worker's snapshot file"""
+        return f"{self.path}.{os.getpid()}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot statistics for the metrics endpoint"""
+        return {
+            "enabled": bool(self.path),
+            "loaded_files": len(self.reader.readers) if self.reader is not None else 0,
+            "loaded_paths": self.reader.path_count if self.reader is not None else 0,
+            "snapshots_written": metrics.get("snapshots_written"),
+            "failures": metrics.get("snapshot_failures"),
+            "last": self.last_result,
+        }
+
+    async def _snapshot_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.take_snapshot()
+
+state_snapshotter = StateSnapshotter(
+    settings.SNAPSHOT_PATH,
+    settings.SNAPSHOT_INTERVAL_SECONDS,
+    learning_path_service.store,
+    learning_path_service.id_index,
+    progress_service,
+)
@@ -0,0 +1,190 @@
+# backend/app/services/submission_cache.py
+import ast
+import asyncio
+import hashlib
+import io
+import logging
+import re
+import tokenize
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# String literals, comments and other tokens of C-like languages (java, c#, go, js/ts)
+_C_LIKE_TOKEN = re.compile(
+    r'''(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|`(?:\\.|[^`\\])*`)'''
+    r'''|(?P<comment>//[^\n]*|/\*.*?\*/)'''
+    r'''|(?P<space>\s+)'''
+    r'''|(?P<token>\w+|.)''',
+    re.DOTALL,
+)
+
+def _python_normal_form(code: str) -> str:
+    try:
+        # The AST ignores whitespace, comments, redundant parentheses and quote style
+        return "ast:" + ast.dump(ast.parse(code))
+    except (SyntaxError, ValueError):
+        pass
+    try:
+        # Code that doesn't parse still fails the same way if only comments and
+        # indentation width changed. INDENT tokens carry the indentation text;
+        # only the nesting matters, so layout tokens are kept by type
+        tokens = [
+            token.string if token.string.strip() else tokenize.tok_name[token.type]
+            for token in tokenize.generate_tokens(io.StringIO(code).readline)
+            if token.type not in (tokenize.COMMENT, tokenize.NL)
+        ]
+        return "tok:" + " ".join(tokens)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return "raw:" + "\n".join(line.rstrip() for line in code.strip().splitlines())
+
+def c_like_tokens(code: str) -> Iterator[Tuple[str, str]]:
+    """(kind, text) of each string literal ("string") and other token ("token"), without comments or whitespace"""
+    for match in _C_LIKE_TOKEN.finditer(code):
+        if match.lastgroup in ("string", "token"):
+            yield match.lastgroup, match.group()
+
+# Languages where a line break can end a statement (automatic semicolon insertion)
+_NEWLINE_SENSITIVE = {"javascript", "typescript", "go"}
+
+def _c_like_normal_form(code: str, keep_newlines: bool = False) -> str:
+    # With keep_newlines, whitespace or comments spanning a line break leave one
+    # newline token: `return\n1` and `return 1` differ in JS and Go
+    parts = []
+    for match in _C_LIKE_TOKEN.finditer(code):
+        if match.lastgroup in ("string", "token"):
+            parts.append(match.group())
+        elif keep_newlines and parts and parts[-1] != "\n" and "\n" in match.group():
+            parts.append("\n")
+    if parts and parts[-1] == "\n":
+        parts.pop()
+    return "tok:" + " ".join(parts)
+
+def normalize_code(code: str, language: Optional[str] = "python") -> str:
+    """
+    Canonical form of a submission: two submissions with the same form only
+    differ in whitespace, comments or (for Python) formatting. Line breaks
+    count for JavaScript, TypeScript and Go.
+    """
+    language = (language or "python").lower()
+    if language == "python":
+        return _python_normal_form(code)
+    return _c_like_normal_form(code, keep_newlines=language in _NEWLINE_SENSITIVE)
+
+# blake2b(language, raw code) -> digest of its normal form; exact resubmissions skip parsing
+_normal_form_digests: LRUCache[str] = LRUCache(4096)
+
+def normal_form_digest(code: str, language: Optional[str] = "python") -> str:
+    """Digest of normalize_code(code, language), memoized by the raw code"""
+    language = (language or "python").lower()
+    raw_key = hashlib.blake2b(language.encode() + b"\0" + code.encode(), digest_size=16).hexdigest()
+    digest = _normal_form_digests.get(raw_key)
+    if digest is None:
+        digest = hashlib.blake2b(normalize_code(code, language).encode(), digest_size=16).hexdigest()
+        _normal_form_digests.set(raw_key, digest)
+    return digest
+
+def exercise_version(exercise: Dict[str, Any]) -> str:
+    """Hash of everything about an exercise that results depend on; changes when it is edited or regenerated"""
+    return hashlib.blake2b(dumps(exercise, sort_keys=True), digest_size=12).hexdigest()
+
+def submission_fingerprint(exercise: Dict[str, Any], code: str, language: Optional[str] = "python") -> str:
+    """Fingerprint of (exercise version, language, normalized code)"""
+    language = (language or "python").lower()
+    key = f"{exercise_version(exercise)}\0{language}\0{normal_form_digest(code, language)}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+class SubmissionCache:
+    """
+    Test results and AI evaluations by submission fingerprint.
+
+    Learners often resubmit unchanged code, or code that only differs in
+    whitespace and comments; those submissions share a fingerprint and are
+    answered from here without running the sandbox or calling the model.
+    Concurrent identical submissions share one computation.
+
+    For Python the fingerprint is the AST, which has no line numbers, so a
+    cached error message may point at the line from the first submission.
+    """
+
+    KINDS = ("tests", "evaluation")
+
+    def __init__(self, max_entries: int = 2000):
+        """Initialize the cache"""
+        self.entries: LRUCache[Any] = LRUCache(max_entries)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        metrics.register_collector("submission_cache", self.get_stats)
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        """Cached value, counting a hit or miss"""
+        value = self.entries.get(f"{kind}:{key}")
+        metrics.inc(f"submission_cache_{kind}_{'hits' if value is not None else 'misses'}")
+        return value
+
+    def peek(self, kind: str, key: str) -> Optional[Any]:
+        """Cached value without counting a hit or miss (or updating recency)"""
+        return self.entries.peek(f"{kind}:{key}")
+
+    def set(self, kind: str, key: str, value: Any) -> None:
+        self.entries.set(f"{kind}:{key}", value)
+
+    async def get_or_compute(
+        self,
+        kind: str,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True
+    ) -> Tuple[Any, bool]:
+        """
+        (value, reused): the cached value, or compute, cache and return it.
+        Callers arriving while the same key is being computed wait for that
+        result instead. Values are shared; don't modify them.
+        """
+        value = self.get(kind, key)
+        if value is not None:
+            return value, True
+
+        cache_key = f"{kind}:{key}"
+        in_flight = self._in_flight.get(cache_key)
+        if in_flight is not None:
+            metrics.inc(f"submission_cache_{kind}_coalesced")
+            return await asyncio.shield(in_flight), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters (if any) see the exception; don't warn when there are none
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if cacheable(value):
+                self.set(kind, key, value)
+            return value, False
+        finally:
+            del self._in_flight[cache_key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics for the metrics endpoint"""
+        stats: Dict[str, Any] = {"entries": len(self.entries)}
+        for kind in self.KINDS:
+            stats[kind] = {
+                "hit_ratio": metrics.ratio(f"submission_cache_{kind}_hits", f"submission_cache_{kind}_misses"),
+                "hits": metrics.get(f"submission_cache_{kind}_hits"),
+                "misses": metrics.get(f"submission_cache_{kind}_misses"),
+                "coalesced": metrics.get(f"submission_cache_{kind}_coalesced"),
+            }
+        return stats
+
+submission_cache = SubmissionCache(settings.SUBMISSION_CACHE_MAX_ENTRIES)
@@ -0,0 +1,878 @@
+# backend/app/services/toolchains.py
+"""
+Compilers and runtimes for submissions in languages other than Python.
+
+Each language has a Toolchain: the binaries it needs, how a learner's file
+is compiled (if at all) and how the result is run, per test, inside the
+sandbox. Languages whose binaries aren't installed are reported as
+unavailable up front instead of failing at run time.
+
+Build outputs live in a content-addressed cache on disk
+(CODE_RUNNER_BUILD_CACHE_DIR):
+    harnesses/<key>        test harness and compile server, built once per toolchain version
+    builds/<key>           a learner's compiled file, by toolchain and source
+    toolchains/<language>  the toolchain's own caches (Go build cache, NuGet
+                           packages), so dependencies are compiled or fetched once
+Compilation happens in warm workspaces, CODE_RUNNER_COMPILE_WORKERS per
+language. A workspace keeps the project scaffold, its restored
+dependencies and (Java, TypeScript) a compile server process between
+builds, so each build only compiles the learner's file.
+
+Compilers never execute the learner's code. They run with time, CPU and file
+size limits and, when the server runs as root, as CODE_RUNNER_COMPILE_USER,
+which owns the workspaces and toolchain caches. Published builds and
+harnesses are handed back to the server user, so neither compilers nor the
+sandbox user can change them; the sandbox user can only read them.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import resource
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+HARNESS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "harnesses")
+
+# Largest file a compiler may write (its outputs and cache entries)
+COMPILE_MAX_FILE_BYTES = 512 * 1024 * 1024
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+def expand(template: str, variables: Dict[str, str]) -> str:
+    """Fill in {name} placeholders; unknown names (and other braces) are left alone"""
+    return _PLACEHOLDER.sub(lambda match: variables.get(match.group(1), match.group()), template)
+
+class Toolchain:
+    """How submissions in one language are built and run"""
+
+    def __init__(
+        self,
+        language: str,
+        binaries: Tuple[str, ...],
+        version: List[str],
+        source_name: str,
+        run: List[str],
+        function_run: Optional[List[str]] = None,
+        compile: Optional[List[str]] = None,
+        compile_server: Optional[List[str]] = None,
+        harness: Tuple[str, ...] = (),
+        harness_build: Optional[List[str]] = None,
+        scaffold: Optional[Dict[str, str]] = None,
+        prepare: Optional[List[str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        run_env: Optional[Dict[str, str]] = None,
+        configure: Optional[Callable[[Dict[str, str]], Dict[str, str]]] = None,
+        address_space_overhead_mb: Optional[int] = None,
+        max_open_files: Optional[int] = None,
+        startup_seconds: float = 0.5,
+    ):
+        """
+        Commands are argument lists whose {name} placeholders are filled in
+        with binary paths, {src}, {out} (compiling), {artifact} (cached
+        build), {harness}, {cache} (the toolchain's cache dir) and {heap_mb}.
+
+        Args:
+            binaries: executables looked up on CODE_RUNNER_TOOLCHAIN_PATH
+            version: command whose output identifies the toolchain version
+            source_name: file name the learner's code is saved as
+            run: runs the program with a test's input on stdin
+            function_run: runs a function test (reads {"function", "args"} on
+                stdin, prints {"value"} or {"error"}); None if unsupported
+            compile: compiles {src} into {out}; None for interpreted languages
+            compile_server: long-lived compiler answering {"source", "out"}
+                requests, used instead of `compile` while it works
+            harness: files from harnesses/ copied into the harness cache entry
+            harness_build: run once in the harness entry (e.g. to compile it)
+            scaffold: project files each workspace starts with
+            prepare: run once per workspace to restore and warm up dependencies
+            env: extra environment for compiling
+            run_env: extra environment for running
+            configure: extra variables derived from the binary paths and
+                version; raises ValueError if the toolchain can't be used
+            address_space_overhead_mb: address space allowed on top of the heap;
+                None for runtimes that reserve large ranges up front, whose heap
+                flags bound memory instead
+            max_open_files: open file limit, if the runtime needs more than CODE_RUNNER_MAX_OPEN_FILES
+            startup_seconds: added to each test's time limit for runtime startup
+        """
+        self.language = language
+        self.binaries = binaries
+        self.version = version
+        self.source_name = source_name
+        self.run = run
+        self.function_run = function_run
+        self.compile = compile
+        self.compile_server = compile_server
+        self.harness = harness
+        self.harness_build = harness_build
+        self.scaffold = scaffold or {}
+        self.prepare = prepare
+        self.env = env or {}
+        self.run_env = run_env or {}
+        self.configure = configure
+        self.address_space_overhead_mb = address_space_overhead_mb
+        self.max_open_files = max_open_files
+        self.startup_seconds = startup_seconds
+
+    @property
+    def compiled(self) -> bool:
+        return self.compile is not None or self.compile_server is not None
+
+def _typescript_variables(variables: Dict[str, str]) -> Dict[str, str]:
+    # tsc is node_modules/typescript/bin/tsc; the compiler API is next to it
+    library = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(variables["tsc"]))), "lib", "typescript.js")
+    if not os.path.isfile(library):
+        raise ValueError("typescript library not found next to tsc")
+    return {"typescript_lib": library}
+
+def _dotnet_variables(variables: Dict[str, str]) -> Dict[str, str]:
+    match = re.match(r"(\d+)\.", variables["version"])
+    if not match:
+        raise ValueError(f"unrecognized dotnet version {variables['version']!r}")
+    return {"framework": f"net{match.group(1)}.0"}
+
+_NODE_RUN = ["{node}", "--max-old-space-size={heap_mb}", "--stack-size=4096"]
+_JAVA_RUN = ["{java}", "-Xmx{heap_mb}m", "-Xss64m", "-XX:+UseSerialGC", "-XX:TieredStopAtLevel=1", "-Xshare:auto"]
+
+_GO_WARMUP = """package main
+
+import (
+\t"bufio"
+\t"fmt"
+\t"math"
+\t"os"
+\t"sort"
+\t"strconv"
+\t"strings"
+)
+
+func main() {
+\treader := bufio.NewReader(os.Stdin)
+\tline, _ := reader.ReadString('\\n')
+\tfields := strings.Fields(line)
+\tsort.Strings(fields)
+\tn, _ := strconv.Atoi(strings.Join(fields, ""))
+\tfmt.Println(math.Sqrt(float64(n)))
+}
+"""
+
+_CSHARP_PROJECT = """<Project Sdk="Microsoft.NET.Sdk">
+  <PropertyGroup>
+    <OutputType>Exe</OutputType>
+    <TargetFramework>{framework}</TargetFramework>
+    <AssemblyName>Solution</AssemblyName>
+    <ImplicitUsings>enable</ImplicitUsings>
+    <Nullable>disable</Nullable>
+    <InvariantGlobalization>true</InvariantGlobalization>
+    <UseAppHost>false</UseAppHost>
+  </PropertyGroup>
+</Project>
+"""
+
+_DOTNET_ENV = {
+    "DOTNET_CLI_HOME": "{cache}",
+    "DOTNET_CLI_TELEMETRY_OPTOUT": "1",
+    "DOTNET_NOLOGO": "1",
+    "DOTNET_SKIP_FIRST_TIME_EXPERIENCE": "1",
+}
+
+TOOLCHAINS: Dict[str, Toolchain] = {
+    "javascript": Toolchain(
+        "javascript",
+        binaries=("node",),
+        version=["{node}", "--version"],
+        source_name="solution.js",
+        run=_NODE_RUN + ["solution.js"],
+        function_run=_NODE_RUN + ["{harness}/function_harness.js", "solution.js"],
+        harness=("function_harness.js",),
+        address_space_overhead_mb=1024,
+    ),
+    "typescript": Toolchain(
+        "typescript",
+        binaries=("node", "tsc"),
+        version=["{tsc}", "--version"],
+        source_name="solution.ts",
+        compile_server=["{node}", "{harness}/transpile_server.js", "{typescript_lib}"],
+        run=_NODE_RUN + ["{artifact}/solution.js"],
+        function_run=_NODE_RUN + ["{harness}/function_harness.js", "{artifact}/solution.js"],
+        harness=("function_harness.js", "transpile_server.js"),
+        configure=_typescript_variables,
+        address_space_overhead_mb=1024,
+    ),
+    "java": Toolchain(
+        "java",
+        binaries=("javac", "java"),
+        version=["{javac}", "-version"],
+        source_name="Main.java",
+        compile=["{javac}", "-proc:none", "-encoding", "UTF-8", "-nowarn", "-d", "{out}", "{src}"],
+        compile_server=["{java}", "-XX:+UseSerialGC", "-cp", "{harness}", "CompileServer"],
+        run=_JAVA_RUN + ["-cp", "{artifact}", "Main"],
+        harness=("CompileServer.java",),
+        harness_build=["{javac}", "-d", ".", "CompileServer.java"],
+        max_open_files=256,
+        startup_seconds=1.0,
+    ),
+    "go": Toolchain(
+        "go",
+        binaries=("go",),
+        version=["{go}", "version"],
+        source_name="main.go",
+        compile=["{go}", "build", "-trimpath", "-o", "{out}/main", "."],
+        run=["{artifact}/main"],
+        scaffold={"go.mod": "module solution\n\ngo 1.18\n", "main.go": _GO_WARMUP},
+        prepare=["{go}", "build", "-o", os.devnull, "."],
+        env={
+            "GOCACHE": "{cache}/go-build",
+            "GOPATH": "{cache}/gopath",
+            "GOFLAGS": "-mod=mod",
+            "GOPROXY": "off",
+            "GOTOOLCHAIN": "local",
+            "CGO_ENABLED": "0",
+        },
+        run_env={"GOMEMLIMIT": "{heap_mb}MiB", "GOMAXPROCS": "1"},
+        address_space_overhead_mb=512,
+        startup_seconds=0.2,
+    ),
+    "csharp": Toolchain(
+        "csharp",
+        binaries=("dotnet",),
+        version=["{dotnet}", "--version"],
+        source_name="Program.cs",
+        compile=["{dotnet}", "build", "--no-restore", "-c", "Release", "-o", "{out}", "-nologo", "-v", "q", "-clp:NoSummary"],
+        run=["{dotnet}", "{artifact}/Solution.dll"],
+        scaffold={"Solution.csproj": _CSHARP_PROJECT, "Program.cs": 'System.Console.WriteLine("ready");\n'},
+        prepare=["{dotnet}", "build", "-c", "Release", "-o", "warmup", "-nologo", "-v", "q"],
+        env={**_DOTNET_ENV, "NUGET_PACKAGES": "{cache}/nuget"},
+        run_env={"DOTNET_CLI_TELEMETRY_OPTOUT": "1", "DOTNET_NOLOGO": "1", "DOTNET_GCHeapHardLimit": "{heap_hex}"},
+        configure=_dotnet_variables,
+        max_open_files=256,
+        startup_seconds=1.0,
+    ),
+}
+
+def _content_key(*parts: str) -> str:
+    return hashlib.blake2b("\0".join(parts).encode(), digest_size=16).hexdigest()
+
+def _compile_owner() -> Optional[Tuple[int, int]]:
+    """(uid, gid) compilers switch to, or None when not running as root"""
+    user = settings.CODE_RUNNER_COMPILE_USER
+    if not user or os.getuid() != 0:
+        return None
+    import pwd
+    try:
+        entry = pwd.getpwnam(user)
+    except KeyError:
+        raise RuntimeError(f"compile user {user} does not exist") from None
+    return entry.pw_uid, entry.pw_gid
+
+def _give_to(path: str, owner: Optional[Tuple[int, int]]) -> None:
+    """Change the owner of a directory tree (symlinks themselves, never their targets)"""
+    if owner is None:
+        return
+    os.chown(path, *owner, follow_symlinks=False)
+    for directory, names, files in os.walk(path):
+        for name in names + files:
+            os.chown(os.path.join(directory, name), *owner, follow_symlinks=False)
+
+def _compiler_setup(cpu_seconds: Optional[float]) -> Callable[[], None]:
+    """
+    preexec_fn for compilers: no core dumps, bounded files and CPU time. It
+    runs in the forked child of a threaded server, so it only sets rlimits;
+    the compile user is switched to by Popen itself (_as_owner).
+    """
+    def setup() -> None:
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (COMPILE_MAX_FILE_BYTES, COMPILE_MAX_FILE_BYTES))
+        if cpu_seconds is not None:
+            cpu = int(cpu_seconds) + 1
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    return setup
+
+def _as_owner(owner: Optional[Tuple[int, int]]) -> Dict[str, Any]:
+    """Popen arguments that run a compiler as `owner`, without supplementary groups"""
+    if owner is None:
+        return {}
+    return {"user": owner[0], "group": owner[1], "extra_groups": []}
+
+async def _run_process(
+    command: List[str],
+    cwd: str,
+    env: Dict[str, str],
+    timeout: float,
+    owner: Optional[Tuple[int, int]]
+) -> Tuple[int, str]:
+    """
+    (exit status, combined output) of a build command run as `owner`; kills
+    its process group on timeout
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        cwd=cwd,
+        env=env,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True,
+        # Compilers use several threads: wall time is bounded by the timeout, CPU time across them by this
+        preexec_fn=_compiler_setup(timeout * (os.cpu_count() or 1)),
+        **_as_owner(owner),
+    )
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except BaseException:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await process.wait()
+        raise
+    return process.returncode, output.decode("utf-8", "replace")
+
+class BuildCache:
+    """Directories addressed by a hash of what they were built from, published atomically"""
+
+    def __init__(self, root: str, max_builds: int):
+        """
+        Args:
+            root: cache directory
+            max_builds: learner builds kept; the least recently used are removed beyond that
+        """
+        self.root = root
+        self.max_builds = max_builds
+        self._build_count: Optional[int] = None
+
+    def path(self, kind: str, key: str) -> str:
+        return os.path.join(self.root, kind, key)
+
+    def get(self, kind: str, key: str) -> Optional[str]:
+        """Path of an entry if it exists (marking it recently used)"""
+        path = self.path(kind, key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def staging(self, owner: Optional[Tuple[int, int]] = None) -> str:
+        """A new private directory to build an entry in, writable by `owner` (the compile user)"""
+        staging_root = os.path.join(self.root, "staging")
+        os.makedirs(staging_root, exist_ok=True)
+        staged = tempfile.mkdtemp(dir=staging_root)
+        _give_to(staged, owner)
+        return staged
+
+    def publish(self, kind: str, key: str, staged: str) -> str:
+        """
+        Move a staged directory into place (owned by the server user, readable
+        by the sandbox user) and return its path
+        """
+        path = self.path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.getuid() == 0:
+            _give_to(staged, (0, 0))
+        os.chmod(staged, 0o755)
+        try:
+            os.rename(staged, path)
+        except OSError:
+            # Built concurrently by someone else; entries with the same key are interchangeable
+            shutil.rmtree(staged, ignore_errors=True)
+            return path
+        if kind == "builds":
+            self._count_build()
+        return path
+
+    def _count_build(self) -> None:
+        if self._build_count is None:
+            self._build_count = len(os.listdir(os.path.join(self.root, "builds")))
+        else:
+            self._build_count += 1
+        if self._build_count > self.max_builds:
+            self._prune_builds()
+
+    def _prune_builds(self) -> None:
+        builds = os.path.join(self.root, "builds")
+        entries = sorted(os.scandir(builds), key=lambda entry: entry.stat().st_mtime)
+        excess = len(entries) - int(self.max_builds * 0.9)
+        for entry in entries[:max(0, excess)]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+        self._build_count = len(entries) - max(0, excess)
+        metrics.inc("toolchain_builds_evicted", max(0, excess))
+
+class CompileWorker:
+    """A warm build workspace for one language, with its compile server if the toolchain has one"""
+
+    def __init__(
+        self,
+        toolchain: Toolchain,
+        workspace: str,
+        variables: Dict[str, str],
+        env: Dict[str, str],
+        owner: Optional[Tuple[int, int]] = None
+    ):
+        self.toolchain = toolchain
+        self.workspace = workspace
+        self.variables = variables
+        self.env = env
+        self.owner = owner
+        self._server: Optional[asyncio.subprocess.Process] = None
+        self._server_broken = False
+
+    async def prepare(self, timeout: float) -> None:
+        """Write the scaffold and restore / warm up its dependencies"""
+        os.makedirs(self.workspace, exist_ok=True)
+        for name, content in self.toolchain.scaffold.items():
+            self._write(name, expand(content, self.variables))
+        # Only the compile user works here
+        _give_to(self.workspace, self.owner)
+        os.chmod(self.workspace, 0o700)
+        if self.toolchain.prepare:
+            status, output = await _run_process(
+                self._command(self.toolchain.prepare), self.workspace, self.env, timeout, self.owner
+            )
+            if status != 0:
+                raise RuntimeError(f"preparing the workspace failed: {output.strip()[-500:]}")
+        if self.toolchain.compile_server:
+            await self._start_server()
+
+    async def compile(self, code: str, out: str, timeout: float) -> Tuple[bool, str]:
+        """Compile the learner's file into `out`: (succeeded, diagnostics)"""
+        source = self._write(self.toolchain.source_name, code)
+
+        if self.toolchain.compile_server and not self._server_broken:
+            try:
+                ok, output = await self._compile_on_server(source, out, timeout)
+                return ok, self._clean(output, out)
+            except asyncio.TimeoutError:
+                await self._stop_server()
+                raise
+            except (OSError, ValueError, RuntimeError) as e:
+                await self._stop_server()
+                if self.toolchain.compile is None:
+                    raise
+                logger.warning(f"{self.toolchain.language} compile server failed, compiling directly: {str(e)}")
+
+        variables = {**self.variables, "src": source, "out": out}
+        status, output = await _run_process(
+            [expand(arg, variables) for arg in self.toolchain.compile], self.workspace, self.env, timeout, self.owner
+        )
+        return status == 0, self._clean(output, out)
+
+    async def stop(self) -> None:
+        await self._stop_server()
+
+    async def _compile_on_server(self, source: str, out: str, timeout: float) -> Tuple[bool, str]:
+        if self._server is None or self._server.returncode is not None:
+            await self._start_server()
+        request = json.dumps({"source": source, "out": out}) + "\n"
+        try:
+            self._server.stdin.write(request.encode())
+            await self._server.stdin.drain()
+            line = await asyncio.wait_for(self._server.stdout.readline(), timeout)
+        except asyncio.CancelledError:
+            # The answer would be read by the next request; start over instead
+            await self._stop_server()
+            raise
+        if not line:
+            raise RuntimeError("compile server exited")
+        response = json.loads(line)
+        return bool(response.get("ok")), response.get("output") or ""
+
+    async def _start_server(self) -> None:
+        started = time.perf_counter()
+        self._server = await asyncio.create_subprocess_exec(
+            *self._command(self.toolchain.compile_server),
+            cwd=self.workspace,
+            env=self.env,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            start_new_session=True,
+            # Long-lived, so no CPU limit; each request has the compile timeout
+            preexec_fn=_compiler_setup(None),
+            **_as_owner(self.owner),
+        )
+        try:
+            ready = await asyncio.wait_for(self._server.stdout.readline(), 30)
+            if not ready or not json.loads(ready).get("ready"):
+                raise RuntimeError("compile server didn't start")
+        except BaseException:
+            await self._stop_server()
+            # Fall back to the compile command from now on, where there is one
+            self._server_broken = self.toolchain.compile is not None
+            raise
+        metrics.inc(f"toolchain_{self.toolchain.language}_server_starts")
+        metrics.observe("toolchain_server_start_seconds", time.perf_counter() - started)
+
+    async def _stop_server(self) -> None:
+        server, self._server = self._server, None
+        if server is not None and server.returncode is None:
+            server.kill()
+            await server.wait()
+
+    def _command(self, template: List[str]) -> List[str]:
+        return [expand(arg, self.variables) for arg in template]
+
+    def _write(self, name: str, content: str) -> str:
+        # A fresh file: never write through whatever the compile user left at this path
+        path = os.path.join(self.workspace, name)
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        with open(path, "x") as f:
+            f.write(content)
+        return path
+
+    def _clean(self, output: str, out: str) -> str:
+        # Diagnostics name files relative to the workspace, not the server's directories
+        output = output.replace(self.workspace + os.sep, "").replace(out + os.sep, "")
+        return output.strip()
+
+class ToolchainManager:
+    """
+    Detects the installed toolchains, keeps their compile workers warm and
+    builds submissions through the content-addressed build cache.
+    """
+
+    def __init__(self, toolchains: Dict[str, Toolchain]):
+        """Initialize the manager"""
+        self.toolchains = toolchains
+        root = settings.CODE_RUNNER_BUILD_CACHE_DIR or os.path.join(tempfile.gettempdir(), "code-runner-cache")
+        self.cache = BuildCache(os.path.abspath(root), settings.CODE_RUNNER_BUILD_CACHE_MAX_ENTRIES)
+        self._detected: Dict[str, Dict[str, Any]] = {}
+        self._prepared: Dict[str, asyncio.Task] = {}
+        self._workers: Dict[str, asyncio.Queue] = {}
+        self._all_workers: List[CompileWorker] = []
+        self._builds: Dict[str, asyncio.Future] = {}
+        self._warmup: Optional[asyncio.Task] = None
+        metrics.register_collector("toolchains", self.get_stats)
+
+    async def start(self) -> None:
+        """Detect toolchains and warm up the available ones in the background"""
+        if self._warmup is None:
+            self._warmup = asyncio.create_task(self._warm_up())
+
+    async def stop(self) -> None:
+        """Stop compile servers"""
+        if self._warmup is not None:
+            self._warmup.cancel()
+            await asyncio.gather(self._warmup, return_exceptions=True)
+            self._warmup = None
+        for task in self._prepared.values():
+            task.cancel()
+        await asyncio.gather(*self._prepared.values(), return_exceptions=True)
+        self._prepared.clear()
+        for worker in self._all_workers:
+            await worker.stop()
+        self._all_workers.clear()
+        self._workers.clear()
+
+    def detect(self, language: str) -> Dict[str, Any]:
+        """{"available", "version" or "reason"} for a language's toolchain, detected once"""
+        detected = self._detected.get(language)
+        if detected is None:
+            detected = self._detect(self.toolchains[language])
+            self._detected[language] = detected
+            if detected["available"]:
+                logger.info(f"{language} toolchain: {detected['version']}")
+            else:
+                logger.info(f"{language} toolchain unavailable: {detected['reason']}")
+        return detected
+
+    def available(self, language: str) -> bool:
+        return language in self.toolchains and self.detect(language)["available"]
+
+    def unavailable_reason(self, language: str) -> Optional[str]:
+        if language not in self.toolchains:
+            return "no toolchain for this language"
+        return self.detect(language).get("reason")
+
+    async def build(self, language: str, code: str) -> Dict[str, Any]:
+        """
+        Compile a submission, or reuse its cached build: {"ok", "cached",
+        "compile_ms", "error", "artifact"}. compile_ms is None for languages
+        that aren't compiled.
+        """
+        toolchain = self.toolchains[language]
+        try:
+            await self._prepare(language)
+        except Exception as e:
+            return self._build_result(False, False, None, f"Sandbox toolchain for {language} is unavailable: {str(e)}")
+        if not toolchain.compiled:
+            return self._build_result(True, False, None, None)
+
+        detected = self.detect(language)
+        key = _content_key(detected["fingerprint"], detected["harness"], code)
+        artifact = self.cache.get("builds", key)
+        if artifact is not None:
+            metrics.inc("toolchain_build_cache_hits")
+            return self._build_result(True, True, 0.0, None, artifact)
+        metrics.inc("toolchain_build_cache_misses")
+
+        in_flight = self._builds.get(key)
+        if in_flight is not None:
+            metrics.inc("toolchain_builds_coalesced")
+            return await asyncio.shield(in_flight)
+        future = asyncio.get_running_loop().create_future()
+        self._builds[key] = future
+        try:
+            result = await self._compile(language, key, code)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._builds[key]
+
+    def job(self, language: str, code: str, build: Dict[str, Any]) -> Dict[str, Any]:
+        """Sandbox job fields (all but the tests) to run a build"""
+        toolchain = self.toolchains[language]
+        variables = {**self._variables(language), "artifact": build.get("artifact") or ""}
+        run_env = {name: expand(value, variables) for name, value in toolchain.run_env.items()}
+        overhead = toolchain.address_space_overhead_mb
+        return {
+            "language": language,
+            "command": [expand(arg, variables) for arg in toolchain.run],
+            "function_command": [expand(arg, variables) for arg in toolchain.function_run] if toolchain.function_run else None,
+            # Interpreted languages run the source itself, written into the sandbox's directory
+            "files": {} if toolchain.compiled else {toolchain.source_name: code},
+            "source_name": toolchain.source_name,
+            "env": {"PATH": self._path(language), "LANG": "C.UTF-8", **run_env},
+            "memory_mb": settings.CODE_RUNNER_MEMORY_MB + overhead if overhead is not None else None,
+            "max_open_files": toolchain.max_open_files,
+            "startup_seconds": toolchain.startup_seconds,
+        }
+
+    async def _warm_up(self) -> None:
+        for language in self.toolchains:
+            try:
+                detected = await asyncio.to_thread(self.detect, language)
+                if detected["available"]:
+                    await self._prepare(language)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Could not warm up the {language} toolchain: {str(e)}")
+
+    def _prepare(self, language: str) -> asyncio.Task:
+        """Build the harness and start the compile workers (once; later calls share the task)"""
+        task = self._prepared.get(language)
+        if task is None:
+            task = asyncio.create_task(self._prepare_toolchain(language))
+            self._prepared[language] = task
+        return task
+
+    async def _prepare_toolchain(self, language: str) -> None:
+        toolchain = self.toolchains[language]
+        detected = self.detect(language)
+        if not detected["available"]:
+            raise RuntimeError(detected["reason"])
+        started = time.perf_counter()
+        try:
+            owner = _compile_owner() if toolchain.compiled or toolchain.harness_build else None
+            detected["harness"] = await self._harness(toolchain, owner)
+            os.makedirs(self._cache_dir(language), exist_ok=True)
+            _give_to(self._cache_dir(language), owner)
+            os.chmod(self._cache_dir(language), 0o700)
+            if toolchain.compiled:
+                queue: asyncio.Queue = asyncio.Queue()
+                for index in range(max(1, settings.CODE_RUNNER_COMPILE_WORKERS)):
+                    worker = CompileWorker(
+                        toolchain,
+                        os.path.join(self.cache.root, "workspaces", f"{language}-{index}"),
+                        self._variables(language),
+                        self._compile_env(language),
+                        owner,
+                    )
+                    self._all_workers.append(worker)
+                    await worker.prepare(settings.CODE_RUNNER_COMPILE_TIMEOUT_SECONDS * 10)
+                    queue.put_nowait(worker)
+                self._workers[language] = queue
+        except Exception as e:
+            # Not usable after all; say so instead of failing every submission
+            detected.update(available=False, reason=str(e))
+            logger.error(f"Error preparing the {language} toolchain: {str(e)}")
+            raise
+        metrics.observe("toolchain_prepare_seconds", time.perf_counter() - started)
+        logger.info(f"{language} toolchain ready in {time.perf_counter() - started:.1f}s")
+
+    async def _harness(self, toolchain: Toolchain, owner: Optional[Tuple[int, int]]) -> str:
+        """Path of the toolchain's harness entry, building it on first use"""
+        sources = []
+        for name in toolchain.harness:
+            with open(os.path.join(HARNESS_DIR, name)) as f:
+                sources.append(f"{name}\0{f.read()}")
+        key = _content_key(self.detect(toolchain.language)["version"], json.dumps(toolchain.harness_build), *sources)
+        path = self.cache.get("harnesses", key)
+        if path is not None:
+            return path
+
+        staged = self.cache.staging()
+        try:
+            for name in toolchain.harness:
+                shutil.copy(os.path.join(HARNESS_DIR, name), staged)
+            _give_to(staged, owner)
+            if toolchain.harness_build:
+                command = [expand(arg, self._variables(toolchain.language, harness="")) for arg in toolchain.harness_build]
+                status, output = await _run_process(
+                    command,
+                    staged,
+                    self._compile_env(toolchain.language),
+                    settings.CODE_RUNNER_COMPILE_TIMEOUT_SECONDS * 4,
+                    owner,
+                )
+                if status != 0:
+                    raise RuntimeError(f"building the harness failed: {output.strip()[-500:]}")
+        except BaseException:
+            shutil.rmtree(staged, ignore_errors=True)
+            raise
+        return self.cache.publish("harnesses", key, staged)
+
+    async def _compile(self, language: str, key: str, code: str) -> Dict[str, Any]:
+        timeout = settings.CODE_RUNNER_COMPILE_TIMEOUT_SECONDS
+        queue = self._workers[language]
+        worker = await queue.get()
+        staged = self.cache.staging(worker.owner)
+        started = time.perf_counter()
+        ok, error = False, None
+        try:
+            ok, output = await worker.compile(code, staged, timeout)
+            if not ok:
+                error = "Compilation failed:\n" + (output[:2000] or "(no compiler output)")
+        except asyncio.TimeoutError:
+            error = f"Timed out compiling after {timeout:g}s"
+        except Exception as e:
+            logger.error(f"Error compiling {language} submission: {str(e)}")
+            error = "Sandbox compiler failed"
+        finally:
+            queue.put_nowait(worker)
+            if not ok:
+                shutil.rmtree(staged, ignore_errors=True)
+        seconds = time.perf_counter() - started
+        metrics.inc(f"toolchain_{language}_builds")
+        metrics.observe(f"toolchain_{language}_compile_seconds", seconds)
+        if not ok:
+            metrics.inc(f"toolchain_{language}_build_failures")
+            return self._build_result(False, False, seconds * 1000, error)
+        return self._build_result(True, False, seconds * 1000, None, self.cache.publish("builds", key, staged))
+
+    @staticmethod
+    def _build_result(
+        ok: bool,
+        cached: bool,
+        compile_ms: Optional[float],
+        error: Optional[str],
+        artifact: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "ok": ok,
+            "cached": cached,
+            "compile_ms": round(compile_ms, 3) if compile_ms is not None else None,
+            "error": error,
+            "artifact": artifact,
+        }
+
+    def _detect(self, toolchain: Toolchain) -> Dict[str, Any]:
+        search_path = settings.CODE_RUNNER_TOOLCHAIN_PATH or os.environ.get("PATH", os.defpath)
+        variables = {}
+        for name in toolchain.binaries:
+            path = shutil.which(name, path=search_path)
+            if path is None:
+                return {"available": False, "reason": f"{name} not found"}
+            variables[name] = os.path.abspath(path)
+        try:
+            completed = subprocess.run(
+                [expand(arg, variables) for arg in toolchain.version],
+                stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=60,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return {"available": False, "reason": f"{toolchain.binaries[0]} failed to start: {str(e)}"}
+        version = (completed.stdout + completed.stderr).strip().splitlines()
+        if completed.returncode != 0 or not version:
+            return {"available": False, "reason": f"{' '.join(toolchain.version)} failed"}
+        variables["version"] = version[0].strip()
+        if toolchain.configure is not None:
+            try:
+                variables.update(toolchain.configure(variables))
+            except ValueError as e:
+                return {"available": False, "reason": str(e)}
+        return {
+            "available": True,
+            "version": variables["version"],
+            "variables": variables,
+            # Builds are only reused by the same toolchain, scaffold and compile flags
+            "fingerprint": _content_key(
+                variables["version"],
+                json.dumps([toolchain.compile, toolchain.compile_server, toolchain.scaffold, toolchain.env]),
+            ),
+        }
+
+    def _variables(self, language: str, **extra: str) -> Dict[str, str]:
+        detected = self.detect(language)
+        heap_mb = settings.CODE_RUNNER_MEMORY_MB
+        variables = {
+            **detected["variables"],
+            "harness": detected.get("harness", ""),
+            "cache": self._cache_dir(language),
+            "heap_mb": str(heap_mb),
+            "heap_hex": hex(heap_mb * 1024 * 1024),
+        }
+        variables.update(extra)
+        return variables
+
+    def _cache_dir(self, language: str) -> str:
+        return os.path.join(self.cache.root, "toolchains", language)
+
+    def _path(self, language: str) -> str:
+        binary_dirs = [os.path.dirname(path) for name, path in self.detect(language)["variables"].items()
+                       if name in self.toolchains[language].binaries]
+        return os.pathsep.join(dict.fromkeys(binary_dirs + ["/usr/local/bin", "/usr/bin", "/bin"]))
+
+    def _compile_env(self, language: str) -> Dict[str, str]:
+        variables = self._variables(language)
+        env = {"PATH": self._path(language), "HOME": self._cache_dir(language), "LANG": "C.UTF-8"}
+        env.update({name: expand(value, variables) for name, value in self.toolchains[language].env.items()})
+        return env
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Toolchain statistics for the metrics endpoint"""
+        stats: Dict[str, Any] = {
+            "build_cache": {
+                "hit_ratio": metrics.ratio("toolchain_build_cache_hits", "toolchain_build_cache_misses"),
+                "coalesced": metrics.get("toolchain_builds_coalesced"),
+                "evicted": metrics.get("toolchain_builds_evicted"),
+            },
+        }
+        for language in self.toolchains:
+            detected = self._detected.get(language)
+            if detected is None:
+                stats[language] = {"available": None}
+                continue
+            entry = {"available": detected["available"]}
+            if detected["available"]:
+                entry["version"] = detected["version"]
+                entry["builds"] = metrics.get(f"toolchain_{language}_builds")
+                entry["build_failures"] = metrics.get(f"toolchain_{language}_build_failures")
+                queue = self._workers.get(language)
+                if queue is not None:
+                    entry["idle_compile_workers"] = queue.qsize()
+            else:
+                entry["reason"] = detected["reason"]
+            stats[language] = entry
+        return stats
+
+toolchains = ToolchainManager(TOOLCHAINS)
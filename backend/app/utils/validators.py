@@ -1,6 +1,8 @@
 from typing import Any, Dict, List, Optional
 import re
+from app.core.config import settings
 from app.core.exceptions import ValidationException
+from app.services.code_scanner import code_scanner
 
 def validate_email(email: str) -> bool:
     """Validate email format"""
@@ -53,20 +55,27 @@ def validate_quiz_answers(answers: Dict[str, Any], questions: List[Dict]) -> boo
     
     return True
 
-def validate_code_submission(code: str, language: str) -> bool:
-    """Validate code submission"""
-    if not code or len(code.strip()) == 0:
+def validate_code_submission(code: str, language: Optional[str], allow_empty: bool = False) -> bool:
+    """Validate code submission (before it is run or sent to the model)"""
+    if not allow_empty and (not code or len(code.strip()) == 0):
         raise ValidationException("Code cannot be empty")
     
+    if code and len(code) > settings.CODE_MAX_SUBMISSION_CHARS:
+        raise ValidationException(f"Code must be at most {settings.CODE_MAX_SUBMISSION_CHARS} characters long")
+    
+    language = (language or "python").lower()
     valid_languages = ["python", "javascript", "typescript", "java", "csharp", "go"]
-    if language.lower() not in valid_languages:
+    if language not in valid_languages:
         raise ValidationException(f"Unsupported language: {language}")
     
-    # Check for potential security issues (basic)
-    dangerous_patterns = ["__import__", "eval", "exec", "compile", "open(", "file("]
-    for pattern in dangerous_patterns:
-        if pattern in code:
-            raise ValidationException(f"Code contains potentially dangerous pattern: {pattern}")
+    # Security rules for the language (AST / token based, cached by code hash)
+    findings = code_scanner.scan(code or "", language)
+    if findings:
+        reasons = "; ".join(
+            f"{finding['message']} (line {finding['line']})" if finding["line"] else finding["message"]
+            for finding in findings[:5]
+        )
+        raise ValidationException(f"Code is not allowed: {reasons}")
     
     return True
 
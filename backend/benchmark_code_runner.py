@@ -0,0 +1,111 @@
+# benchmark_code_runner.py
+# Measures sandboxed test execution: submissions per second per core under
+# load, latency of a submission arriving at an idle server, and memory per
+# live sandbox, for the zygote (fork per submission), the pre-started worker
+# pool, and starting a fresh sandbox interpreter for every submission.
+# Run from backend/: python benchmark_code_runner.py [submissions] [tests_per_submission]
+import asyncio
+import os
+import sys
+import time
+
+from app.services.code_runner import CodeRunner, WorkerPool, ZygotePool
+
+SOLUTION = """
+def add(a, b):
+    return a + b
+
+if __name__ == "__main__":
+    print(add(int(input()), int(input())))
+"""
+
+def make_tests(count: int):
+    return [{"input": f"{i}\n{i + 1}", "expected_output": str(2 * i + 1)} for i in range(count)]
+
+async def measure(runner: CodeRunner, submissions: int, tests) -> float:
+    concurrency = runner.pool.size
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            result = await runner.run_tests(SOLUTION, tests)
+            assert result["all_passed"], result
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(submissions)))
+    return time.perf_counter() - started
+
+async def measure_latency(runner: CodeRunner, submissions: int, tests) -> float:
+    """Average latency of submissions that arrive one at a time, with idle time in between"""
+    total = 0.0
+    for _ in range(submissions):
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        await runner.run_tests(SOLUTION, tests)
+        total += time.perf_counter() - started
+    return total / submissions
+
+def proportional_set_kb(pid: int) -> int:
+    """Pss of a process: its private pages plus its share of pages shared with others"""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+async def measure_memory(runner: CodeRunner, count: int) -> float:
+    """Average Pss (KiB) of `count` sandboxes held ready at the same time"""
+    workers = [await runner.pool.acquire() for _ in range(count)]
+    try:
+        return sum(proportional_set_kb(worker.pid) for worker in workers) / count
+    finally:
+        for worker in workers:
+            worker.kill()
+
+class ColdPool(WorkerPool):
+    """Starts a sandbox interpreter when one is requested, like a spawn-per-run runner"""
+
+    async def start(self) -> None:
+        pass
+
+    async def acquire(self):
+        pool = WorkerPool(1)
+        pool._idle = asyncio.Queue()
+        await pool._spawn()
+        return pool._idle.get_nowait()
+
+async def run_mode(pool, submissions: int, tests, cores: int):
+    runner = CodeRunner()
+    runner.pool = pool
+    await runner.start()
+    await asyncio.sleep(1)  # let pools fill
+    await measure(runner, cores, tests)
+    seconds = await measure(runner, submissions, tests)
+    latency = await measure_latency(runner, 20, tests)
+    memory = await measure_memory(runner, min(pool.size, 4)) if os.path.exists("/proc/self/smaps_rollup") else None
+    await runner.stop()
+    return seconds, latency, memory
+
+async def main() -> None:
+    submissions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    tests = make_tests(int(sys.argv[2]) if len(sys.argv) > 2 else 5)
+    cores = os.cpu_count() or 1
+    size = CodeRunner().pool.size
+
+    modes = [
+        ("spawn per submission", ColdPool(size)),
+        ("pre-started pool", WorkerPool(size)),
+    ]
+    if hasattr(os, "fork"):
+        modes.append(("zygote fork", ZygotePool(size)))
+
+    print(f"{submissions} submissions x {len(tests)} tests, {cores} core(s), pool size {size}")
+    for label, pool in modes:
+        seconds, latency, memory = await run_mode(pool, submissions, tests, cores)
+        rate = submissions / seconds
+        memory_text = f"  {memory / 1024:5.1f} MiB Pss/sandbox" if memory is not None else ""
+        print(f"  {label:22s} {rate:7.1f} submissions/s  {rate / cores:7.1f} /s/core  "
+              f"idle-arrival latency {latency * 1000:6.1f} ms{memory_text}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+# benchmark_compact_paths.py
+# Compares memory per stored path and serialization time of plain dicts
+# against CompactLearningPath, and the memory of a cohort of paths with shared
+# content with and without the content pool.
+# Run from backend/: python benchmark_compact_paths.py [paths]
+import gc
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, List
+
+from app.core.serialization import dumps
+from app.services.compact_path import CompactLearningPath, ContentPool, compact_learning_path
+
+def make_path(seed: int, node_count: int = 8) -> Dict[str, Any]:
+    """A generated-looking path: 8 nodes, 2 exercises and a 5 question quiz per node"""
+    def uid(prefix: str) -> str:
+        return f"{prefix}{uuid.uuid4().hex[:8]}"
+
+    nodes = []
+    for n in range(node_count):
+        nodes.append({
+            "id": uid("node_"),
+            "title": f"Module {n + 1}: Azure service deep dive {seed}",
+            "description": "Learn how to design, deploy and monitor the service in production workloads.",
+            "order": n + 1,
+            "duration_hours": 10,
+            "type": "module",
+            "status": "not_started",
+            "prerequisites": [],
+            "topics": ["Azure Architecture", "Core Azure Services", "Security", "Monitoring"],
+            "learning_objectives": ["Deploy the service", "Secure access with managed identities"],
+            "resources": [{
+                "title": "Official documentation",
+                "type": "documentation",
+                "url": "https://learn.microsoft.com/azure/",
+                "duration_minutes": 30,
+                "is_required": True,
+            }],
+            "exercises": [{
+                "id": uid("ex_"),
+                "title": f"Hands-on lab {e + 1}",
+                "description": "Provision the resources and verify the deployment with the CLI.",
+                "type": "hands-on",
+                "difficulty": "intermediate",
+                "estimated_time_minutes": 45,
+                "points": 100,
+                "instructions": ["Create a resource group", "Deploy the template", "Verify the output"],
+            } for e in range(2)],
+            "quiz": {
+                "id": uid("quiz_"),
+                "title": f"Module {n + 1} assessment",
+                "description": "Check your understanding of the module.",
+                "questions": [{
+                    "id": uid("q_"),
+                    "question": f"Which service would you use for scenario {q + 1}?",
+                    "type": "multiple_choice",
+                    "options": ["Azure Functions", "Azure App Service", "Azure Kubernetes Service", "Azure VMs"],
+                    "correct_answer": q % 4,
+                    "explanation": "It matches the scaling and management requirements of the scenario.",
+                    "points": 10,
+                } for q in range(5)],
+                "passing_score": 70,
+                "time_limit_minutes": 30,
+            },
+        })
+
+    return {
+        "id": f"path_{seed}",
+        "title": f"Azure AI Engineer Learning Path {seed}",
+        "description": "Master Azure AI services to become a certified Azure AI Engineer.",
+        "total_duration_hours": 80,
+        "difficulty_level": "intermediate",
+        "certification_target": "Azure AI Engineer",
+        "nodes": nodes,
+        "metadata": {"ai_generated": True, "model": "gpt-4", "user_level": "intermediate"},
+        "created_at": "2024-01-01T00:00:00",
+    }
+
+def measure_memory(build: Callable[[], List[Any]]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return used
+
+def measure_time(fn: Callable[[], Any], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    # Paths arrive as JSON text, so each stored dict owns its own strings
+    raw = [json.dumps(make_path(i)) for i in range(count)]
+
+    dict_bytes = measure_memory(lambda: [json.loads(body) for body in raw])
+    compact_bytes = measure_memory(lambda: [CompactLearningPath.from_dict(json.loads(body)) for body in raw])
+
+    dicts = [json.loads(body) for body in raw]
+    compacts = [CompactLearningPath.from_dict(d) for d in dicts]
+    assert all(c.to_dict() == d for c, d in zip(compacts, dicts)), "round trip changed a path"
+
+    dict_seconds = measure_time(lambda: [dumps(d) for d in dicts])
+    compact_seconds = measure_time(lambda: [c.to_json() for c in compacts])
+    convert_seconds = measure_time(lambda: [CompactLearningPath.from_dict(d) for d in dicts])
+
+    print(f"paths: {count}")
+    print(f"memory per path: dict {dict_bytes / count:,.0f} B, compact {compact_bytes / count:,.0f} B "
+          f"({dict_bytes / compact_bytes:.2f}x smaller)")
+    print(f"serialize per path: dict {dict_seconds / count * 1e6:,.1f} us, "
+          f"compact {compact_seconds / count * 1e6:,.1f} us ({dict_seconds / compact_seconds:.2f}x)")
+    print(f"dict -> compact per path: {convert_seconds / count * 1e6:,.1f} us")
+
+    # Cohort: learners given one of 20 distinct paths, each copy with fresh IDs
+    # (cache hits renamed by the ID index, fallback paths)
+    cohort = [json.dumps(make_path(i % 20)) for i in range(count)]
+    unpooled_bytes = measure_memory(lambda: [CompactLearningPath.from_dict(json.loads(body)) for body in cohort])
+    pooled_bytes = measure_memory(lambda: (lambda pool: [
+        compact_learning_path(json.loads(body), pool) for body in cohort
+    ] + [pool])(ContentPool()))
+
+    pool = ContentPool()
+    pooled = [compact_learning_path(json.loads(body), pool) for body in cohort]
+    assert all(p.to_dict() == json.loads(body) for p, body in zip(pooled, cohort)), "pooling changed a path"
+
+    print(f"cohort of {count} paths from 20 distinct ones: compact {unpooled_bytes / count:,.0f} B, "
+          f"pooled {pooled_bytes / count:,.0f} B per path ({unpooled_bytes / pooled_bytes:.2f}x smaller, "
+          f"{len(pool)} unique bodies)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# benchmark_json_responses.py
+# Measures how a GET /learning-path/{path_id} body is produced for a 40-node
+# path: the previous default (jsonable_encoder + stdlib json), jsonable_encoder
+# + orjson (the default response class now), a first serialization with orjson,
+# and a repeat read served from the bytes cached with the entry.
+# Run from backend/: python benchmark_json_responses.py [nodes]
+import sys
+import time
+from typing import Any, Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.core.cache import CacheEntry
+from app.core.serialization import dumps, json_bytes_response
+from benchmark_compact_paths import make_path
+
+def per_call(fn: Callable[[], Any], repeat: int = 200) -> float:
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best
+
+def main() -> None:
+    node_count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    path = make_path(0, node_count=node_count)
+    entry = CacheEntry(path, 1)
+    size = len(dumps(path))
+
+    results = [
+        ("jsonable_encoder + json (before)", lambda: JSONResponse(jsonable_encoder(path)).body),
+        ("jsonable_encoder + orjson", lambda: ORJSONResponse(jsonable_encoder(path)).body),
+        ("orjson, first read of a version", lambda: json_bytes_response(dumps(path)).body),
+        ("cached bytes, repeat read", lambda: json_bytes_response(entry.derive("json", lambda: dumps(path))).body),
+    ]
+
+    print(f"{node_count}-node path, {size:,} bytes of JSON")
+    baseline = None
+    for name, fn in results:
+        seconds = per_call(fn)
+        baseline = baseline or seconds
+        print(f"{name:<36} {seconds * 1e6:>10,.1f} us  ({baseline / seconds:,.1f}x)")
+
+if __name__ == "__main__":
+    main()
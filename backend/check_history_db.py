@@ -0,0 +1,71 @@
+# check_history_db.py
+# Checks that history (paths, quiz attempts, submissions) is recorded and listed by the database.
+# Run against a migrated database: DATABASE_URL=... python check_history_db.py
+import asyncio
+import sys
+from typing import List
+from uuid import uuid4
+
+from sqlalchemy import event
+
+from app.core.database import dispose_engine, get_engine
+from app.services.history_service import history_service
+
+def _enforce_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+    # SQLite ignores foreign keys unless asked to; PostgreSQL always enforces them
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+async def main() -> int:
+    engine = get_engine()
+    if engine is None:
+        print("❌ DATABASE_URL is not set")
+        return 1
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _enforce_sqlite_foreign_keys)
+
+    # Fresh IDs that exist nowhere else, as for learners and generated content in production
+    run = uuid4().hex[:8]
+    user_id, path_id, quiz_id, exercise_id = (f"check-{kind}-{run}" for kind in ("user", "path", "quiz", "exercise"))
+
+    await history_service.record_path(user_id, {"id": path_id, "title": "History check"})
+    for score in (40, 90):
+        await history_service.record_quiz_attempt(user_id, quiz_id, score, score >= 70, {"q1": 0}, 5)
+    await history_service.record_submission(
+        user_id, exercise_id, "print('hi')", "python", 3, {"passed": True, "points_earned": 10}
+    )
+
+    checks = [
+        ("Generated path", await history_service.list_paths(user_id, include_total=True), 1),
+        ("Quiz attempts", await history_service.list_quiz_attempts(quiz_id, include_total=True), 2),
+        ("Exercise submissions", await history_service.list_submissions(exercise_id, include_total=True), 1),
+    ]
+    # Keyset pagination: the second attempt page holds the first (oldest) attempt
+    first_page = await history_service.list_quiz_attempts(quiz_id, limit=1)
+    second_page = await history_service.list_quiz_attempts(quiz_id, cursor=first_page.next_cursor, limit=1)
+
+    failures: List[str] = []
+    for description, page, expected in checks:
+        if len(page.items) == expected and page.total == expected:
+            print(f"✅ {description}: recorded and listed ({expected})")
+        else:
+            print(f"❌ {description}: expected {expected}, listed {len(page.items)} (total {page.total})")
+            failures.append(description)
+    if [item["attempt_number"] for item in first_page.items + second_page.items] == [2, 1] and second_page.next_cursor is None:
+        print("✅ Quiz attempts: pages follow the cursor")
+    else:
+        print("❌ Quiz attempts: cursor pages are wrong")
+        failures.append("Cursor pages")
+
+    await dispose_engine()
+
+    if failures:
+        print(f"\n{len(failures)} history checks failed (see the errors logged above)")
+        return 1
+
+    print("\nHistory is recorded and listed by the database")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
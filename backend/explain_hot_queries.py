@@ -0,0 +1,142 @@
+# explain_hot_queries.py
+# Checks that the hot queries are served by the indexes from migration 0002.
+# Run against a migrated database: DATABASE_URL=... python explain_hot_queries.py
+import asyncio
+import json
+import sys
+from typing import Any, Dict, List, Set
+
+from sqlalchemy import text
+
+from app.core.database import dispose_engine, get_engine
+
+# (description, query, index that must appear in the plan)
+HOT_QUERIES = [
+    (
+        "User's attempts on a quiz ordered by time",
+        "SELECT * FROM quiz_attempts WHERE user_id = 'u1' AND quiz_id = 'quiz_1' "
+        "ORDER BY created_at DESC LIMIT 20",
+        "ix_quiz_attempts_user_id_quiz_id_created_at",
+    ),
+    (
+        "Attempts on a quiz ordered by time",
+        "SELECT * FROM quiz_attempts WHERE quiz_id = 'quiz_1' ORDER BY created_at DESC LIMIT 20",
+        "ix_quiz_attempts_quiz_id_created_at",
+    ),
+    (
+        "User's submissions for an exercise ordered by time",
+        "SELECT * FROM exercise_submissions WHERE user_id = 'u1' AND exercise_id = 'ex_1' "
+        "ORDER BY created_at DESC LIMIT 20",
+        "ix_exercise_submissions_user_id_exercise_id_created_at",
+    ),
+    (
+        "Submissions for an exercise ordered by time",
+        "SELECT * FROM exercise_submissions WHERE exercise_id = 'ex_1' "
+        "ORDER BY created_at DESC LIMIT 20",
+        "ix_exercise_submissions_exercise_id_created_at",
+    ),
+    (
+        "User's learning paths, newest first",
+        "SELECT * FROM learning_paths WHERE user_id = 'u1' ORDER BY created_at DESC LIMIT 20",
+        "ix_learning_paths_user_id_created_at",
+    ),
+    # Keyset pages (see HistoryService._list): the cursor becomes an index range, not an offset
+    (
+        "Page of a user's learning paths after a cursor",
+        "SELECT * FROM learning_paths WHERE user_id = 'u1' AND created_at <= '2024-01-01' "
+        "AND (created_at < '2024-01-01' OR id < 'p1') ORDER BY created_at DESC, id DESC LIMIT 21",
+        "ix_learning_paths_user_id_created_at",
+    ),
+    (
+        "Page of attempts on a quiz after a cursor",
+        "SELECT * FROM quiz_attempts WHERE quiz_id = 'quiz_1' AND created_at <= '2024-01-01' "
+        "AND (created_at < '2024-01-01' OR id < 'a1') ORDER BY created_at DESC, id DESC LIMIT 21",
+        "ix_quiz_attempts_quiz_id_created_at",
+    ),
+    (
+        "Page of submissions for an exercise after a cursor",
+        "SELECT * FROM exercise_submissions WHERE exercise_id = 'ex_1' AND created_at <= '2024-01-01' "
+        "AND (created_at < '2024-01-01' OR id < 's1') ORDER BY created_at DESC, id DESC LIMIT 21",
+        "ix_exercise_submissions_exercise_id_created_at",
+    ),
+    (
+        "Nodes of a path in order",
+        "SELECT * FROM path_nodes WHERE learning_path_id = 'path_1' ORDER BY \"order\"",
+        "ix_path_nodes_learning_path_id_order",
+    ),
+    (
+        "Exercises of a node",
+        "SELECT * FROM exercises WHERE node_id = 'node_1'",
+        "ix_exercises_node_id",
+    ),
+    (
+        "Questions of a quiz in order",
+        "SELECT * FROM quiz_questions WHERE quiz_id = 'quiz_1' ORDER BY \"order\"",
+        "ix_quiz_questions_quiz_id_order",
+    ),
+    (
+        "Progress of a user on a path",
+        "SELECT * FROM learning_progress WHERE user_id = 'u1' AND learning_path_id = 'path_1'",
+        "ix_learning_progress_user_id_learning_path_id",
+    ),
+    (
+        "Nodes covering a topic",
+        "SELECT id FROM path_nodes WHERE topics @> '[\"MLOps\"]'::jsonb",
+        "ix_path_nodes_topics_gin",
+    ),
+    (
+        "Nodes that depend on a node",
+        "SELECT id FROM path_nodes WHERE prerequisites @> '[\"node_1\"]'::jsonb",
+        "ix_path_nodes_prerequisites_gin",
+    ),
+    (
+        "Learners who completed a node",
+        "SELECT user_id FROM learning_progress WHERE completed_nodes @> '[\"node_1\"]'::jsonb",
+        "ix_learning_progress_completed_nodes_gin",
+    ),
+]
+
+def collect_index_names(plan: Dict[str, Any]) -> Set[str]:
+    """Collect every index referenced anywhere in an EXPLAIN (FORMAT JSON) plan"""
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= collect_index_names(child)
+    return names
+
+async def main() -> int:
+    engine = get_engine()
+    if engine is None:
+        print("❌ DATABASE_URL is not set")
+        return 1
+    
+    failures: List[str] = []
+    async with engine.connect() as conn:
+        # Empty or tiny tables are cheapest to scan sequentially; turn that off so the
+        # plan shows which index the query would use on a populated table.
+        await conn.execute(text("SET enable_seqscan = off"))
+        
+        for description, query, expected_index in HOT_QUERIES:
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}"))
+            raw = result.scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            used = collect_index_names(plan)
+            
+            if expected_index in used:
+                print(f"✅ {description}: {expected_index}")
+            else:
+                print(f"❌ {description}: expected {expected_index}, plan used {sorted(used) or 'no index'}")
+                failures.append(description)
+    
+    await dispose_engine()
+    
+    if failures:
+        print(f"\n{len(failures)} hot queries are not using their index")
+        return 1
+    
+    print(f"\nAll {len(HOT_QUERIES)} hot queries use their index")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,72 @@
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.services.code_scanner import code_scanner
+from app.utils.validators import validate_code_submission
+
+def rules(code: str, language: str = "python"):
+    return [finding["rule"] for finding in code_scanner.scan(code, language)]
+
+@pytest.mark.parametrize("code", [
+    "import os\ngetattr(os, 'system')('id > /tmp/x')",
+    "import os as o\ngetattr(o, 'popen')('id')",
+    "import sys\ngetattr(sys, 'modules')",
+    "import os\nm = os\nm.system('id')",
+    "import os\nm = os\ngetattr(m, 'execv')('/bin/sh', [])",
+    "def f(x):\n    return getattr(x, 'system')\n",
+])
+def test_reflection_with_constant_names(code):
+    assert "blocked-attribute" in rules(code)
+
+@pytest.mark.parametrize("code", [
+    "import os\nprint(os.environ)",
+    "from os import environ",
+    "import os\nos.getenv('AZURE_OPENAI_API_KEY')",
+])
+def test_environment(code):
+    assert "blocked-attribute" in rules(code)
+
+@pytest.mark.parametrize("code", [
+    "import pathlib\npathlib.Path('/etc/passwd').read_text()",
+    "from pathlib import Path\nPath('/etc/passwd').read_bytes()",
+    "import linecache\nlinecache.getline('/etc/passwd', 1)",
+    "import fileinput\nlist(fileinput.input('/etc/passwd'))",
+])
+def test_file_reads(code):
+    assert "blocked-module" in rules(code)
+
+@pytest.mark.parametrize("code", [
+    "import operator, os\noperator.attrgetter('system')(os)('id')",
+    "from operator import methodcaller\nmethodcaller('system', 'id')",
+])
+def test_operator_getters(code):
+    assert "blocked-attribute" in rules(code)
+
+@pytest.mark.parametrize("code", [
+    "import os\nos.__dict__['system']('id')",
+    "import os\nvars(os)['system']('id')",
+])
+def test_module_dicts(code):
+    assert set(rules(code)) & {"introspection", "blocked-builtin"}
+
+def test_deeply_nested_code_is_rejected():
+    deep = "x = " + "+".join(["1"] * 600)
+    assert rules(deep) == ["too-complex"]
+    with pytest.raises(ValidationException):
+        validate_code_submission(deep, "python")
+
+def test_submission_size_limit():
+    code = "x = 1\n" * (settings.CODE_MAX_SUBMISSION_CHARS // 6 + 1)
+    with pytest.raises(ValidationException):
+        validate_code_submission(code, "python")
+
+@pytest.mark.parametrize("code", [
+    "import math\nprint(math.sqrt(4))",
+    "def evaluate(x):\n    return getattr(x, 'name', None)\n",
+    "import os\nprint(os.path.join('a', 'b'))",
+    "from operator import itemgetter\nsorted([(1, 2)], key=itemgetter(1))",
+])
+def test_ordinary_code_passes(code):
+    assert rules(code) == []
+    assert validate_code_submission(code, "python")